@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Grado, Curso, Estudiante, Nota
+from .busqueda import filtrar_por_busqueda
+from .models import Grado, Curso, Estudiante, Nota, Tarea
+from .tareas import reintentar
 
 @admin.register(Grado)
 class GradoAdmin(admin.ModelAdmin):
@@ -17,11 +19,30 @@ class CursoAdmin(admin.ModelAdmin):
 class EstudianteAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'grado', 'situacion', 'fecha_registro')
     list_filter = ('grado', 'situacion', 'sexo')
-    search_fields = ('nombre',)
+    search_fields = ('nombre', 'id_estudiante')
     filter_horizontal = ('cursos',)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Busca con el índice de texto completo en lugar de LIKE '%...%'."""
+        return filtrar_por_busqueda(queryset, search_term), False
+
 @admin.register(Nota)
 class NotaAdmin(admin.ModelAdmin):
     list_display = ('estudiante', 'curso', 'nota', 'fecha_registro')
     list_filter = ('curso', 'fecha_registro')
     search_fields = ('estudiante__nombre', 'curso__nombre')
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tipo', 'estado', 'progreso', 'intentos', 'trabajador', 'fecha_creacion', 'fecha_fin')
+    list_filter = ('estado', 'tipo')
+    readonly_fields = (
+        'estado', 'progreso', 'mensaje', 'resultado', 'error', 'intentos', 'trabajador',
+        'disponible_desde', 'fecha_creacion', 'fecha_actualizacion', 'fecha_inicio', 'fecha_fin',
+    )
+    actions = ['reintentar_tareas']
+
+    @admin.action(description='Reintentar las tareas seleccionadas')
+    def reintentar_tareas(self, request, queryset):
+        cantidad = reintentar(queryset)
+        self.message_user(request, f'{cantidad} tareas encoladas de nuevo.')
@@ -0,0 +1,168 @@
+"""
+API JSON de solo lectura para estudiantes, grados, cursos y notas.
+
+Cada recurso responde a GET con una página de resultados:
+
+    /estudiantes/api/estudiantes/?fields=id,nombre&grado=3&limite=500
+    {"resultados": [{"id": 1, "nombre": "..."}, ...], "siguiente": "...", "anterior": null}
+
+Parámetros:
+    fields   Campos separados por comas (por defecto todos). 'id' siempre se incluye.
+    limite   Tamaño de página (por defecto 100, máximo MAX_LIMITE).
+    despues, antes
+             Cursores de paginación; conviene seguir las URLs "siguiente" y "anterior".
+    ids      Lista de ids separados por comas para obtener varios registros en una sola
+             llamada (máximo MAX_IDS); ignora la paginación y reporta los ids no encontrados.
+    Además, los filtros de cada recurso (por ejemplo grado e id para estudiantes).
+
+Las filas se leen con values() y se serializan como diccionarios, sin construir
+instancias de los modelos, y la paginación es por cursor sobre la clave primaria.
+"""
+
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .models import Curso, Estudiante, Grado, Nota
+from .paginacion import paginar_por_cursor
+
+LIMITE_PREDETERMINADO = 100
+MAX_LIMITE = 10000
+MAX_IDS = 1000
+MAX_ID = 2 ** 63 - 1  # Mayor entero de SQLite; un id mayor no se puede usar en una consulta
+PARAMETROS_JSON = {'ensure_ascii': False}
+
+
+class ErrorParametro(Exception):
+    """Parámetro de la petición inválido; se responde con 400."""
+
+
+@dataclass
+class Recurso:
+    """Modelo expuesto por la API: campos disponibles y filtros (parámetro -> lookup)."""
+    modelo: type
+    campos: tuple
+    filtros: dict = field(default_factory=dict)
+
+
+RECURSOS = {
+    'estudiantes': Recurso(
+        Estudiante,
+        campos=(
+            'id', 'id_estudiante', 'nombre', 'fecha_nacimiento', 'sexo', 'situacion', 'grado_id',
+            'promedio', 'total_notas', 'fecha_registro',
+        ),
+        filtros={'grado': 'grado_id', 'id': 'id_estudiante', 'situacion': 'situacion'},
+    ),
+    'grados': Recurso(
+        Grado,
+        campos=('id', 'nombre', 'descripcion', 'duracion', 'fecha_creacion'),
+    ),
+    'cursos': Recurso(
+        Curso,
+        campos=('id', 'codigo', 'nombre', 'creditos', 'año', 'grado_id'),
+        filtros={'grado': 'grado_id', 'codigo': 'codigo'},
+    ),
+    'notas': Recurso(
+        Nota,
+        campos=(
+            'id', 'estudiante_id', 'curso_id', 'nota', 'observaciones', 'fecha_registro',
+            'estudiante_id_form', 'estudiante_nombre', 'curso_codigo', 'curso_nombre',
+        ),
+        filtros={'estudiante': 'estudiante_id', 'curso': 'curso_id', 'grado': 'estudiante__grado'},
+    ),
+}
+
+
+def _campos_pedidos(recurso, parametro):
+    if not parametro:
+        return list(recurso.campos)
+    campos = [nombre.strip() for nombre in parametro.split(',') if nombre.strip()]
+    desconocidos = [nombre for nombre in campos if nombre not in recurso.campos]
+    if desconocidos:
+        raise ErrorParametro(
+            f'Campos desconocidos: {", ".join(desconocidos)}. Disponibles: {", ".join(recurso.campos)}.'
+        )
+    return ['id'] + [nombre for nombre in campos if nombre != 'id']
+
+
+def _entero(valor, nombre, minimo=1, maximo=MAX_ID):
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        raise ErrorParametro(f'"{nombre}" debe ser un número entero.')
+    if not minimo <= numero <= maximo:
+        raise ErrorParametro(f'"{nombre}" debe estar entre {minimo} y {maximo}.')
+    return numero
+
+
+def _filtra_por_id(recurso, lookup):
+    """Si el filtro compara una clave primaria o foránea, cuyo valor debe ser un id válido."""
+    campo = recurso.modelo._meta.get_field(lookup.split('__')[0])
+    return campo.primary_key or campo.is_relation
+
+
+def _url_pagina(request, cursor_parametro, cursor):
+    parametros = request.GET.copy()
+    parametros.pop('despues', None)
+    parametros.pop('antes', None)
+    parametros[cursor_parametro] = cursor
+    return request.build_absolute_uri(f'{request.path}?{parametros.urlencode()}')
+
+
+def consultar(recurso, request):
+    """Construye el cuerpo de la respuesta de un recurso a partir de los parámetros de la petición."""
+    campos = _campos_pedidos(recurso, request.GET.get('fields'))
+    queryset = recurso.modelo.objects.order_by()
+    for parametro, lookup in recurso.filtros.items():
+        valor = request.GET.get(parametro)
+        if valor:
+            if _filtra_por_id(recurso, lookup):
+                valor = _entero(valor, parametro)
+            queryset = queryset.filter(**{lookup: valor})
+
+    if 'ids' in request.GET:
+        ids = {_entero(valor, 'ids') for valor in request.GET['ids'].split(',') if valor.strip()}
+        if len(ids) > MAX_IDS:
+            raise ErrorParametro(f'Se pueden pedir como máximo {MAX_IDS} ids por llamada.')
+        resultados = list(queryset.filter(pk__in=ids).order_by('pk').values(*campos))
+        encontrados = {fila['id'] for fila in resultados}
+        return {'resultados': resultados, 'no_encontrados': sorted(ids - encontrados)}
+
+    limite = _entero(request.GET.get('limite', LIMITE_PREDETERMINADO), 'limite', maximo=MAX_LIMITE)
+    pagina = paginar_por_cursor(
+        queryset.values(*campos), ('id',),
+        despues=request.GET.get('despues'), antes=request.GET.get('antes'), tamaño=limite,
+    )
+    return {
+        'resultados': pagina.objetos,
+        'siguiente': _url_pagina(request, 'despues', pagina.cursor_siguiente) if pagina.hay_siguiente else None,
+        'anterior': _url_pagina(request, 'antes', pagina.cursor_anterior) if pagina.hay_anterior else None,
+    }
+
+
+def vista_recurso(nombre):
+    """Crea la vista de solo lectura de un recurso de RECURSOS."""
+    recurso = RECURSOS[nombre]
+
+    @require_GET
+    def vista(request):
+        try:
+            datos = consultar(recurso, request)
+        except (ErrorParametro, ValueError, ValidationError) as error:
+            # ValueError y ValidationError provienen de filtros con valores del tipo incorrecto
+            mensaje = str(error) if isinstance(error, ErrorParametro) else 'Valor de filtro inválido.'
+            return JsonResponse({'error': mensaje}, status=400, json_dumps_params=PARAMETROS_JSON)
+        return JsonResponse(datos, encoder=DjangoJSONEncoder, json_dumps_params=PARAMETROS_JSON)
+
+    vista.__name__ = f'api_{nombre}'
+    return vista
+
+
+estudiantes = vista_recurso('estudiantes')
+grados = vista_recurso('grados')
+cursos = vista_recurso('cursos')
+notas = vista_recurso('notas')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GestionEstudiantesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestion_estudiantes'
+
+    def ready(self):
+        # Registra los receptores de señales y las verificaciones del sistema
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,210 @@
+"""
+Boletines de notas de todos los estudiantes de un grado, en HTML listo para imprimir.
+
+Los datos de todo el grado se leen con una cantidad fija de consultas, sin importar
+la cantidad de estudiantes ni de cursos: estudiantes, cursos, notas, historial
+ponderado (historial.py) y posiciones (rankings.py). Con ellos se arma en memoria
+un contexto por estudiante formado solo por valores simples, que se puede enviar a
+otros procesos; la renderización de las plantillas, que es la parte costosa, se
+reparte entre los núcleos con un ProcessPoolExecutor. Los procesos no consultan la base.
+
+Los boletines se empaquetan en un ZIP que se escribe a medida que se generan, así
+que la respuesta empieza a enviarse de inmediato y el HTML generado no se acumula;
+la memoria crece con los contextos, es decir, con los estudiantes y cursos del
+grado. El último archivo del ZIP es un informe con la cantidad de boletines y la
+velocidad en boletines por segundo, que también se registra en el log.
+
+El pool de procesos solo se usa en la tarea en segundo plano y en el comando
+generar_boletines. La descarga desde la web renderiza en el mismo proceso, para no
+crear procesos por cada petición dentro del servidor, y los grados con más de
+BOLETINES_MAXIMO_EN_LINEA estudiantes se envían a la cola de tareas (tareas.py) con
+un formulario POST, sin crear otra tarea si ya hay una sin terminar para el grado.
+"""
+
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import django
+from django.conf import settings
+from django.contrib import messages
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .historial import Historial, historiales_grado
+from .models import Grado, Nota, Posicion
+
+logger = logging.getLogger('gestion_estudiantes.boletines')
+
+PLANTILLA = 'gestion_estudiantes/boletin.html'
+
+
+@dataclass
+class Rendimiento:
+    """Cantidad de boletines generados y tiempo total, para informar la velocidad."""
+    boletines: int = 0
+    segundos: float = 0.0
+
+    @property
+    def por_segundo(self):
+        return self.boletines / self.segundos if self.segundos else 0.0
+
+
+def datos_boletines(grado):
+    """
+    Retorna el contexto del boletín de cada estudiante del grado, en orden alfabético,
+    con cinco consultas: estudiantes, cursos, notas, historiales y posiciones.
+    """
+    estudiantes = list(
+        grado.estudiantes.order_by('nombre', 'id').values(
+            'id', 'id_estudiante', 'nombre', 'fecha_nacimiento', 'situacion', 'promedio', 'total_notas'
+        )
+    )
+    cursos = list(grado.cursos.order_by('año', 'nombre').values('id', 'codigo', 'nombre', 'creditos', 'año'))
+    ids = [estudiante['id'] for estudiante in estudiantes]
+
+    notas = {
+        (estudiante_id, curso_id): (nota, observaciones)
+        for estudiante_id, curso_id, nota, observaciones in Nota.objects.filter(estudiante__grado=grado)
+        .order_by().values_list('estudiante_id', 'curso_id', 'nota', 'observaciones')
+    }
+    historiales = historiales_grado(grado)
+    posiciones_cursos = {}
+    posiciones_grado = {}
+    for estudiante_id, curso_id, grado_id, puesto, total, percentil, cuartil in (
+        Posicion.objects.filter(estudiante_id__in=ids).order_by()
+        .values_list('estudiante_id', 'curso_id', 'grado_id', 'puesto', 'total', 'percentil', 'cuartil')
+    ):
+        posicion = {'puesto': puesto, 'total': total, 'percentil': percentil, 'cuartil': cuartil}
+        if curso_id is not None:
+            posiciones_cursos[(estudiante_id, curso_id)] = posicion
+        elif grado_id == grado.pk:
+            posiciones_grado[estudiante_id] = posicion
+
+    nota_aprobatoria = settings.NOTA_APROBATORIA
+    fecha_emision = timezone.localdate()
+    contextos = []
+    for estudiante in estudiantes:
+        filas = []
+        for curso in cursos:
+            nota, observaciones = notas.get((estudiante['id'], curso['id']), (None, None))
+            filas.append({
+                **curso,
+                'nota': nota,
+                'reprobada': nota is not None and nota < nota_aprobatoria,
+                'observaciones': observaciones,
+                'posicion': posiciones_cursos.get((estudiante['id'], curso['id'])),
+            })
+        contextos.append({
+            'grado': grado.nombre,
+            'estudiante': estudiante,
+            'cursos': filas,
+            'historial': historiales.get(estudiante['id'], Historial(estudiante['id'])),
+            'posicion_grado': posiciones_grado.get(estudiante['id']),
+            'fecha_emision': fecha_emision,
+        })
+    return contextos
+
+
+def nombre_archivo(contexto):
+    estudiante = contexto['estudiante']
+    return f"boletin-{slugify(estudiante['id_estudiante'])}-{slugify(estudiante['nombre'])}.html"
+
+
+def renderizar_boletin(contexto):
+    """Renderiza un boletín; retorna (nombre de archivo, contenido en bytes). No consulta la base."""
+    return nombre_archivo(contexto), render_to_string(PLANTILLA, contexto).encode('utf-8')
+
+
+def procesos_predeterminados():
+    return settings.BOLETINES_PROCESOS or os.cpu_count() or 1
+
+
+def renderizar_boletines(contextos, procesos=None):
+    """
+    Genera (nombre, contenido) para cada contexto, en orden. Con más de un proceso y
+    suficientes boletines (BOLETINES_MINIMO_PARALELO) los renderiza en paralelo.
+    """
+    procesos = procesos_predeterminados() if procesos is None else procesos
+    if procesos <= 1 or len(contextos) < settings.BOLETINES_MINIMO_PARALELO:
+        for contexto in contextos:
+            yield renderizar_boletin(contexto)
+        return
+    # Lotes grandes para que el costo de enviar cada contexto al proceso sea despreciable
+    tamaño_lote = max(1, len(contextos) // (procesos * 4))
+    with ProcessPoolExecutor(max_workers=procesos, initializer=django.setup) as pool:
+        yield from pool.map(renderizar_boletin, contextos, chunksize=tamaño_lote)
+
+
+class _SalidaZip:
+    """Destino no posicionable para zipfile que acumula lo escrito hasta que se retira."""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def zip_boletines(grado, procesos=None, rendimiento=None):
+    """
+    Genera el ZIP con los boletines del grado por partes, listo para una
+    StreamingHttpResponse o para escribirse en un archivo.
+    """
+    rendimiento = rendimiento if rendimiento is not None else Rendimiento()
+    inicio = time.perf_counter()
+    contextos = datos_boletines(grado)
+    salida = _SalidaZip()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+        for nombre, contenido in renderizar_boletines(contextos, procesos):
+            archivo_zip.writestr(nombre, contenido)
+            rendimiento.boletines += 1
+            yield salida.retirar()
+        rendimiento.segundos = time.perf_counter() - inicio
+        archivo_zip.writestr('informe.txt', (
+            f'Grado: {grado.nombre}\n'
+            f'Boletines: {rendimiento.boletines}\n'
+            f'Tiempo: {rendimiento.segundos:.2f} s\n'
+            f'Velocidad: {rendimiento.por_segundo:.1f} boletines/s\n'
+        ))
+    yield salida.retirar()
+    logger.info(
+        'Boletines de %s: %d en %.2f s (%.1f boletines/s)',
+        grado.nombre, rendimiento.boletines, rendimiento.segundos, rendimiento.por_segundo,
+    )
+
+
+def boletines_grado(request, pk):
+    """
+    Descarga un ZIP con los boletines de todos los estudiantes del grado, generado en
+    este proceso. Si el grado es grande, redirige a la tarea que ya los está generando
+    o pide confirmar que se encolen; un GET nunca crea tareas.
+    """
+    from .tareas import tarea_sin_terminar  # tareas.py importa este módulo
+
+    grado = get_object_or_404(Grado, pk=pk)
+    cantidad = grado.estudiantes.count()
+    if cantidad > settings.BOLETINES_MAXIMO_EN_LINEA:
+        tarea = tarea_sin_terminar('boletines_grado', grado_id=grado.pk)
+        if tarea is not None:
+            messages.info(request, 'Los boletines del grado ya se están generando en segundo plano.')
+            return redirect('tarea-detail', pk=tarea.pk)
+        return render(request, 'gestion_estudiantes/boletines_confirmar.html', {'grado': grado, 'cantidad': cantidad})
+    response = StreamingHttpResponse(zip_boletines(grado, procesos=1), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="boletines-{slugify(grado.nombre)}.zip"'
+    return response
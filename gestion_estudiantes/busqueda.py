@@ -0,0 +1,148 @@
+"""
+Búsqueda de estudiantes por nombre o ID con índices de texto completo FTS5 de SQLite.
+
+Dos tablas virtuales (migración 0017) indexan Estudiante.nombre e id_estudiante sin
+acentos, y el grado como el token "g<id>g" para filtrar por grado dentro del índice.
+Se mantienen sincronizadas con triggers, por lo que también reflejan las inserciones
+en bloque:
+
+- gestion_estudiantes_estudiante_fts (tokenizador unicode61) compara cada palabra como
+  prefijo de las palabras indexadas: "jo ga" encuentra a "José García".
+- gestion_estudiantes_estudiante_trigramas (tokenizador trigram) encuentra subcadenas:
+  "arcia" encuentra a "José García". Solo sirve si todas las palabras buscadas tienen
+  al menos 3 letras, el largo de un trigrama.
+
+Primero se muestran las coincidencias por prefijo y después las demás por subcadena,
+cada grupo ordenado por relevancia (bm25); el índice de trigramas solo se consulta
+cuando la página pedida va más allá de las coincidencias por prefijo. Para que una
+búsqueda con muchas coincidencias siga siendo rápida, bm25 se calcula solo para las
+primeras MAXIMO_CANDIDATOS coincidencias de cada índice y no se pagina más allá de
+MAXIMO_CANDIDATOS resultados; una búsqueda tan general conviene afinarla. En otros
+motores de base de datos se usa una búsqueda con icontains.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Estudiante
+
+TABLA_FTS = 'gestion_estudiantes_estudiante_fts'
+TABLA_TRIGRAMAS = 'gestion_estudiantes_estudiante_trigramas'
+
+# Deben coincidir con los de la migración 0017, que quita estos acentos al indexar con trigramas
+ACENTOS = 'áéíóúüñÁÉÍÓÚÜÑ'
+SIN_ACENTOS = 'aeiouunAEIOUUN'
+
+# Coincidencias que se clasifican por relevancia como máximo en cada búsqueda
+MAXIMO_CANDIDATOS = 500
+
+
+def fts_disponible():
+    return connection.vendor == 'sqlite'
+
+
+def construir_consultas_fts(texto, grado_id=None):
+    """
+    Retorna las consultas FTS5 para el texto como pares (tabla, consulta), de la más a
+    la menos relevante: por prefijo, cada palabra entre comillas seguida de *; por
+    subcadena, cada palabra sin acentos entre comillas, si todas tienen al menos 3
+    letras. Las comillas escapan la sintaxis de FTS5. grado_id debe ser un entero.
+    Retorna una lista vacía si no hay palabras.
+    """
+    palabras = re.findall(r'\w+', texto or '')
+    if not palabras:
+        return []
+    consultas = [(TABLA_FTS, ' '.join(f'"{palabra}"*' for palabra in palabras))]
+    if all(len(palabra) >= 3 for palabra in palabras):
+        sin_acentos = str.maketrans(ACENTOS, SIN_ACENTOS)
+        consultas.append((TABLA_TRIGRAMAS, ' '.join(f'"{palabra.translate(sin_acentos)}"' for palabra in palabras)))
+    filtro_grado = '' if grado_id is None else f' AND grado : "g{int(grado_id)}g"'
+    return [(tabla, f'{{nombre id_estudiante}} : ({terminos}){filtro_grado}') for tabla, terminos in consultas]
+
+
+def _clasificar(tabla, consulta):
+    """Ids de las primeras MAXIMO_CANDIDATOS coincidencias en `tabla`, ordenados por relevancia."""
+    # bm25 se calcula al leer rank, así que solo se calcula para los candidatos. Sin el
+    # LIMIT exterior, SQLite pasa el ORDER BY rank al índice, que ordena todas las coincidencias
+    sql = (
+        f'SELECT rowid FROM (SELECT rowid, rank FROM {tabla} WHERE {tabla} MATCH %s LIMIT %s) '
+        'ORDER BY rank, rowid LIMIT %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [consulta, MAXIMO_CANDIDATOS, MAXIMO_CANDIDATOS])
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+@dataclass
+class ResultadoBusqueda:
+    """Página de resultados de una búsqueda, ordenada por relevancia."""
+    estudiantes: list = field(default_factory=list)
+    pagina: int = 1
+    hay_siguiente: bool = False
+
+    @property
+    def hay_anterior(self):
+        return self.pagina > 1
+
+
+def buscar_estudiantes(texto, grado_id=None, pagina=1, tamaño=50):
+    """
+    Busca estudiantes por nombre o ID y retorna una página de resultados ordenada por
+    relevancia. Usa una consulta por índice necesario para llegar a la página y otra
+    para los estudiantes con su grado.
+    """
+    pagina = max(1, pagina)
+    inicio = (pagina - 1) * tamaño
+    if grado_id:
+        try:
+            grado_id = int(grado_id)
+        except (TypeError, ValueError):
+            return ResultadoBusqueda(pagina=pagina)  # Ningún estudiante está en ese grado
+    consultas = construir_consultas_fts(texto, grado_id or None)
+    if not consultas or inicio >= MAXIMO_CANDIDATOS:
+        return ResultadoBusqueda(pagina=pagina)
+    cantidad = min(tamaño + 1, MAXIMO_CANDIDATOS - inicio)
+
+    if fts_disponible():
+        clasificados = []
+        for tabla, consulta in consultas:
+            if len(clasificados) >= inicio + cantidad:
+                break
+            vistos = set(clasificados)
+            clasificados += [pk for pk in _clasificar(tabla, consulta) if pk not in vistos]
+        ids = clasificados[inicio:inicio + cantidad]
+    else:
+        queryset = Estudiante.objects.all()
+        for palabra in re.findall(r'\w+', texto):
+            queryset = queryset.filter(nombre__icontains=palabra) | queryset.filter(id_estudiante__icontains=palabra)
+        if grado_id:
+            queryset = queryset.filter(grado_id=grado_id)
+        ids = list(queryset.order_by('nombre', 'id').values_list('id', flat=True)[inicio:inicio + cantidad])
+
+    hay_siguiente = len(ids) > tamaño
+    ids = ids[:tamaño]
+    encontrados = Estudiante.objects.select_related('grado').in_bulk(ids)
+    return ResultadoBusqueda(
+        estudiantes=[encontrados[pk] for pk in ids if pk in encontrados],
+        pagina=pagina,
+        hay_siguiente=hay_siguiente,
+    )
+
+
+def filtrar_por_busqueda(queryset, texto):
+    """
+    Restringe un queryset de estudiantes a los que coinciden con la búsqueda, conservando
+    su orden. Se usa en el admin, que aplica su propio ordenamiento y paginación.
+    """
+    consultas = construir_consultas_fts(texto)
+    if not consultas:
+        return queryset
+    if not fts_disponible():
+        return queryset.filter(nombre__icontains=texto) | queryset.filter(id_estudiante__icontains=texto)
+    tabla, consulta = consultas[-1]  # La menos restrictiva: las subcadenas incluyen a los prefijos
+    return queryset.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {tabla} WHERE {tabla} MATCH %s', [consulta])
+    )
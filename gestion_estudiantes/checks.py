@@ -0,0 +1,21 @@
+"""Verificaciones del sistema para el despliegue (python manage.py check --deploy)."""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def verificar_cache_compartida(app_configs, **kwargs):
+    """Advierte si se despliega con la caché en memoria local, que no se comparte entre procesos."""
+    if not settings.CACHE_LOCAL:
+        return []
+    return [Warning(
+        'La caché en memoria local no se comparte entre procesos.',
+        hint=(
+            'Con varios procesos, cada uno ve sus propias invalidaciones y las páginas pueden '
+            'mostrar datos viejos hasta que expiran las marcas de cambio '
+            '(CONDICIONAL_MARCAS_TIMEOUT) y los fragmentos (FRAGMENTOS_CACHE_TIMEOUT). '
+            'Configure una caché compartida con DJANGO_CACHE_BACKEND y DJANGO_CACHE_LOCATION.'
+        ),
+        id='gestion_estudiantes.W001',
+    )]
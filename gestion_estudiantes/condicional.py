@@ -0,0 +1,136 @@
+"""
+Peticiones GET condicionales (ETag y Last-Modified) para las páginas de detalle y listado.
+
+Cada vista calcula un validador con una sola consulta de agregación sobre los
+registros que muestra (fechas máximas y cantidades) y lo combina con una marca de
+cambio por modelo guardada en la caché. Las marcas se reemplazan desde signals.py
+en cada guardado o eliminación, lo que cubre las ediciones que no modifican ninguna
+fecha (por ejemplo, cambiar el nombre de un estudiante o los créditos de un curso).
+Si el navegador envía un validador que coincide, la vista responde 304 sin
+consultar nada más ni renderizar la plantilla.
+
+Las marcas son el momento del último cambio en nanosegundos, así que también
+sirven para calcular Last-Modified. Si la caché descarta una marca, se vuelve a
+crear con la hora actual y la página simplemente se renderiza de nuevo.
+
+Con una caché compartida (Redis, Memcached) las marcas no expiran. Con la caché en
+memoria local cada proceso tiene sus propias marcas y solo el que atendió un cambio
+reemplaza la suya, así que duran CONDICIONAL_MARCAS_TIMEOUT segundos: los demás
+procesos dejan de responder 304 con una página vieja a más tardar en ese tiempo.
+"""
+
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+PREFIJO_MARCA = 'condicional:modelo:'
+
+
+def _clave_marca(modelo):
+    return f'{PREFIJO_MARCA}{modelo._meta.label_lower}'
+
+
+def registrar_cambio(*modelos):
+    """Actualiza la marca de cambio de los modelos indicados."""
+    ahora = time.time_ns()
+    cache.set_many({_clave_marca(modelo): ahora for modelo in modelos}, timeout=settings.CONDICIONAL_MARCAS_TIMEOUT)
+
+
+def obtener_marcas(modelos):
+    """Retorna la marca de cambio de cada modelo, creando las que falten, con una lectura a la caché."""
+    claves = [_clave_marca(modelo) for modelo in modelos]
+    marcas = cache.get_many(claves)
+    faltantes = {clave: time.time_ns() for clave in claves if clave not in marcas}
+    if faltantes:
+        cache.set_many(faltantes, timeout=settings.CONDICIONAL_MARCAS_TIMEOUT)
+        marcas.update(faltantes)
+    return [marcas[clave] for clave in claves]
+
+
+async def aobtener_marcas(modelos):
+    """
+    Versión asíncrona de obtener_marcas(). Ejecuta la síncrona de una vez porque
+    BaseCache.aget_many() lee las claves de a una.
+    """
+    return await sync_to_async(obtener_marcas)(modelos)
+
+
+def calcular_validadores(nombre, request, datos, marcas):
+    """
+    Retorna (etag, última modificación como timestamp) de la página `nombre` a partir del
+    resultado de su consulta de validación y de las marcas de sus modelos.
+    """
+    # El usuario y el token CSRF también forman parte de la página renderizada
+    contenido = repr((
+        nombre,
+        datos,
+        marcas,
+        getattr(request.user, 'pk', None),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+    ))
+    # ETag débil: el HTML cambia entre renderizados (token CSRF enmascarado) aunque el contenido no
+    etag = f'W/"{hashlib.md5(contenido.encode()).hexdigest()}"'
+    fechas = [valor.timestamp() for valor in datos if hasattr(valor, 'timestamp')]
+    ultima_modificacion = int(max(fechas + [marca / 1e9 for marca in marcas]))
+    return etag, ultima_modificacion
+
+
+def agregar_validadores(response, etag, ultima_modificacion):
+    """Agrega ETag y Last-Modified a la respuesta y obliga a revalidarla en cada visita."""
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(ultima_modificacion)
+    # Obliga al navegador a revalidar en cada visita en lugar de reutilizar la copia por su cuenta
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def subconsulta_agregada(queryset, campo, agregado):
+    """
+    Subconsulta escalar con un agregado de `queryset` agrupado por `campo`, correlacionada
+    con la clave primaria de la consulta exterior. Permite reunir varios agregados de
+    tablas distintas en una sola consulta.
+    """
+    return Subquery(
+        queryset.filter(**{campo: OuterRef('pk')}).order_by().values(campo).annotate(valor=agregado).values('valor')
+    )
+
+
+class GetCondicionalMixin:
+    """
+    Agrega ETag y Last-Modified a una vista basada en clases y responde 304 Not Modified
+    cuando el validador enviado por el navegador sigue vigente.
+
+    Las subclases indican en `modelos_validacion` los modelos cuyos cambios afectan a la
+    página e implementan datos_validacion(), que retorna una tupla con el resultado de una
+    consulta de agregación; los valores datetime de la tupla se usan para Last-Modified.
+    """
+
+    modelos_validacion = ()
+
+    def datos_validacion(self):
+        raise NotImplementedError('Las subclases deben implementar datos_validacion().')
+
+    def calcular_validadores(self):
+        """Retorna (etag, última modificación como timestamp)."""
+        datos = self.datos_validacion()
+        return calcular_validadores(
+            type(self).__name__, self.request, datos, obtener_marcas(self.modelos_validacion)
+        )
+
+    def get(self, request, *args, **kwargs):
+        # Con mensajes pendientes la página debe renderizarse para mostrarlos
+        if len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+
+        etag, ultima_modificacion = self.calcular_validadores()
+        response = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return agregar_validadores(response, etag, ultima_modificacion)
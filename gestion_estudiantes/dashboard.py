@@ -0,0 +1,135 @@
+"""
+Estadísticas del dashboard (vista inicio).
+Los contadores se calculan con una sola consulta y se guardan como una
+instantánea en la caché de Django, que se invalida desde signals.py cuando
+cambian estudiantes, grados o cursos.
+
+Las funciones con prefijo a son las versiones asíncronas que usa la vista
+inicio de vistas_asincronas.py; la instantánea y las métricas son las mismas.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Func, IntegerField, Q, Subquery
+
+from .models import Curso, Estudiante, Grado
+
+CLAVE_INSTANTANEA = 'dashboard:instantanea'
+CLAVE_ACIERTOS = 'dashboard:aciertos'
+CLAVE_FALLOS = 'dashboard:fallos'
+
+
+class _Conteo(Subquery):
+    """
+    COUNT(*) de un queryset como subconsulta escalar. Se marca como agregación para
+    poder usarla en aggregate(): no depende de las filas de la consulta exterior, así
+    que también vale cuando esa consulta no tiene filas.
+    """
+    contains_aggregate = True
+
+    def __init__(self, queryset):
+        super().__init__(
+            queryset.order_by().annotate(conteo=Func('pk', function='COUNT')).values('conteo'),
+            output_field=IntegerField(),
+        )
+
+
+def calcular_contadores():
+    """
+    Calcula todos los contadores del dashboard con una sola consulta de
+    agregación condicional sobre estudiantes más subconsultas escalares.
+    """
+    return Estudiante.objects.aggregate(
+        total_estudiantes=Count('pk'),
+        estudiantes_activos=Count('pk', filter=Q(situacion='Activo')),
+        estudiantes_inactivos=Count('pk', filter=Q(situacion='Inactivo')),
+        total_grados=_Conteo(Grado.objects.all()),
+        total_cursos=_Conteo(Curso.objects.all()),
+    )
+
+
+def calcular_instantanea():
+    """Calcula la instantánea completa: contadores y listas resumidas de grados y cursos."""
+    instantanea = calcular_contadores()
+    instantanea['grados'] = list(Grado.objects.order_by('nombre').values('id', 'nombre')[:5])
+    instantanea['cursos'] = list(Curso.objects.order_by('-id').values('id', 'codigo', 'nombre')[:5])
+    return instantanea
+
+
+async def acalcular_instantanea():
+    """Versión asíncrona de calcular_instantanea(): las tres consultas se lanzan a la vez."""
+    contadores, grados, cursos = await asyncio.gather(
+        sync_to_async(calcular_contadores)(),
+        _alista(Grado.objects.order_by('nombre').values('id', 'nombre')[:5]),
+        _alista(Curso.objects.order_by('-id').values('id', 'codigo', 'nombre')[:5]),
+    )
+    return {**contadores, 'grados': grados, 'cursos': cursos}
+
+
+async def _alista(queryset):
+    return [fila async for fila in queryset]
+
+
+def _incrementar(clave):
+    cache.add(clave, 0, None)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # La clave expiró o fue eliminada entre add() e incr()
+        cache.set(clave, 1, None)
+
+
+def obtener_instantanea():
+    """
+    Retorna la instantánea del dashboard desde la caché, calculándola si no existe.
+    Registra cada acierto o fallo de caché.
+    """
+    instantanea = cache.get(CLAVE_INSTANTANEA)
+    if instantanea is not None:
+        _incrementar(CLAVE_ACIERTOS)
+        return instantanea
+    _incrementar(CLAVE_FALLOS)
+    instantanea = calcular_instantanea()
+    cache.set(CLAVE_INSTANTANEA, instantanea, settings.DASHBOARD_CACHE_TIMEOUT)
+    return instantanea
+
+
+async def aobtener_instantanea():
+    """Versión asíncrona de obtener_instantanea()."""
+    instantanea = await cache.aget(CLAVE_INSTANTANEA)
+    if instantanea is not None:
+        await sync_to_async(_incrementar)(CLAVE_ACIERTOS)
+        return instantanea
+    await sync_to_async(_incrementar)(CLAVE_FALLOS)
+    instantanea = await acalcular_instantanea()
+    await cache.aset(CLAVE_INSTANTANEA, instantanea, settings.DASHBOARD_CACHE_TIMEOUT)
+    return instantanea
+
+
+def invalidar_instantanea():
+    """Elimina la instantánea para que se recalcule en la próxima visita."""
+    cache.delete(CLAVE_INSTANTANEA)
+
+
+def obtener_metricas_cache():
+    """Retorna los aciertos, fallos y la proporción de aciertos (0 a 100) de la instantánea."""
+    return _metricas(cache.get_many([CLAVE_ACIERTOS, CLAVE_FALLOS]))
+
+
+async def aobtener_metricas_cache():
+    """Versión asíncrona de obtener_metricas_cache(); BaseCache.aget_many() leería las claves de a una."""
+    return _metricas(await sync_to_async(cache.get_many)([CLAVE_ACIERTOS, CLAVE_FALLOS]))
+
+
+def _metricas(valores):
+    aciertos = valores.get(CLAVE_ACIERTOS, 0)
+    fallos = valores.get(CLAVE_FALLOS, 0)
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'proporcion_aciertos': round(aciertos * 100 / total, 2) if total else 0,
+    }
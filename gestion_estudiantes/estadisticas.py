@@ -0,0 +1,189 @@
+"""
+Estadísticas de la distribución de notas de un curso o de un grado.
+
+Las notas de cada ámbito se leen con una sola consulta values_list (ya convertidas a
+float en la base) y se resumen en memoria: promedio, mediana, desviación estándar
+poblacional, mínimo, máximo, histograma por rangos de ESTADISTICAS_ANCHO_HISTOGRAMA
+puntos y cantidad de aprobados y reprobados según NOTA_APROBATORIA o el umbral que
+se indique. Con NumPy instalado los cálculos son vectoriales; sin él se usa el
+módulo statistics, con los mismos resultados redondeados a 2 decimales.
+
+Las notas de un grado son las de sus cursos. El resumen de cada ámbito se guarda en
+la caché (por umbral y ancho de histograma) y signals.py lo elimina cuando cambian
+las notas o los cursos; ESTADISTICAS_CACHE_TIMEOUT limita cuánto puede durar un
+resumen que no se invalidó, por ejemplo tras un QuerySet.update().
+"""
+
+import math
+import statistics
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .models import Curso, Nota
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+NOTA_MAXIMA = 100  # Igual que el MaxValueValidator de Nota.nota
+
+PREFIJO_CLAVE = 'estadisticas:'
+
+
+@dataclass
+class EstadisticasNotas:
+    """Resumen de un conjunto de notas; los valores son None si no hay notas."""
+    cantidad: int
+    nota_aprobatoria: float
+    promedio: float = None
+    mediana: float = None
+    desviacion: float = None
+    minimo: float = None
+    maximo: float = None
+    aprobados: int = 0
+    reprobados: int = 0
+    histograma: list = field(default_factory=list)  # [{'desde', 'hasta', 'cantidad', 'altura'}]
+
+    @property
+    def tasa_aprobacion(self):
+        return round(self.aprobados * 100 / self.cantidad, 2) if self.cantidad else 0
+
+
+def _limites_histograma(ancho):
+    """Límites de los rangos [desde, hasta) que cubren de 0 a NOTA_MAXIMA; el último incluye su límite superior."""
+    rangos = math.ceil(NOTA_MAXIMA / ancho)
+    return [ancho * i for i in range(rangos + 1)]
+
+
+def _calcular_numpy(valores, nota_aprobatoria, limites):
+    arreglo = np.asarray(valores, dtype=float)
+    aprobados = int(np.count_nonzero(arreglo >= nota_aprobatoria))
+    cantidades, _ = np.histogram(arreglo, bins=limites)
+    return (
+        float(arreglo.mean()), float(np.median(arreglo)), float(arreglo.std()),
+        float(arreglo.min()), float(arreglo.max()), aprobados, cantidades.tolist(),
+    )
+
+
+def _calcular_python(valores, nota_aprobatoria, limites):
+    ancho = limites[1]
+    ultimo = len(limites) - 2
+    cantidades = [0] * (ultimo + 1)
+    aprobados = 0
+    for valor in valores:
+        cantidades[min(int(valor // ancho), ultimo)] += 1
+        aprobados += valor >= nota_aprobatoria
+    return (
+        statistics.fmean(valores), statistics.median(valores), statistics.pstdev(valores),
+        min(valores), max(valores), aprobados, cantidades,
+    )
+
+
+def calcular_estadisticas(valores, nota_aprobatoria=None, ancho_histograma=None, usar_numpy=None):
+    """
+    Resume una lista de notas (float). usar_numpy=None usa NumPy si está instalado;
+    False fuerza el cálculo en Python puro.
+    """
+    if nota_aprobatoria is None:
+        nota_aprobatoria = settings.NOTA_APROBATORIA
+    limites = _limites_histograma(ancho_histograma or settings.ESTADISTICAS_ANCHO_HISTOGRAMA)
+    resumen = EstadisticasNotas(cantidad=len(valores), nota_aprobatoria=nota_aprobatoria)
+    if not valores:
+        cantidades = [0] * (len(limites) - 1)
+    else:
+        calcular = _calcular_numpy if np is not None and usar_numpy is not False else _calcular_python
+        promedio, mediana, desviacion, minimo, maximo, aprobados, cantidades = calcular(
+            valores, nota_aprobatoria, limites
+        )
+        resumen.promedio = round(promedio, 2)
+        resumen.mediana = round(mediana, 2)
+        resumen.desviacion = round(desviacion, 2)
+        resumen.minimo = round(minimo, 2)
+        resumen.maximo = round(maximo, 2)
+        resumen.aprobados = aprobados
+        resumen.reprobados = len(valores) - aprobados
+
+    mayor = max(cantidades) or 1
+    resumen.histograma = [
+        {
+            'desde': limites[i],
+            'hasta': min(limites[i + 1], NOTA_MAXIMA),
+            'cantidad': cantidad,
+            'altura': round(cantidad * 100 / mayor),  # Porcentaje respecto del rango más numeroso
+        }
+        for i, cantidad in enumerate(cantidades)
+    ]
+    return resumen
+
+
+def _valores(ambito, pk):
+    """Queryset con las notas del ámbito como float, para leerlas con una sola consulta."""
+    filtro = {'curso_id': pk} if ambito == 'curso' else {'curso__grado_id': pk}
+    return (
+        Nota.objects.filter(**filtro).order_by()
+        .annotate(valor=Cast('nota', FloatField())).values_list('valor', flat=True)
+    )
+
+
+def _clave(ambito, pk):
+    return f'{PREFIJO_CLAVE}{ambito}:{pk}'
+
+
+def _variante(nota_aprobatoria, ancho_histograma):
+    return (
+        settings.NOTA_APROBATORIA if nota_aprobatoria is None else nota_aprobatoria,
+        ancho_histograma or settings.ESTADISTICAS_ANCHO_HISTOGRAMA,
+    )
+
+
+def _obtener(ambito, pk, nota_aprobatoria=None, ancho_histograma=None):
+    clave = _clave(ambito, pk)
+    variante = _variante(nota_aprobatoria, ancho_histograma)
+    guardadas = cache.get(clave) or {}
+    if variante not in guardadas:
+        guardadas[variante] = calcular_estadisticas(list(_valores(ambito, pk)), *variante)
+        cache.set(clave, guardadas, settings.ESTADISTICAS_CACHE_TIMEOUT)
+    return guardadas[variante]
+
+
+def estadisticas_curso(curso, nota_aprobatoria=None, ancho_histograma=None):
+    """Estadísticas de las notas de un curso, desde la caché o con una consulta."""
+    return _obtener('curso', getattr(curso, 'pk', curso), nota_aprobatoria, ancho_histograma)
+
+
+def estadisticas_grado(grado, nota_aprobatoria=None, ancho_histograma=None):
+    """Estadísticas de las notas de todos los cursos de un grado, desde la caché o con una consulta."""
+    return _obtener('grado', getattr(grado, 'pk', grado), nota_aprobatoria, ancho_histograma)
+
+
+async def aestadisticas_grado(grado, nota_aprobatoria=None, ancho_histograma=None):
+    """Versión asíncrona de estadisticas_grado()."""
+    pk = getattr(grado, 'pk', grado)
+    clave = _clave('grado', pk)
+    variante = _variante(nota_aprobatoria, ancho_histograma)
+    guardadas = await cache.aget(clave) or {}
+    if variante not in guardadas:
+        valores = [valor async for valor in _valores('grado', pk)]
+        guardadas[variante] = calcular_estadisticas(valores, *variante)  # Sin consultas: se calcula en el bucle
+        await cache.aset(clave, guardadas, settings.ESTADISTICAS_CACHE_TIMEOUT)
+    return guardadas[variante]
+
+
+def invalidar(curso_ids=(), grado_ids=()):
+    """Elimina de la caché las estadísticas de los cursos y grados indicados."""
+    claves = [_clave('curso', pk) for pk in curso_ids] + [_clave('grado', pk) for pk in grado_ids if pk]
+    if claves:
+        cache.delete_many(claves)
+
+
+def grados_de_cursos(curso_ids):
+    """Grados de los cursos indicados, para invalidar sus estadísticas junto con las de los cursos."""
+    return list(
+        Curso.objects.filter(pk__in=list(curso_ids), grado__isnull=False).order_by()
+        .values_list('grado_id', flat=True).distinct()
+    )
@@ -0,0 +1,148 @@
+"""
+Vistas de exportación de reportes de notas en CSV o XLSX.
+
+Las filas se generan recorriendo consultas values_list() con .iterator(), por lo
+que la memoria usada no depende del tamaño del reporte. Los reportes de un grado
+y de un curso ordenan y muestran a los estudiantes con sus datos actuales; el de
+todo el colegio usa las columnas redundantes de Nota (estudiante_nombre,
+curso_codigo, ...) para evitar joins.
+El CSV se transmite con StreamingHttpResponse y empieza a enviarse de inmediato.
+"""
+
+import csv
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .historial import historiales_grado
+from .models import Curso, Grado, Nota
+
+# Cantidad de filas que se leen de la base de datos en cada bloque
+TAMAÑO_BLOQUE = 2000
+
+
+class _Eco:
+    """Pseudo-archivo cuyo write() devuelve el valor, para que csv.writer genere texto por fila."""
+
+    def write(self, valor):
+        return valor
+
+
+def _formatear_fecha(fecha):
+    return timezone.localtime(fecha).strftime('%Y-%m-%d %H:%M') if fecha else ''
+
+
+def _respuesta_csv(filas, nombre_archivo):
+    escritor = csv.writer(_Eco())
+
+    def generar():
+        yield '\ufeff'  # BOM para que Excel reconozca UTF-8
+        for fila in filas:
+            yield escritor.writerow(fila)
+
+    response = StreamingHttpResponse(generar(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.csv"'
+    return response
+
+
+def _respuesta_xlsx(filas, nombre_archivo):
+    """
+    Genera el XLSX en modo de solo escritura sobre un archivo temporal (memoria constante)
+    y luego lo transmite. A diferencia del CSV, el formato ZIP exige terminar el archivo antes de enviarlo.
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title='Notas')
+    for fila in filas:
+        hoja.append(fila)
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=f'{nombre_archivo}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def _responder(request, filas, nombre_archivo):
+    """Responde en el formato pedido con ?formato=csv (por defecto) o ?formato=xlsx."""
+    if request.GET.get('formato') == 'xlsx':
+        return _respuesta_xlsx(filas, nombre_archivo)
+    return _respuesta_csv(filas, nombre_archivo)
+
+
+def filas_matriz_grado(grado):
+    """
+    Genera la matriz de notas de un grado: una fila por estudiante del grado, tenga o no
+    notas, y una columna por curso. Estudiantes y notas se recorren a la vez en el mismo
+    orden (nombre actual del estudiante e id), así que solo se mantiene una fila en memoria;
+    la última columna es el promedio ponderado por créditos, calculado antes con una sola consulta.
+    """
+    cursos = list(grado.cursos.order_by('año', 'nombre').values_list('id', 'codigo'))
+    posiciones = {curso_id: i for i, (curso_id, _) in enumerate(cursos)}
+    promedios = {estudiante_id: historial.promedio for estudiante_id, historial in historiales_grado(grado).items()}
+    yield ['ID Estudiante', 'Estudiante'] + [codigo for _, codigo in cursos] + ['Promedio ponderado']
+
+    estudiantes = grado.estudiantes.order_by('nombre', 'pk').values_list('pk', 'id_estudiante', 'nombre')
+    notas = (
+        Nota.objects.filter(estudiante__grado=grado, curso_id__in=list(posiciones))
+        .order_by('estudiante__nombre', 'estudiante_id')
+        .values_list('estudiante_id', 'curso_id', 'nota')
+    )
+    notas_por_estudiante = groupby(notas.iterator(chunk_size=TAMAÑO_BLOQUE), key=itemgetter(0))
+    siguiente = next(notas_por_estudiante, None)
+    for estudiante_id, id_estudiante, nombre in estudiantes.iterator(chunk_size=TAMAÑO_BLOQUE):
+        promedio = promedios.get(estudiante_id)
+        fila = [id_estudiante, nombre] + [''] * len(cursos) + ['' if promedio is None else promedio]
+        if siguiente is not None and siguiente[0] == estudiante_id:
+            for _, curso_id, nota in siguiente[1]:
+                fila[2 + posiciones[curso_id]] = nota
+            siguiente = next(notas_por_estudiante, None)
+        yield fila
+
+
+def filas_curso(curso):
+    """Genera la lista de notas de un curso, con los datos actuales de cada estudiante."""
+    yield ['ID Estudiante', 'Estudiante', 'Nota', 'Observaciones', 'Fecha de registro']
+    notas = (
+        Nota.objects.filter(curso_id=curso.pk)
+        .order_by('estudiante__nombre', 'estudiante_id')
+        .values_list('estudiante__id_estudiante', 'estudiante__nombre', 'nota', 'observaciones', 'fecha_registro')
+    )
+    for id_estudiante, nombre, nota, observaciones, fecha in notas.iterator(chunk_size=TAMAÑO_BLOQUE):
+        yield [id_estudiante, nombre, nota, observaciones or '', _formatear_fecha(fecha)]
+
+
+def filas_notas():
+    """Genera todas las notas del colegio."""
+    yield ['ID Estudiante', 'Estudiante', 'Código del curso', 'Curso', 'Nota', 'Fecha de registro']
+    notas = Nota.objects.order_by('pk').values_list(
+        'estudiante_id_form', 'estudiante_nombre', 'curso_codigo', 'curso_nombre', 'nota', 'fecha_registro'
+    )
+    for *datos, fecha in notas.iterator(chunk_size=TAMAÑO_BLOQUE):
+        yield datos + [_formatear_fecha(fecha)]
+
+
+def exportar_grado(request, pk):
+    """Exporta la matriz estudiante × curso de un grado."""
+    grado = get_object_or_404(Grado, pk=pk)
+    return _responder(request, filas_matriz_grado(grado), f'notas-{slugify(grado.nombre)}')
+
+
+def exportar_curso(request, pk):
+    """Exporta la lista de notas de un curso."""
+    curso = get_object_or_404(Curso, pk=pk)
+    return _responder(request, filas_curso(curso), f'notas-{slugify(curso.codigo)}')
+
+
+def exportar_notas(request):
+    """Exporta todas las notas del colegio."""
+    return _responder(request, filas_notas(), 'notas-colegio')
@@ -0,0 +1,79 @@
+"""
+Caché de fragmentos de plantilla por estudiante para la página de un grado.
+
+La fila de cada estudiante en grado_detail.html (con su panel de cursos y notas)
+se guarda con {% cache %} bajo una clave que incluye una versión propia del
+estudiante. Las señales de signals.py reemplazan esa versión cuando cambian sus
+notas, sus inscripciones, sus datos o los cursos en que está inscrito, de modo
+que el fragmento anterior deja de usarse y expira solo.
+
+Las versiones son valores únicos (no contadores) para que, si la caché descarta
+una versión, la nueva nunca coincida con un fragmento viejo.
+
+Con la caché en memoria local cada proceso tiene sus propias versiones y solo el que
+atendió un cambio reemplaza la suya; por eso con ella FRAGMENTOS_CACHE_TIMEOUT es
+corto por defecto, y los demás procesos muestran la fila vieja a lo sumo ese tiempo.
+"""
+
+import time
+from itertools import count
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+NOMBRE_FRAGMENTO = 'fila_estudiante_grado'
+PREFIJO_VERSION = 'fragmentos:estudiante:'
+
+_secuencia = count()
+
+
+def _nueva_version():
+    return f'{time.time_ns():x}{next(_secuencia):x}'
+
+
+def clave_fragmento(estudiante_id, version):
+    """Clave del fragmento, igual a la que genera {% cache ... NOMBRE_FRAGMENTO estudiante.pk version %}."""
+    return make_template_fragment_key(NOMBRE_FRAGMENTO, [estudiante_id, version])
+
+
+def tiempo_expiracion():
+    return settings.FRAGMENTOS_CACHE_TIMEOUT
+
+
+def obtener_versiones(estudiante_ids):
+    """Retorna {estudiante_id: versión}, creando las que falten, con una lectura a la caché."""
+    claves = {f'{PREFIJO_VERSION}{pk}': pk for pk in estudiante_ids}
+    guardadas = cache.get_many(list(claves))
+    faltantes = {clave: _nueva_version() for clave in claves if clave not in guardadas}
+    if faltantes:
+        cache.set_many(faltantes, timeout=None)
+        guardadas.update(faltantes)
+    return {pk: guardadas[clave] for clave, pk in claves.items()}
+
+
+def obtener_fragmentos(versiones):
+    """Retorna {estudiante_id: html} de los fragmentos vigentes que ya están en la caché."""
+    claves = {clave_fragmento(pk, version): pk for pk, version in versiones.items()}
+    return {claves[clave]: html for clave, html in cache.get_many(list(claves)).items()}
+
+
+def invalidar_estudiantes(estudiante_ids):
+    """Reemplaza la versión de los estudiantes indicados para que su fragmento se vuelva a generar."""
+    versiones = {f'{PREFIJO_VERSION}{pk}': _nueva_version() for pk in estudiante_ids}
+    if versiones:
+        cache.set_many(versiones, timeout=None)
+
+
+# BaseCache.aget_many() y aset_many() hacen una operación (y un cambio de hilo) por clave; las
+# versiones asíncronas ejecutan las síncronas de una vez para leer todas las claves juntas.
+
+async def aobtener_versiones(estudiante_ids):
+    """Versión asíncrona de obtener_versiones()."""
+    return await sync_to_async(obtener_versiones)(estudiante_ids)
+
+
+async def aobtener_fragmentos(versiones):
+    """Versión asíncrona de obtener_fragmentos()."""
+    return await sync_to_async(obtener_fragmentos)(versiones)
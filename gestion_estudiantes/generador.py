@@ -0,0 +1,117 @@
+"""
+Generación de datos sintéticos de un colegio para pruebas de rendimiento.
+
+Crea grados, cursos, estudiantes, matrículas y notas con bulk_create por lotes.
+Con la misma semilla se obtiene siempre el mismo colegio, de modo que los
+benchmarks son comparables entre ejecuciones.
+"""
+
+import datetime
+import random
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import Curso, Estudiante, Grado, Nota
+from .rankings import actualizar_cursos, actualizar_grados
+
+NOMBRES = [
+    'José', 'María', 'Ángel', 'Lucía', 'Andrés', 'Sofía', 'Pedro', 'Inés', 'Martín', 'Valentina',
+    'Tomás', 'Camila', 'Julián', 'Renata', 'Nicolás', 'Isabel', 'Sebastián', 'Mónica', 'Raúl', 'Elena',
+]
+APELLIDOS = [
+    'García', 'Pérez', 'Núñez', 'Fernández', 'López', 'Gómez', 'Muñoz', 'Díaz', 'Ramírez', 'Ortiz',
+    'Rodríguez', 'Sánchez', 'Torres', 'Vargas', 'Castro', 'Rojas', 'Herrera', 'Medina', 'Quispe', 'Chávez',
+]
+MATERIAS = [
+    'Matemáticas', 'Lenguaje', 'Ciencias Naturales', 'Historia', 'Inglés', 'Educación Física',
+    'Arte', 'Música', 'Física', 'Química', 'Biología', 'Filosofía', 'Tecnología', 'Geografía',
+]
+
+
+def _en_lotes(objetos, modelo, tamaño_lote, **opciones):
+    """Inserta una secuencia de instancias con un bulk_create por lote."""
+    creados = []
+    for inicio in range(0, len(objetos), tamaño_lote):
+        creados += modelo.objects.bulk_create(objetos[inicio:inicio + tamaño_lote], **opciones)
+    return creados
+
+
+def generar_colegio(grados=5, cursos_por_grado=8, estudiantes=1000, proporcion_notas=0.9,
+                    semilla=42, tamaño_lote=1000):
+    """
+    Genera un colegio completo. Los estudiantes se reparten entre los grados y cada uno
+    se matricula en todos los cursos de su grado; `proporcion_notas` indica qué fracción
+    de esas matrículas tiene nota. Retorna un diccionario con la cantidad de registros creados.
+    """
+    aleatorio = random.Random(semilla)
+    desplazamiento = Estudiante.objects.count()  # Evita repetir id_estudiante si ya hay datos
+
+    with transaction.atomic():
+        lista_grados = _en_lotes(
+            [Grado(nombre=f'Grado {i + 1}', duracion=1 + i % 3) for i in range(grados)],
+            Grado, tamaño_lote,
+        )
+
+        lista_cursos = []
+        for grado in lista_grados:
+            for i in range(cursos_por_grado):
+                materia = MATERIAS[i % len(MATERIAS)]
+                lista_cursos.append(Curso(
+                    nombre=f'{materia} {i // len(MATERIAS) + 1}' if i >= len(MATERIAS) else materia,
+                    codigo=f'G{grado.pk}C{i + 1}',
+                    creditos=aleatorio.randint(1, 5),
+                    año=1 + i % grado.duracion,
+                    grado=grado,
+                ))
+        lista_cursos = _en_lotes(lista_cursos, Curso, tamaño_lote)
+        cursos_por_grado_id = {}
+        for curso in lista_cursos:
+            cursos_por_grado_id.setdefault(curso.grado_id, []).append(curso)
+
+        lista_estudiantes = _en_lotes(
+            [
+                Estudiante(
+                    id_estudiante=f'GEN-{desplazamiento + i:07d}',
+                    nombre=(
+                        f'{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)} '
+                        f'{aleatorio.choice(APELLIDOS)}'
+                    ),
+                    fecha_nacimiento=datetime.date(2008, 1, 1) + datetime.timedelta(days=aleatorio.randrange(3650)),
+                    sexo=aleatorio.choice('MF'),
+                    situacion='Activo' if aleatorio.random() < 0.9 else 'Inactivo',
+                    grado=lista_grados[i % len(lista_grados)] if lista_grados else None,
+                )
+                for i in range(estudiantes)
+            ],
+            Estudiante, tamaño_lote,
+        )
+
+        Inscripcion = Estudiante.cursos.through
+        inscripciones = []
+        notas = []
+        for estudiante in lista_estudiantes:
+            for curso in cursos_por_grado_id.get(estudiante.grado_id, []):
+                inscripciones.append(Inscripcion(estudiante_id=estudiante.pk, curso_id=curso.pk))
+                if aleatorio.random() < proporcion_notas:
+                    valor = min(100, max(0, aleatorio.gauss(70, 15)))
+                    # Los campos redundantes se completan aquí porque bulk_create no llama a Nota.save()
+                    notas.append(Nota(
+                        estudiante_id=estudiante.pk, curso_id=curso.pk,
+                        nota=Decimal(valor).quantize(Decimal('0.01')),
+                        estudiante_nombre=estudiante.nombre, estudiante_id_form=estudiante.id_estudiante,
+                        curso_nombre=curso.nombre, curso_codigo=curso.codigo,
+                    ))
+        _en_lotes(inscripciones, Inscripcion, tamaño_lote)
+        _en_lotes(notas, Nota, tamaño_lote)
+
+    Estudiante.recalcular_promedios([estudiante.pk for estudiante in lista_estudiantes], tamaño_lote=tamaño_lote)
+    actualizar_cursos([curso.pk for curso in lista_cursos])
+    actualizar_grados([grado.pk for grado in lista_grados])
+    return {
+        'grados': len(lista_grados),
+        'cursos': len(lista_cursos),
+        'estudiantes': len(lista_estudiantes),
+        'inscripciones': len(inscripciones),
+        'notas': len(notas),
+    }
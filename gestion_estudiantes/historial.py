@@ -0,0 +1,119 @@
+"""
+Historial académico: promedios ponderados por los créditos de cada curso.
+
+Estudiante.promedio es el promedio simple de todas las notas. El historial pondera
+cada nota por Curso.creditos y la agrupa por año del curso; un período cuyas notas
+son todas de cursos sin créditos usa el promedio simple. Una sola consulta
+agrupada por (estudiante, año) sobre Nota unida a Curso entrega las sumas de cada
+año; el resumen general se obtiene sumando esas mismas filas, sin otra consulta.
+Sirve para un estudiante o para todos los de un grado a la vez.
+"""
+
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+from .models import Nota
+
+_CENTESIMOS = Decimal('0.01')
+
+
+@dataclass
+class ResumenCreditos:
+    """Suma de notas ponderadas, créditos, cantidad de cursos y suma de notas de un período."""
+    puntos: Decimal = Decimal(0)  # Suma de nota × créditos
+    creditos: int = 0
+    cursos: int = 0
+    notas: Decimal = Decimal(0)  # Suma de notas sin ponderar
+
+    @property
+    def promedio(self):
+        """
+        Promedio ponderado redondeado a 2 decimales. Si las notas son solo de cursos sin
+        créditos, es el promedio simple; None si no hay notas.
+        """
+        if self.creditos:
+            promedio = self.puntos / self.creditos
+        elif self.cursos:
+            promedio = self.notas / self.cursos
+        else:
+            return None
+        return promedio.quantize(_CENTESIMOS, rounding=ROUND_HALF_UP)
+
+    def agregar(self, otro):
+        self.puntos += otro.puntos
+        self.creditos += otro.creditos
+        self.cursos += otro.cursos
+        self.notas += otro.notas
+
+
+@dataclass
+class Historial:
+    """Historial de un estudiante: un resumen por año (ordenado) y el resumen general."""
+    estudiante_id: int
+    por_año: dict = field(default_factory=dict)
+    general: ResumenCreditos = field(default_factory=ResumenCreditos)
+
+    @property
+    def promedio(self):
+        return self.general.promedio
+
+
+def _filas_por_año(notas):
+    """Sumas de cada (estudiante, año) del queryset de notas, ordenadas por estudiante y año."""
+    puntos = ExpressionWrapper(
+        F('nota') * F('curso__creditos'), output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+    return (
+        notas.order_by('estudiante_id', 'curso__año')
+        .values('estudiante_id', 'curso__año')
+        .annotate(puntos=Sum(puntos), creditos=Sum('curso__creditos'), cursos=Count('pk'), suma_notas=Sum('nota'))
+        .values_list('estudiante_id', 'curso__año', 'puntos', 'creditos', 'cursos', 'suma_notas')
+    )
+
+
+def historiales(notas):
+    """
+    Calcula el historial de cada estudiante presente en el queryset de notas.
+    Retorna {estudiante_id: Historial}, con una sola consulta.
+    """
+    return _armar(_filas_por_año(notas))
+
+
+async def ahistoriales(notas):
+    """Versión asíncrona de historiales()."""
+    return _armar([fila async for fila in _filas_por_año(notas)])
+
+
+def _armar(filas):
+    resultado = {}
+    for estudiante_id, año, suma, creditos, cursos, suma_notas in filas:
+        historial = resultado.get(estudiante_id)
+        if historial is None:
+            historial = resultado[estudiante_id] = Historial(estudiante_id)
+        resumen = ResumenCreditos(Decimal(suma or 0), creditos or 0, cursos, Decimal(suma_notas or 0))
+        historial.por_año[año] = resumen
+        historial.general.agregar(resumen)
+    return resultado
+
+
+def historial_estudiante(estudiante):
+    """Historial de un estudiante; vacío si no tiene notas."""
+    estudiante_id = getattr(estudiante, 'pk', estudiante)
+    return historiales(Nota.objects.filter(estudiante_id=estudiante_id)).get(
+        estudiante_id, Historial(estudiante_id)
+    )
+
+
+async def ahistorial_estudiante(estudiante):
+    """Versión asíncrona de historial_estudiante()."""
+    estudiante_id = getattr(estudiante, 'pk', estudiante)
+    return (await ahistoriales(Nota.objects.filter(estudiante_id=estudiante_id))).get(
+        estudiante_id, Historial(estudiante_id)
+    )
+
+
+def historiales_grado(grado):
+    """Historiales de todos los estudiantes con notas de un grado, en una consulta: {estudiante_id: Historial}."""
+    return historiales(Nota.objects.filter(estudiante__grado=grado))
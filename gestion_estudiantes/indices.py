@@ -0,0 +1,59 @@
+"""
+Índices en memoria para consultar notas sin generar consultas adicionales.
+Se construyen una vez por petición y se consultan desde las vistas y plantillas.
+"""
+
+from .models import Nota
+
+
+class IndiceNotas:
+    """
+    Índice de notas por (estudiante_id, curso_id) construido con una sola consulta.
+    Cada búsqueda es O(1) y no accede a la base de datos.
+    """
+
+    # Campos necesarios para mostrar una nota y enlazar a sus acciones
+    CAMPOS = ('id', 'estudiante_id', 'curso_id', 'nota')
+
+    def __init__(self, notas):
+        self._notas = {(nota.estudiante_id, nota.curso_id): nota for nota in notas}
+
+    @classmethod
+    def desde_queryset(cls, queryset):
+        """Construye el índice a partir de un queryset de notas."""
+        return cls(queryset.only(*cls.CAMPOS).order_by())
+
+    @classmethod
+    async def adesde_queryset(cls, queryset):
+        """Versión asíncrona de desde_queryset()."""
+        return cls([nota async for nota in queryset.only(*cls.CAMPOS).order_by()])
+
+    @classmethod
+    def para_estudiante(cls, estudiante):
+        """Índice con todas las notas de un estudiante."""
+        return cls.desde_queryset(Nota.objects.filter(estudiante=estudiante))
+
+    @classmethod
+    def para_grado(cls, grado):
+        """Índice con las notas de todos los estudiantes de un grado."""
+        return cls.desde_queryset(Nota.objects.filter(estudiante__grado=grado))
+
+    @classmethod
+    def para_curso(cls, curso):
+        """Índice con todas las notas de un curso."""
+        return cls.desde_queryset(Nota.objects.filter(curso=curso))
+
+    def obtener(self, estudiante, curso):
+        """
+        Retorna la nota del estudiante en el curso, o None si no existe.
+        Acepta instancias o ids.
+        """
+        estudiante_id = getattr(estudiante, 'pk', estudiante)
+        curso_id = getattr(curso, 'pk', curso)
+        return self._notas.get((estudiante_id, curso_id))
+
+    def __contains__(self, clave):
+        return clave in self._notas
+
+    def __len__(self):
+        return len(self._notas)
@@ -0,0 +1,223 @@
+"""
+Latencia bajo carga concurrente de las páginas principales servidas con WSGI y con ASGI.
+
+Crea una base de datos de prueba, la llena con generar_colegio() y envía a cada
+página --peticiones peticiones GET con --concurrencia clientes simultáneos, primero
+a la aplicación WSGI (vistas de views.py) y luego a la ASGI (vistas de
+vistas_asincronas.py). Los manejadores de Django se llaman directamente, sin un
+servidor HTTP de por medio, para medir solo el modo de ejecución: con WSGI un pool
+de hilos atiende las peticiones como un servidor con hilos (gunicorn --threads) y
+con ASGI cada petición es una tarea del mismo bucle de eventos (uvicorn). Para cada
+página informa p50, p99 y peticiones por segundo.
+
+Los tiempos solo son comparables en la misma máquina, y con SQLite en memoria no
+incluyen la espera de red hacia un servidor de base de datos, que es donde ASGI
+puede atender más peticiones con menos hilos.
+
+Uso:
+    python manage.py benchmark_concurrencia [--estudiantes 1000] [--concurrencia 8] \
+        [--peticiones 200] [--salida benchmarks/concurrencia.json]
+"""
+
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+import django
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion_estudiantes.generador import generar_colegio
+from gestion_estudiantes.models import Grado
+
+# (URL WSGI, URL ASGI) de cada página comparada
+PAGINAS = (
+    ('inicio', 'inicio-async'),
+    ('grado-detail', 'grado-detail-async'),
+    ('estudiante-detail', 'estudiante-detail-async'),
+)
+
+# Peticiones de calentamiento por página (plantillas, caché de fragmentos e instantánea)
+CALENTAMIENTO = 3
+
+
+def _entorno_wsgi(ruta):
+    return {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost', 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+
+
+def _alcance_asgi(ruta):
+    return {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': ruta, 'raw_path': ruta.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost')], 'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }
+
+
+def pedir_wsgi(aplicacion, ruta):
+    """Envía un GET a la aplicación WSGI; retorna (segundos hasta el último byte, estado)."""
+    estado = []
+    inicio = time.perf_counter()
+    cuerpo = aplicacion(_entorno_wsgi(ruta), lambda linea, cabeceras, exc_info=None: estado.append(linea))
+    try:
+        b''.join(cuerpo)
+    finally:
+        cuerpo.close()  # Dispara request_finished, como lo haría el servidor
+    return time.perf_counter() - inicio, int(estado[0].split()[0])
+
+
+async def pedir_asgi(aplicacion, ruta):
+    """Envía un GET a la aplicación ASGI; retorna (segundos hasta el último byte, estado)."""
+    estado = None
+    cuerpo_enviado = False
+
+    async def recibir():
+        nonlocal cuerpo_enviado
+        if not cuerpo_enviado:
+            cuerpo_enviado = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # El cliente nunca se desconecta; Django cancela esta espera al terminar la respuesta
+        await asyncio.Future()
+
+    async def enviar(mensaje):
+        nonlocal estado
+        if mensaje['type'] == 'http.response.start':
+            estado = mensaje['status']
+
+    inicio = time.perf_counter()
+    await aplicacion(_alcance_asgi(ruta), recibir, enviar)
+    return time.perf_counter() - inicio, estado
+
+
+def carga_wsgi(aplicacion, ruta, peticiones, concurrencia):
+    """Retorna los resultados de `peticiones` GET atendidos por `concurrencia` hilos."""
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        return list(pool.map(lambda _: pedir_wsgi(aplicacion, ruta), range(peticiones)))
+
+
+async def carga_asgi(aplicacion, ruta, peticiones, concurrencia):
+    """Retorna los resultados de `peticiones` GET enviados por `concurrencia` clientes a la vez."""
+    pendientes = iter(range(peticiones))
+    resultados = []
+
+    async def cliente():
+        for _ in pendientes:
+            resultados.append(await pedir_asgi(aplicacion, ruta))
+
+    await asyncio.gather(*(cliente() for _ in range(concurrencia)))
+    return resultados
+
+
+class Command(BaseCommand):
+    help = 'Compara p50/p99 de las páginas principales con WSGI y con ASGI bajo carga concurrente.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estudiantes', type=int, default=1000, help='Estudiantes del colegio generado.')
+        parser.add_argument('--grados', type=int, default=5, help='Grados del colegio generado.')
+        parser.add_argument('--cursos', type=int, default=8, help='Cursos por grado.')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Peticiones simultáneas.')
+        parser.add_argument('--peticiones', type=int, default=200, help='Peticiones medidas por página y modo.')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados.')
+
+    def handle(self, *args, **options):
+        if options['concurrencia'] < 1 or options['peticiones'] < 2:
+            raise CommandError('--concurrencia debe ser al menos 1 y --peticiones al menos 2.')
+        self.options = options
+
+        nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Sin instrumentación SQL ni registro de consultas de DEBUG, como en producción
+            with override_settings(INSTRUMENTACION_SQL=False, DEBUG=False, ALLOWED_HOSTS=['localhost']):
+                resultados = self.medir()
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        if options['salida']:
+            destino = Path(options['salida'])
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            destino.write_text(json.dumps({
+                'generado': timezone.now().isoformat(),
+                'entorno': {
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'base_de_datos': connection.vendor,
+                    'plataforma': platform.platform(),
+                },
+                'parametros': {
+                    clave: options[clave] for clave in ('estudiantes', 'grados', 'cursos', 'concurrencia', 'peticiones')
+                },
+                'resultados': resultados,
+            }, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+            self.stdout.write(f'Resultados guardados en {destino}.')
+
+    def medir(self):
+        cache.clear()
+        generar_colegio(
+            grados=self.options['grados'], cursos_por_grado=self.options['cursos'],
+            estudiantes=self.options['estudiantes'],
+        )
+        grado = Grado.objects.order_by('pk').first()
+        muestras = {'grado': grado.pk, 'estudiante': grado.estudiantes.order_by('pk').first().pk}
+
+        # Los manejadores se crean aquí para que carguen el middleware con la configuración de arriba
+        wsgi = get_wsgi_application()
+        asgi = get_asgi_application()
+        peticiones = self.options['peticiones']
+        concurrencia = self.options['concurrencia']
+        self.stdout.write(
+            f'{self.options["estudiantes"]} estudiantes, {concurrencia} peticiones simultáneas, '
+            f'{peticiones} por página.'
+        )
+        self.stdout.write(f'  {"página":<20} {"modo":<5} {"p50 ms":>8} {"p99 ms":>8} {"pet/s":>8}')
+
+        resultados = []
+        for nombre_wsgi, nombre_asgi in PAGINAS:
+            modelo = nombre_wsgi.split('-')[0]
+            kwargs = {'pk': muestras[modelo]} if modelo in muestras else {}
+            for modo, nombre in (('wsgi', nombre_wsgi), ('asgi', nombre_asgi)):
+                ruta = reverse(nombre, kwargs=kwargs)
+                if modo == 'wsgi':
+                    carga_wsgi(wsgi, ruta, CALENTAMIENTO, 1)
+                    inicio = time.perf_counter()
+                    medidas = carga_wsgi(wsgi, ruta, peticiones, concurrencia)
+                else:
+                    asyncio.run(carga_asgi(asgi, ruta, CALENTAMIENTO, 1))
+                    inicio = time.perf_counter()
+                    medidas = asyncio.run(carga_asgi(asgi, ruta, peticiones, concurrencia))
+                duracion = time.perf_counter() - inicio
+
+                estados = {estado for _, estado in medidas}
+                if estados != {200}:
+                    raise CommandError(f'{ruta} ({modo}) respondió {sorted(estados)}.')
+                percentiles = statistics.quantiles([segundos * 1000 for segundos, _ in medidas], n=100)
+                resultado = {
+                    'pagina': nombre_wsgi,
+                    'modo': modo,
+                    'ruta': ruta,
+                    'p50_ms': round(percentiles[49], 2),
+                    'p99_ms': round(percentiles[98], 2),
+                    'peticiones_por_segundo': round(len(medidas) / duracion, 1),
+                }
+                resultados.append(resultado)
+                self.stdout.write(
+                    f'  {nombre_wsgi:<20} {modo:<5} {resultado["p50_ms"]:8.1f} {resultado["p99_ms"]:8.1f} '
+                    f'{resultado["peticiones_por_segundo"]:8.1f}'
+                )
+        return resultados
@@ -0,0 +1,263 @@
+"""
+Benchmark de las vistas de gestion_estudiantes.
+
+Crea una base de datos de prueba y, para cada tamaño de colegio, la vacía, la llena
+con generar_colegio() y recorre con GET todas las URLs de gestion_estudiantes/urls.py,
+midiendo tiempo (mediana de varias repeticiones después de una petición de
+calentamiento), cantidad de consultas SQL y pico de memoria (tracemalloc). Los
+resultados se guardan en JSON y se comparan con una línea base: una vista empeora
+si hace más consultas o si su tiempo o memoria superan la tolerancia.
+
+Los tiempos solo son comparables en la misma máquina; después de cambiar de equipo
+regenere la línea base con --guardar-base.
+
+Uso:
+    python manage.py benchmark_vistas [--tamaños 100,1000,5000] [--repeticiones 5] \
+        [--salida benchmarks/resultados.json] [--base benchmarks/base.json] \
+        [--tolerancia 0.5] [--estricto] [--guardar-base]
+"""
+
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion_estudiantes import urls
+from gestion_estudiantes.generador import generar_colegio
+from gestion_estudiantes.models import Grado, Nota, Tarea
+from gestion_estudiantes.tareas import encolar
+
+DIRECTORIO_BENCHMARKS = Path(settings.BASE_DIR) / 'benchmarks'
+
+# Diferencia de tiempo por debajo de la cual no se reporta una regresión (ruido de medición)
+UMBRAL_RUIDO_MS = 2.0
+
+# Modelo de cada parámetro de URL; para 'pk' se deduce del prefijo del nombre de la URL
+MODELOS_PARAMETROS = {'estudiante_pk': 'estudiante', 'curso_pk': 'curso', 'grado_pk': 'grado'}
+
+# URLs que no se miden: la descarga necesita el archivo de una tarea ya ejecutada
+RUTAS_EXCLUIDAS = {'tarea-descargar'}
+
+
+def _rutas():
+    """Nombres y parámetros de las URLs que responden a GET."""
+    for patron in urls.urlpatterns:
+        vista = getattr(patron.callback, 'view_class', None)
+        if vista is not None and not hasattr(vista, 'get'):
+            continue  # Vistas que solo aceptan POST
+        if patron.name in RUTAS_EXCLUIDAS:
+            continue
+        yield patron.name, list(patron.pattern.converters)
+
+
+def _objetos_de_muestra():
+    """Objetos usados para completar los parámetros de las URLs."""
+    grado = Grado.objects.order_by('pk').first()
+    estudiante = grado.estudiantes.order_by('pk').first()
+    curso = grado.cursos.order_by('pk').first()
+    nota = Nota.objects.filter(estudiante=estudiante).order_by('pk').first() or Nota.objects.first()
+    tarea = Tarea.objects.order_by('pk').first() or encolar('recalcular_colegio')
+    return {'grado': grado, 'estudiante': estudiante, 'curso': curso, 'nota': nota, 'tarea': tarea}
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo, consultas y memoria de cada vista con distintos tamaños de datos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamaños', default='100,1000,5000',
+            help='Cantidades de estudiantes separadas por comas (por defecto 100,1000,5000).'
+        )
+        parser.add_argument('--grados', type=int, default=5, help='Grados del colegio generado.')
+        parser.add_argument('--cursos', type=int, default=8, help='Cursos por grado.')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Peticiones medidas por vista.')
+        parser.add_argument(
+            '--salida', default=str(DIRECTORIO_BENCHMARKS / 'resultados.json'),
+            help='Archivo JSON donde se guardan los resultados.'
+        )
+        parser.add_argument(
+            '--base', default=str(DIRECTORIO_BENCHMARKS / 'base.json'),
+            help='Archivo JSON con la línea base para comparar.'
+        )
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.5,
+            help='Aumento relativo de tiempo o memoria tolerado antes de reportar una regresión.'
+        )
+        parser.add_argument(
+            '--guardar-base', action='store_true',
+            help='Guarda los resultados como nueva línea base en lugar de compararlos.'
+        )
+        parser.add_argument(
+            '--estricto', action='store_true',
+            help='Falla también si el tiempo o la memoria superan la tolerancia.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tamaños = [int(valor) for valor in options['tamaños'].split(',')]
+        except ValueError:
+            raise CommandError('--tamaños debe ser una lista de números separados por comas.')
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser al menos 1.')
+        self.options = options
+
+        resultados = []
+        setup_test_environment()
+        # Una sola base para todos los tamaños: SQLite ignora close() en las bases en memoria,
+        # así que destruir y volver a crear la base de prueba conservaría los datos anteriores
+        nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Se mide sin el middleware de instrumentación SQL, que agrega su propio costo, y
+            # con la descarga de boletines generada en la petición para cualquier tamaño de grado
+            with override_settings(INSTRUMENTACION_SQL=False, BOLETINES_MAXIMO_EN_LINEA=sys.maxsize):
+                for tamaño in tamaños:
+                    resultados += self.medir_tamaño(tamaño)
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        informe = {
+            'generado': timezone.now().isoformat(),
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'base_de_datos': connection.vendor,
+                'plataforma': platform.platform(),
+            },
+            'parametros': {
+                'tamaños': tamaños,
+                'grados': options['grados'],
+                'cursos_por_grado': options['cursos'],
+                'repeticiones': options['repeticiones'],
+            },
+            'resultados': resultados,
+        }
+        destino = Path(options['base'] if options['guardar_base'] else options['salida'])
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_text(json.dumps(informe, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        self.stdout.write(f'Resultados guardados en {destino}.')
+
+        if not options['guardar_base']:
+            self.comparar(resultados, Path(options['base']))
+
+    def medir_tamaño(self, tamaño):
+        """Vacía la base de prueba, la llena con `tamaño` estudiantes y mide cada URL."""
+        call_command('flush', interactive=False, verbosity=0)
+        cache.clear()
+        inicio = time.perf_counter()
+        generar_colegio(grados=self.options['grados'], cursos_por_grado=self.options['cursos'], estudiantes=tamaño)
+        self.stdout.write(f'{tamaño} estudiantes generados en {time.perf_counter() - inicio:.1f} s.')
+
+        muestras = _objetos_de_muestra()
+        cliente = Client()
+        resultados = []
+        for nombre, parametros in _rutas():
+            kwargs = {}
+            for parametro in parametros:
+                modelo = MODELOS_PARAMETROS.get(parametro, nombre.split('-')[0])
+                kwargs[parametro] = muestras[modelo].pk
+            ruta = reverse(nombre, kwargs=kwargs)
+            resultado = {'tamaño': tamaño, 'url': nombre, 'ruta': ruta, **self.medir(cliente, ruta)}
+            resultados.append(resultado)
+            self.stdout.write(
+                f'  {nombre:<24} {resultado["estado"]}  {resultado["tiempo_ms"]:8.1f} ms  '
+                f'{resultado["consultas"]:4d} consultas  {resultado["memoria_pico_kb"]:8.0f} KB'
+            )
+        return resultados
+
+    def medir(self, cliente, ruta):
+        def pedir():
+            respuesta = cliente.get(ruta)
+            if respuesta.streaming:
+                b''.join(respuesta.streaming_content)  # Las exportaciones se generan al consumirlas
+            return respuesta
+
+        pedir()  # Calentamiento: plantillas, caché y conexiones
+        tiempos = []
+        for _ in range(self.options['repeticiones']):
+            inicio = time.perf_counter()
+            pedir()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        # Con DEBUG el registro de consultas tiene un tamaño máximo; se vacía para contar bien
+        reset_queries()
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = pedir()
+
+        # La memoria se mide aparte porque tracemalloc hace más lenta la ejecución
+        tracemalloc.start()
+        try:
+            pedir()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'estado': respuesta.status_code,
+            'tiempo_ms': round(statistics.median(tiempos), 2),
+            'tiempo_min_ms': round(min(tiempos), 2),
+            'consultas': len(consultas),
+            'memoria_pico_kb': round(pico / 1024, 1),
+        }
+
+    def comparar(self, resultados, ruta_base):
+        """
+        Compara con la línea base. Más consultas siempre es un error; los aumentos de tiempo
+        o memoria se reportan como advertencia, salvo con --estricto, porque dependen de la máquina.
+        """
+        if not ruta_base.exists():
+            self.stdout.write(self.style.WARNING(
+                f'No existe la línea base {ruta_base}; créela con --guardar-base.'
+            ))
+            return
+        base = {
+            (fila['tamaño'], fila['url']): fila
+            for fila in json.loads(ruta_base.read_text(encoding='utf-8'))['resultados']
+        }
+        tolerancia = 1 + self.options['tolerancia']
+        errores = []
+        advertencias = []
+        for fila in resultados:
+            anterior = base.get((fila['tamaño'], fila['url']))
+            if anterior is None:
+                continue
+            vista = f'{fila["url"]} ({fila["tamaño"]} estudiantes)'
+            if fila['consultas'] > anterior['consultas']:
+                errores.append(f'{vista}: consultas {anterior["consultas"]} -> {fila["consultas"]}')
+            # Se compara el menor tiempo, que es el menos afectado por la carga de la máquina
+            if (fila['tiempo_min_ms'] > anterior['tiempo_min_ms'] * tolerancia
+                    and fila['tiempo_min_ms'] - anterior['tiempo_min_ms'] > UMBRAL_RUIDO_MS):
+                advertencias.append(
+                    f'{vista}: tiempo {anterior["tiempo_min_ms"]:.1f} -> {fila["tiempo_min_ms"]:.1f} ms'
+                )
+            if fila['memoria_pico_kb'] > anterior['memoria_pico_kb'] * tolerancia:
+                advertencias.append(
+                    f'{vista}: memoria {anterior["memoria_pico_kb"]:.0f} -> {fila["memoria_pico_kb"]:.0f} KB'
+                )
+
+        if self.options['estricto']:
+            errores += advertencias
+        else:
+            for advertencia in advertencias:
+                self.stdout.write(self.style.WARNING(advertencia))
+        if errores:
+            for error in errores:
+                self.stderr.write(error)
+            raise CommandError(f'{len(errores)} regresiones respecto a {ruta_base}.')
+        self.stdout.write(self.style.SUCCESS(f'Sin regresiones de consultas respecto a {ruta_base}.'))
@@ -0,0 +1,47 @@
+"""
+Comando para generar el ZIP con los boletines de todos los estudiantes de un grado.
+
+Los boletines se renderizan en paralelo con un proceso por núcleo (o los indicados
+con --procesos) y al terminar se informa la velocidad en boletines por segundo.
+
+Uso:
+    python manage.py generar_boletines <grado_id> [--salida boletines.zip] [--procesos 4]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import slugify
+
+from gestion_estudiantes.boletines import Rendimiento, zip_boletines
+from gestion_estudiantes.models import Grado
+
+
+class Command(BaseCommand):
+    help = 'Genera un ZIP con el boletín imprimible de cada estudiante de un grado.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('grado_id', type=int, help='ID del grado')
+        parser.add_argument(
+            '--salida', help='Archivo ZIP a escribir (por defecto boletines-<grado>.zip)'
+        )
+        parser.add_argument(
+            '--procesos', type=int,
+            help='Procesos para renderizar; por defecto BOLETINES_PROCESOS o uno por núcleo. 1 no usa el pool.'
+        )
+
+    def handle(self, *args, **options):
+        if options['procesos'] is not None and options['procesos'] < 1:
+            raise CommandError('--procesos debe ser al menos 1.')
+        try:
+            grado = Grado.objects.get(pk=options['grado_id'])
+        except Grado.DoesNotExist:
+            raise CommandError(f'No existe el grado con ID {options["grado_id"]}.')
+
+        salida = options['salida'] or f'boletines-{slugify(grado.nombre)}.zip'
+        rendimiento = Rendimiento()
+        with open(salida, 'wb') as archivo:
+            for parte in zip_boletines(grado, procesos=options['procesos'], rendimiento=rendimiento):
+                archivo.write(parte)
+        self.stdout.write(self.style.SUCCESS(
+            f'{rendimiento.boletines} boletines en {rendimiento.segundos:.2f} s '
+            f'({rendimiento.por_segundo:.1f} boletines/s) escritos en {salida}.'
+        ))
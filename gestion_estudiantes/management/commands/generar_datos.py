@@ -0,0 +1,56 @@
+"""
+Comando para generar un colegio sintético con grados, cursos, estudiantes,
+matrículas y notas. Útil para pruebas de carga y para el comando benchmark_vistas.
+
+Uso:
+    python manage.py generar_datos [--grados 5] [--cursos 8] [--estudiantes 1000] \
+        [--proporcion-notas 0.9] [--semilla 42] [--lote 1000]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_estudiantes.dashboard import invalidar_instantanea
+from gestion_estudiantes.generador import generar_colegio
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos reproducibles: grados, cursos, estudiantes, matrículas y notas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grados', type=int, default=5, help='Cantidad de grados (por defecto 5).')
+        parser.add_argument('--cursos', type=int, default=8, help='Cursos por grado (por defecto 8).')
+        parser.add_argument(
+            '--estudiantes', type=int, default=1000,
+            help='Cantidad total de estudiantes, repartidos entre los grados (por defecto 1000).'
+        )
+        parser.add_argument(
+            '--proporcion-notas', type=float, default=0.9,
+            help='Fracción de matrículas que tienen nota, entre 0 y 1 (por defecto 0.9).'
+        )
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio.')
+        parser.add_argument(
+            '--lote', type=int, default=1000,
+            help='Cantidad de filas por bulk_create (por defecto 1000).'
+        )
+
+    def handle(self, *args, **options):
+        if options['grados'] < 1:
+            raise CommandError('Debe generarse al menos un grado.')
+        if not 0 <= options['proporcion_notas'] <= 1:
+            raise CommandError('--proporcion-notas debe estar entre 0 y 1.')
+
+        inicio = time.perf_counter()
+        creados = generar_colegio(
+            grados=options['grados'],
+            cursos_por_grado=options['cursos'],
+            estudiantes=options['estudiantes'],
+            proporcion_notas=options['proporcion_notas'],
+            semilla=options['semilla'],
+            tamaño_lote=options['lote'],
+        )
+        invalidar_instantanea()
+        duracion = time.perf_counter() - inicio
+        resumen = ', '.join(f'{cantidad} {nombre}' for nombre, cantidad in creados.items())
+        self.stdout.write(self.style.SUCCESS(f'Creados {resumen} en {duracion:.2f} s.'))
@@ -0,0 +1,283 @@
+"""
+Comando para importar cursos, estudiantes y notas desde archivos CSV.
+
+Los archivos se leen por bloques de tamaño fijo y cada bloque se guarda con
+bulk_create/bulk_update dentro de su propia transacción, por lo que la memoria
+usada no depende del tamaño del archivo y el bloqueo de escritura se libera
+después de cada bloque. La importación no es todo o nada: si un bloque falla,
+los anteriores quedan guardados; --dry-run sí revierte todo. Los grados, estudiantes y cursos se
+resuelven con mapas en memoria en lugar de una consulta por fila.
+
+Formato de los archivos (con fila de encabezados):
+    cursos.csv:       codigo,nombre,creditos,año,grado
+    estudiantes.csv:  id_estudiante,nombre,fecha_nacimiento,sexo,situacion,grado
+    notas.csv:        id_estudiante,curso_codigo,nota,observaciones
+
+La columna grado acepta el nombre o el id del grado. Las filas de notas también
+inscriben al estudiante en el curso si aún no lo está.
+
+Uso:
+    python manage.py importar_csv --cursos cursos.csv --estudiantes estudiantes.csv \
+        --notas notas.csv [--lote 1000] [--dry-run]
+"""
+
+import csv
+import datetime
+import time
+from contextlib import nullcontext
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from gestion_estudiantes.condicional import registrar_cambio
+from gestion_estudiantes.dashboard import invalidar_instantanea
+from gestion_estudiantes.estadisticas import grados_de_cursos, invalidar as invalidar_estadisticas
+from gestion_estudiantes.fragmentos import invalidar_estudiantes
+from gestion_estudiantes.models import Curso, Estudiante, Grado, Nota
+from gestion_estudiantes.notas import registrar_notas
+from gestion_estudiantes.rankings import grados_de_estudiantes, posiciones_diferidas, programar_actualizacion
+from gestion_estudiantes.signals import al_confirmar
+
+# Cantidad máxima de errores de fila que se muestran por archivo
+MAX_ERRORES_MOSTRADOS = 20
+
+
+class ErrorFila(Exception):
+    """Error de validación de una fila del CSV."""
+
+
+def leer_por_bloques(ruta, tamaño):
+    """Recorre un CSV y entrega listas de (número de línea, fila) de tamaño fijo."""
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        filas = enumerate(csv.DictReader(archivo), start=2)  # La línea 1 es el encabezado
+        while True:
+            bloque = list(islice(filas, tamaño))
+            if not bloque:
+                return
+            yield bloque
+
+
+def campo(fila, nombre, obligatorio=True):
+    valor = (fila.get(nombre) or '').strip()
+    if obligatorio and not valor:
+        raise ErrorFila(f'falta el campo "{nombre}"')
+    return valor
+
+
+class Command(BaseCommand):
+    help = 'Importa cursos, estudiantes y notas desde archivos CSV por lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cursos', help='Archivo CSV de cursos.')
+        parser.add_argument('--estudiantes', help='Archivo CSV de estudiantes.')
+        parser.add_argument('--notas', help='Archivo CSV de notas.')
+        parser.add_argument(
+            '--lote', type=int, default=1000,
+            help='Cantidad de filas procesadas por transacción (por defecto 1000).'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Valida e importa dentro de una transacción que se revierte al final.'
+        )
+
+    def handle(self, *args, **options):
+        if not any(options[nombre] for nombre in ('cursos', 'estudiantes', 'notas')):
+            raise CommandError('Indique al menos un archivo: --cursos, --estudiantes o --notas.')
+        self.tamaño_lote = options['lote']
+
+        # Mapas en memoria: crecen con la cantidad de registros de la base, no con el archivo
+        self.grados = {}
+        for pk, nombre in Grado.objects.values_list('pk', 'nombre'):
+            self.grados[nombre] = pk
+            self.grados[str(pk)] = pk
+        self.cursos = {
+            codigo: (pk, nombre) for pk, codigo, nombre in Curso.objects.values_list('pk', 'codigo', 'nombre')
+        }
+        self.estudiantes = {
+            id_estudiante: (pk, nombre)
+            for pk, id_estudiante, nombre in Estudiante.objects.values_list('pk', 'id_estudiante', 'nombre')
+        }
+
+        # Cada lote se confirma en su propia transacción, así que un error en un lote no
+        # revierte los anteriores. En modo de prueba todo ocurre en una sola transacción
+        # que se revierte al final.
+        contenedor = transaction.atomic() if options['dry_run'] else nullcontext()
+        # Las posiciones de los cursos y grados afectados se recalculan una sola vez, al final
+        with contenedor, posiciones_diferidas():
+            try:
+                if options['cursos']:
+                    self.importar(options['cursos'], 'cursos', self.importar_cursos)
+                if options['estudiantes']:
+                    self.importar(options['estudiantes'], 'estudiantes', self.importar_estudiantes)
+                if options['notas']:
+                    self.importar(options['notas'], 'notas', self.importar_notas)
+            finally:
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+                    self.stdout.write(self.style.WARNING('Modo de prueba: no se guardó ningún cambio.'))
+                else:
+                    # También si falló un lote: los anteriores ya están guardados
+                    invalidar_instantanea()
+                    registrar_cambio(Curso, Estudiante, Nota)
+
+    def importar(self, ruta, descripcion, procesar_bloque):
+        """Procesa un archivo por bloques y reporta filas por segundo."""
+        inicio = time.perf_counter()
+        totales = {'creados': 0, 'actualizados': 0, 'errores': 0, 'filas': 0}
+        try:
+            for bloque in leer_por_bloques(ruta, self.tamaño_lote):
+                validas = []
+                for linea, fila in bloque:
+                    try:
+                        validas.append(self.validar(descripcion, fila))
+                    except ErrorFila as error:
+                        totales['errores'] += 1
+                        if totales['errores'] <= MAX_ERRORES_MOSTRADOS:
+                            self.stderr.write(f'{ruta}:{linea}: {error}')
+                totales['filas'] += len(bloque)
+                with transaction.atomic():
+                    creados, actualizados = procesar_bloque(validas)
+                totales['creados'] += creados
+                totales['actualizados'] += actualizados
+        except OSError as error:
+            raise CommandError(f'No se pudo leer {ruta}: {error}')
+
+        duracion = time.perf_counter() - inicio
+        filas_por_segundo = totales['filas'] / duracion if duracion else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{descripcion}: {totales["filas"]} filas en {duracion:.2f} s '
+            f'({filas_por_segundo:.0f} filas/s) - {totales["creados"]} creados, '
+            f'{totales["actualizados"]} actualizados, {totales["errores"]} con errores.'
+        ))
+
+    # Validación de filas
+
+    def validar(self, descripcion, fila):
+        return getattr(self, f'validar_{descripcion}')(fila)
+
+    def resolver_grado(self, fila):
+        valor = campo(fila, 'grado', obligatorio=False)
+        if not valor:
+            return None
+        if valor not in self.grados:
+            raise ErrorFila(f'grado desconocido "{valor}"')
+        return self.grados[valor]
+
+    def validar_cursos(self, fila):
+        try:
+            creditos = int(campo(fila, 'creditos'))
+            año = int(campo(fila, 'año'))
+        except ValueError:
+            raise ErrorFila('creditos y año deben ser números enteros')
+        codigo = campo(fila, 'codigo')
+        if len(codigo) > Curso._meta.get_field('codigo').max_length:
+            raise ErrorFila(f'código demasiado largo "{codigo}"')
+        return Curso(
+            codigo=codigo, nombre=campo(fila, 'nombre'), creditos=creditos, año=año,
+            grado_id=self.resolver_grado(fila),
+        )
+
+    def validar_estudiantes(self, fila):
+        try:
+            fecha_nacimiento = datetime.date.fromisoformat(campo(fila, 'fecha_nacimiento'))
+        except ValueError:
+            raise ErrorFila('fecha_nacimiento debe tener el formato AAAA-MM-DD')
+        sexo = campo(fila, 'sexo').upper()[:1]
+        if sexo not in dict(Estudiante.SEXO_CHOICES):
+            raise ErrorFila('sexo debe ser M o F')
+        situacion = campo(fila, 'situacion', obligatorio=False) or 'Activo'
+        if situacion not in dict(Estudiante.SITUACION_CHOICES):
+            raise ErrorFila('situacion debe ser Activo o Inactivo')
+        return Estudiante(
+            id_estudiante=campo(fila, 'id_estudiante'), nombre=campo(fila, 'nombre'),
+            fecha_nacimiento=fecha_nacimiento, sexo=sexo, situacion=situacion,
+            grado_id=self.resolver_grado(fila),
+        )
+
+    def validar_notas(self, fila):
+        id_estudiante = campo(fila, 'id_estudiante')
+        codigo = campo(fila, 'curso_codigo')
+        if id_estudiante not in self.estudiantes:
+            raise ErrorFila(f'estudiante desconocido "{id_estudiante}"')
+        if codigo not in self.cursos:
+            raise ErrorFila(f'curso desconocido "{codigo}"')
+        try:
+            valor = Decimal(campo(fila, 'nota'))
+        except InvalidOperation:
+            raise ErrorFila('la nota debe ser numérica')
+        if not valor.is_finite() or not 0 <= valor <= 100:  # NaN no se puede comparar
+            raise ErrorFila('la nota debe estar entre 0 y 100')
+
+        estudiante_id, estudiante_nombre = self.estudiantes[id_estudiante]
+        curso_id, curso_nombre = self.cursos[codigo]
+        # Los campos redundantes se completan aquí porque bulk_create no llama a Nota.save()
+        return Nota(
+            estudiante_id=estudiante_id, curso_id=curso_id, nota=valor.quantize(Decimal('0.01')),
+            observaciones=campo(fila, 'observaciones', obligatorio=False) or None,
+            estudiante_nombre=estudiante_nombre, estudiante_id_form=id_estudiante,
+            curso_nombre=curso_nombre, curso_codigo=codigo,
+        )
+
+    # Guardado por bloques
+    #
+    # Cada bloque se guarda con un único INSERT ... ON CONFLICT DO UPDATE sobre la
+    # clave natural del modelo (para las notas, el par estudiante y curso), que crea
+    # las filas nuevas y actualiza las existentes.
+
+    def importar_cursos(self, cursos):
+        cursos = list({curso.codigo: curso for curso in cursos}.values())  # La última fila gana
+        existentes = [self.cursos[curso.codigo][0] for curso in cursos if curso.codigo in self.cursos]
+        # Grados anteriores de los cursos existentes, que pueden cambiar con la importación
+        grado_ids = set(grados_de_cursos(existentes))
+        Curso.objects.bulk_create(
+            cursos, update_conflicts=True, unique_fields=['codigo'],
+            update_fields=['nombre', 'creditos', 'año', 'grado'],
+        )
+        codigos = [curso.codigo for curso in cursos]
+        for pk, codigo, nombre in Curso.objects.filter(codigo__in=codigos).values_list('pk', 'codigo', 'nombre'):
+            self.cursos[codigo] = (pk, nombre)
+
+        # bulk_create no envía post_save: se invalidan las filas de los estudiantes inscritos
+        # en los cursos actualizados y las estadísticas de esos cursos y de sus grados
+        inscritos = (
+            Estudiante.cursos.through.objects.filter(curso_id__in=existentes)
+            .values_list('estudiante_id', flat=True).distinct()
+        )
+        grado_ids.update(curso.grado_id for curso in cursos if curso.grado_id)
+        al_confirmar(invalidar_estudiantes, list(inscritos))
+        al_confirmar(invalidar_estadisticas, existentes, list(grado_ids))
+        return len(cursos) - len(existentes), len(existentes)
+
+    def importar_estudiantes(self, estudiantes):
+        estudiantes = list({e.id_estudiante: e for e in estudiantes}.values())
+        existentes = [self.estudiantes[e.id_estudiante][0] for e in estudiantes if e.id_estudiante in self.estudiantes]
+        # Grados anteriores de los estudiantes existentes, que dejan si cambian de grado
+        grado_ids = grados_de_estudiantes(existentes)
+        Estudiante.objects.bulk_create(
+            estudiantes, update_conflicts=True, unique_fields=['id_estudiante'],
+            update_fields=['nombre', 'fecha_nacimiento', 'sexo', 'situacion', 'grado'],
+        )
+        ids = [e.id_estudiante for e in estudiantes]
+        pks = []
+        for pk, id_estudiante, nombre in Estudiante.objects.filter(
+            id_estudiante__in=ids
+        ).values_list('pk', 'id_estudiante', 'nombre'):
+            self.estudiantes[id_estudiante] = (pk, nombre)
+            pks.append(pk)
+        al_confirmar(invalidar_estudiantes, pks)  # bulk_create no envía post_save
+        grado_ids.update(e.grado_id for e in estudiantes if e.grado_id)
+        programar_actualizacion(grado_ids=grado_ids)
+        return len(estudiantes) - len(existentes), len(existentes)
+
+    def importar_notas(self, notas):
+        notas = list({(n.estudiante_id, n.curso_id): n for n in notas}.values())
+        # Inscribir en los cursos antes de registrar las notas; registrar_notas() envía
+        # notas_actualizadas, que también cubre estas inscripciones (bulk_create no envía m2m_changed)
+        Inscripcion = Estudiante.cursos.through
+        Inscripcion.objects.bulk_create(
+            [Inscripcion(estudiante_id=n.estudiante_id, curso_id=n.curso_id) for n in notas],
+            ignore_conflicts=True,
+        )
+        return registrar_notas(notas)
@@ -0,0 +1,64 @@
+"""
+Comando para matricular en bloque a un grado completo o a una lista de estudiantes en cursos.
+
+Uso:
+    python manage.py matricular --grado "Primero A" [--cursos MAT1 LEN1] [--solo-activos]
+    python manage.py matricular --estudiantes E001 E002 --cursos MAT1 LEN1
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_estudiantes.matriculas import matricular_en_bloque, matricular_grado
+from gestion_estudiantes.models import Curso, Estudiante, Grado
+
+
+class Command(BaseCommand):
+    help = 'Matricula a todos los estudiantes de un grado, o a una lista de estudiantes, en cursos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grado', help='Nombre o id del grado a matricular.')
+        parser.add_argument('--estudiantes', nargs='+', metavar='ID_ESTUDIANTE',
+                            help='IDs de los estudiantes a matricular.')
+        parser.add_argument('--cursos', nargs='+', metavar='CODIGO',
+                            help='Códigos de los cursos (por defecto, todos los cursos del grado).')
+        parser.add_argument('--solo-activos', action='store_true',
+                            help='Matricula solo a los estudiantes activos del grado.')
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Cantidad de inscripciones insertadas por lote (por defecto 1000).')
+
+    def handle(self, *args, **options):
+        if bool(options['grado']) == bool(options['estudiantes']):
+            raise CommandError('Indique --grado o --estudiantes (solo uno de los dos).')
+
+        curso_ids = None
+        if options['cursos']:
+            cursos = dict(Curso.objects.filter(codigo__in=options['cursos']).values_list('codigo', 'pk'))
+            faltantes = set(options['cursos']) - set(cursos)
+            if faltantes:
+                raise CommandError(f'Cursos desconocidos: {", ".join(sorted(faltantes))}')
+            curso_ids = list(cursos.values())
+
+        if options['grado']:
+            filtro = {'pk': options['grado']} if options['grado'].isdigit() else {'nombre': options['grado']}
+            grado = Grado.objects.filter(**filtro).first()
+            if grado is None:
+                raise CommandError(f'Grado desconocido: {options["grado"]}')
+            resultado = matricular_grado(
+                grado, curso_ids, solo_activos=options['solo_activos'], tamaño_lote=options['lote']
+            )
+        else:
+            if curso_ids is None:
+                raise CommandError('Indique los cursos con --cursos al matricular una lista de estudiantes.')
+            estudiantes = dict(
+                Estudiante.objects.filter(id_estudiante__in=options['estudiantes'])
+                .values_list('id_estudiante', 'pk')
+            )
+            faltantes = set(options['estudiantes']) - set(estudiantes)
+            if faltantes:
+                raise CommandError(f'Estudiantes desconocidos: {", ".join(sorted(faltantes))}')
+            resultado = matricular_en_bloque(estudiantes.values(), curso_ids, tamaño_lote=options['lote'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Inscripciones insertadas: {resultado["insertadas"]}. '
+            f'Ya existentes: {resultado["existentes"]}.'
+        ))
@@ -0,0 +1,139 @@
+"""
+Trabajador que ejecuta las tareas en segundo plano encoladas en la tabla Tarea.
+
+Reclama tareas pendientes mientras tenga procesos libres y las ejecuta en un
+ProcessPoolExecutor, de modo que las tareas pesadas no bloquean al trabajador ni
+entre sí. Con --procesos 0 las ejecuta una por una en el mismo proceso (útil para
+depurar). Se pueden iniciar varios trabajadores contra la misma base de datos.
+
+El latido de las tareas en curso se renueva cada --intervalo segundos: en el modo con
+pool lo hace el bucle principal y en el modo en línea un hilo, además de Progreso.
+
+Uso:
+    python manage.py procesar_tareas [--procesos 2] [--intervalo 1] [--una-vez]
+"""
+
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+
+from gestion_estudiantes.models import Tarea
+from gestion_estudiantes.tareas import ejecutar, latido, recuperar_abandonadas, reclamar
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas en segundo plano pendientes con un pool de procesos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--procesos', type=int, default=min(4, os.cpu_count() or 1),
+            help='Tareas ejecutadas en paralelo; 0 las ejecuta en este mismo proceso.'
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=1.0,
+            help='Segundos de espera entre consultas cuando no hay tareas (por defecto 1).'
+        )
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Termina cuando no quedan tareas disponibles en lugar de seguir esperando.'
+        )
+
+    def handle(self, *args, **options):
+        if options['procesos'] < 0:
+            raise CommandError('--procesos no puede ser negativo.')
+        self.options = options
+        self.trabajador = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f'Trabajador {self.trabajador} iniciado.')
+        try:
+            if options['procesos'] == 0:
+                self.procesar_en_linea()
+            else:
+                self.procesar_en_pool()
+        except KeyboardInterrupt:
+            self.stdout.write('Trabajador detenido.')
+
+    def informar(self, tarea_id, correcta):
+        tarea = Tarea.objects.get(pk=tarea_id)
+        if correcta:
+            self.stdout.write(self.style.SUCCESS(f'{tarea} terminada.'))
+        else:
+            self.stderr.write(f'{tarea} falló en el intento {tarea.intentos} de {tarea.max_intentos}.')
+
+    def procesar_en_linea(self):
+        while True:
+            recuperar_abandonadas()
+            tarea_id = reclamar(self.trabajador)
+            if tarea_id is None:
+                if self.options['una_vez']:
+                    return
+                time.sleep(self.options['intervalo'])
+                continue
+            with self.latidos(tarea_id):
+                correcta = ejecutar(tarea_id)
+            self.informar(tarea_id, correcta)
+
+    @contextmanager
+    def latidos(self, tarea_id):
+        """Renueva el latido de una tarea en un hilo mientras se ejecuta en este proceso."""
+        detener = threading.Event()
+
+        def latir():
+            try:
+                while not detener.wait(self.options['intervalo']):
+                    try:
+                        latido([tarea_id], self.trabajador)
+                    except DatabaseError:
+                        pass  # Por ejemplo, la base está bloqueada por la tarea: se reintenta luego
+            finally:
+                connections.close_all()  # Las conexiones de este hilo
+
+        hilo = threading.Thread(target=latir, name=f'latido-tarea-{tarea_id}', daemon=True)
+        hilo.start()
+        try:
+            yield
+        finally:
+            detener.set()
+            hilo.join()
+
+    def procesar_en_pool(self):
+        procesos = self.options['procesos']
+        # Los procesos hijos abren sus propias conexiones; no deben heredar las de este proceso
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=procesos, initializer=django.setup) as pool:
+            en_ejecucion = {}
+            while True:
+                recuperar_abandonadas()
+                while len(en_ejecucion) < procesos:
+                    tarea_id = reclamar(self.trabajador)
+                    if tarea_id is None:
+                        break
+                    en_ejecucion[pool.submit(ejecutar, tarea_id)] = tarea_id
+
+                if not en_ejecucion:
+                    if self.options['una_vez']:
+                        return
+                    time.sleep(self.options['intervalo'])
+                    continue
+
+                terminadas, _ = wait(en_ejecucion, timeout=self.options['intervalo'], return_when=FIRST_COMPLETED)
+                for futuro in terminadas:
+                    tarea_id = en_ejecucion.pop(futuro)
+                    try:
+                        correcta = futuro.result()
+                    except BrokenProcessPool:
+                        # Un proceso hijo murió: las tareas en curso se reintentarán al vencer su latido
+                        raise CommandError('El pool de procesos se interrumpió; reinicie el trabajador.')
+                    except Exception as error:
+                        # La tarea no pudo registrar su resultado (por ejemplo, la base no respondió)
+                        self.stderr.write(f'Tarea #{tarea_id}: {error!r}')
+                        correcta = False
+                    self.informar(tarea_id, correcta)
+                latido(en_ejecucion.values(), self.trabajador)
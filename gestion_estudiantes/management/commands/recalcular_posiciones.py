@@ -0,0 +1,25 @@
+"""
+Comando para reconstruir desde cero las posiciones de los estudiantes por curso y por grado.
+
+Uso:
+    python manage.py recalcular_posiciones
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from gestion_estudiantes.models import Posicion
+from gestion_estudiantes.rankings import actualizar_todo
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el puesto, percentil y cuartil de cada estudiante en sus cursos y su grado.'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        actualizar_todo()
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{Posicion.objects.count()} posiciones recalculadas en {duracion:.2f} s.'
+        ))
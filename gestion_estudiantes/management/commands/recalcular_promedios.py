@@ -0,0 +1,30 @@
+"""
+Comando para reconstruir desde cero los promedios almacenados de los estudiantes.
+
+Uso:
+    python manage.py recalcular_promedios [--lote 1000]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from gestion_estudiantes.models import Estudiante
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el promedio y la cantidad de notas almacenados en cada estudiante.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=1000,
+            help='Cantidad de estudiantes procesados por transacción (por defecto 1000).'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        procesados = Estudiante.recalcular_promedios(tamaño_lote=options['lote'])
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'Promedios recalculados para {procesados} estudiantes en {duracion:.2f} s.'
+        ))
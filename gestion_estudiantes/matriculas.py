@@ -0,0 +1,66 @@
+"""
+Matrícula en bloque de estudiantes en cursos.
+Llena la tabla intermedia Estudiante.cursos con un bulk_create(ignore_conflicts=True)
+por lote, en lugar de un estudiante.cursos.add() por estudiante y curso.
+"""
+
+from django.db import transaction
+
+from .condicional import registrar_cambio
+from .fragmentos import invalidar_estudiantes
+from .models import Estudiante
+from .signals import al_confirmar
+
+
+def matricular_en_bloque(estudiante_ids, curso_ids, tamaño_lote=1000):
+    """
+    Inscribe a cada estudiante en cada curso indicado. Las inscripciones existentes
+    se conservan. Retorna un diccionario con la cantidad de inscripciones insertadas
+    y la de las que ya existían.
+    """
+    estudiante_ids = list(estudiante_ids)
+    curso_ids = list(curso_ids)
+    resultado = {'insertadas': 0, 'existentes': 0}
+    if not estudiante_ids or not curso_ids:
+        return resultado
+
+    Inscripcion = Estudiante.cursos.through
+    estudiantes_por_lote = max(1, tamaño_lote // len(curso_ids))
+    for inicio in range(0, len(estudiante_ids), estudiantes_por_lote):
+        lote = estudiante_ids[inicio:inicio + estudiantes_por_lote]
+        existentes = Inscripcion.objects.filter(estudiante_id__in=lote, curso_id__in=curso_ids)
+        with transaction.atomic():
+            antes = existentes.count()
+            Inscripcion.objects.bulk_create(
+                [
+                    Inscripcion(estudiante_id=estudiante_id, curso_id=curso_id)
+                    for estudiante_id in lote
+                    for curso_id in curso_ids
+                ],
+                ignore_conflicts=True,
+            )
+            despues = existentes.count()
+        if despues > antes:
+            # bulk_create sobre la tabla intermedia no envía m2m_changed
+            al_confirmar(invalidar_estudiantes, lote)
+            al_confirmar(registrar_cambio, Estudiante)
+        resultado['insertadas'] += despues - antes
+        resultado['existentes'] += antes
+    return resultado
+
+
+def matricular_grado(grado, curso_ids=None, solo_activos=False, tamaño_lote=1000):
+    """
+    Inscribe a todos los estudiantes del grado en sus cursos (o en los cursos indicados).
+    Retorna el mismo diccionario que matricular_en_bloque().
+    """
+    estudiantes = grado.estudiantes.all()
+    if solo_activos:
+        estudiantes = estudiantes.filter(situacion='Activo')
+    if curso_ids is None:
+        curso_ids = grado.cursos.values_list('pk', flat=True)
+    return matricular_en_bloque(
+        estudiantes.order_by('pk').values_list('pk', flat=True),
+        curso_ids,
+        tamaño_lote=tamaño_lote,
+    )
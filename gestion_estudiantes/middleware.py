@@ -0,0 +1,123 @@
+"""
+Instrumentación de las consultas SQL de cada petición.
+
+InstrumentacionSQLMiddleware registra con connection.execute_wrapper() cada consulta
+que ejecuta la vista: cantidad, tiempo total en la base de datos y consultas repetidas.
+El resumen se agrega a la respuesta en la cabecera Server-Timing (visible en la pestaña
+de red del navegador) y se escribe como una línea JSON en el logger
+'gestion_estudiantes.sql'. Si la misma forma de consulta (el mismo SQL con distintos
+parámetros) se repite más de INSTRUMENTACION_SQL_UMBRAL_N1 veces, se reporta como un
+posible problema N+1.
+
+Se activa con INSTRUMENTACION_SQL, o con DEBUG si no está definido; cuando está
+desactivado lanza MiddlewareNotUsed y Django lo quita de la cadena, por lo que no
+tiene costo alguno.
+
+Las consultas que una StreamingHttpResponse hace al enviarse (por ejemplo, las
+exportaciones) ocurren después de la vista y no se cuentan.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('gestion_estudiantes.sql')
+
+# Listas de parámetros de IN (...) de largo variable y literales dentro del SQL
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def forma_consulta(sql):
+    """
+    Normaliza una consulta para agrupar las que solo difieren en sus valores:
+    reemplaza literales por ? y colapsa las listas de IN (%s, %s, ...).
+    """
+    sql = _LISTA_PARAMETROS.sub('(...)', sql)
+    return _LITERALES.sub('?', sql)
+
+
+class RegistroConsultas:
+    """Envoltorio de execute_wrapper que acumula las consultas de una petición."""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.tiempo = 0.0
+        self.formas = Counter()
+        self.exactas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - inicio
+            self.cantidad += 1
+            self.formas[forma_consulta(sql)] += 1
+            # Con executemany los parámetros pueden ser un iterador de un solo uso, cuyo repr()
+            # solo muestra su dirección; esas consultas no se comparan. En execute son una lista
+            # o diccionario de valores ya adaptados para la base, que repr() siempre admite.
+            if not many:
+                self.exactas[(sql, repr(params))] += 1
+
+    @property
+    def duplicadas(self):
+        """Consultas idénticas (mismo SQL y parámetros) ejecutadas más de una vez."""
+        return sum(veces - 1 for veces in self.exactas.values() if veces > 1)
+
+    def repetidas(self, umbral):
+        """Formas de consulta ejecutadas más de `umbral` veces, de más a menos frecuente."""
+        return [(forma, veces) for forma, veces in self.formas.most_common() if veces > umbral]
+
+
+class InstrumentacionSQLMiddleware:
+    """Mide las consultas SQL de cada petición y detecta patrones N+1."""
+
+    def __init__(self, get_response):
+        activa = getattr(settings, 'INSTRUMENTACION_SQL', None)
+        if not (settings.DEBUG if activa is None else activa):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.umbral = getattr(settings, 'INSTRUMENTACION_SQL_UMBRAL_N1', 10)
+
+    def __call__(self, request):
+        registro = RegistroConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for alias in connections:
+                pila.enter_context(connections[alias].execute_wrapper(registro))
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        repetidas = registro.repetidas(self.umbral)
+        metricas = (
+            f'db;desc="{registro.cantidad} consultas";dur={registro.tiempo * 1000:.1f}, '
+            f'total;dur={duracion * 1000:.1f}'
+        )
+        if response.has_header('Server-Timing'):
+            metricas = f'{response["Server-Timing"]}, {metricas}'
+        response['Server-Timing'] = metricas
+
+        logger.info(json.dumps({
+            'metodo': request.method,
+            'ruta': request.path,
+            'estado': response.status_code,
+            'consultas': registro.cantidad,
+            'tiempo_db_ms': round(registro.tiempo * 1000, 2),
+            'tiempo_total_ms': round(duracion * 1000, 2),
+            'duplicadas': registro.duplicadas,
+            'n_mas_1': len(repetidas),
+        }, ensure_ascii=False))
+        for forma, veces in repetidas:
+            logger.warning(
+                'Posible N+1 en %s %s: la misma consulta se ejecutó %d veces: %s',
+                request.method, request.path, veces, forma,
+            )
+        return response
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:44
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def calcular_promedios(apps, schema_editor):
+    Estudiante = apps.get_model('gestion_estudiantes', 'Estudiante')
+    Nota = apps.get_model('gestion_estudiantes', 'Nota')
+    # Inicializar los valores almacenados a partir de las notas existentes
+    resumenes = (
+        Nota.objects.order_by()
+        .values('estudiante_id')
+        .annotate(total=Sum('nota'), cantidad=Count('id'))
+    )
+    for resumen in resumenes:
+        Estudiante.objects.filter(pk=resumen['estudiante_id']).update(
+            promedio=round(float(resumen['total']) / resumen['cantidad'], 2),
+            total_notas=resumen['cantidad'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_estudiantes', '0009_merge_20250410_2101'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estudiante',
+            name='promedio',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='estudiante',
+            name='total_notas',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='estudiante',
+            name='sexo',
+            field=models.CharField(choices=[('M', 'Masculino'), ('F', 'Femenino')], max_length=10),
+        ),
+        migrations.RunPython(calcular_promedios, migrations.RunPython.noop),
+    ]
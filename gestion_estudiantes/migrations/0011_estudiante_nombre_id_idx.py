@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_estudiantes', '0010_estudiante_promedio_total_notas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='estudiante',
+            index=models.Index(fields=['nombre', 'id'], name='estudiante_nombre_id_idx'),
+        ),
+    ]
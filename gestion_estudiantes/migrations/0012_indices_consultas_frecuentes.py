@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_estudiantes', '0011_estudiante_nombre_id_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='curso',
+            options={'ordering': ['grado_id', 'año', 'nombre'], 'verbose_name': 'Curso', 'verbose_name_plural': 'Cursos'},
+        ),
+        migrations.AddIndex(
+            model_name='curso',
+            index=models.Index(fields=['grado', 'año', 'nombre'], name='curso_grado_anio_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estudiante',
+            index=models.Index(fields=['grado', 'nombre', 'id'], name='estudiante_grado_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estudiante',
+            index=models.Index(fields=['situacion', 'nombre', 'id'], name='estudiante_situacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['estudiante', 'fecha_registro'], name='nota_estudiante_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['curso', 'fecha_registro'], name='nota_curso_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+TABLA = 'gestion_estudiantes_estudiante'
+TABLA_FTS = 'gestion_estudiantes_estudiante_fts'
+
+CREAR = [
+    # Índice de texto completo sobre nombre e id_estudiante, sin distinguir acentos
+    f"""CREATE VIRTUAL TABLE {TABLA_FTS} USING fts5(
+        nombre, id_estudiante,
+        content='{TABLA}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # Triggers que mantienen el índice sincronizado con la tabla de estudiantes
+    f"""CREATE TRIGGER {TABLA_FTS}_ai AFTER INSERT ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, nombre, id_estudiante) VALUES (new.id, new.nombre, new.id_estudiante);
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_ad AFTER DELETE ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, id_estudiante)
+        VALUES ('delete', old.id, old.nombre, old.id_estudiante);
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_au AFTER UPDATE OF nombre, id_estudiante ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, id_estudiante)
+        VALUES ('delete', old.id, old.nombre, old.id_estudiante);
+        INSERT INTO {TABLA_FTS}(rowid, nombre, id_estudiante) VALUES (new.id, new.nombre, new.id_estudiante);
+    END""",
+    # Indexar los estudiantes existentes
+    f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')",
+]
+
+ELIMINAR = [
+    f'DROP TRIGGER IF EXISTS {TABLA_FTS}_ai',
+    f'DROP TRIGGER IF EXISTS {TABLA_FTS}_ad',
+    f'DROP TRIGGER IF EXISTS {TABLA_FTS}_au',
+    f'DROP TABLE IF EXISTS {TABLA_FTS}',
+]
+
+
+def ejecutar(sentencias):
+    def operacion(apps, schema_editor):
+        # FTS5 solo existe en SQLite; en otros motores la búsqueda usa icontains
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in sentencias:
+            schema_editor.execute(sql)
+    return operacion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_estudiantes', '0012_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.RunPython(ejecutar(CREAR), ejecutar(ELIMINAR)),
+    ]
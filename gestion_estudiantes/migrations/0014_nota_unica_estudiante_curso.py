@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:26
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def eliminar_notas_duplicadas(apps, schema_editor):
+    Estudiante = apps.get_model('gestion_estudiantes', 'Estudiante')
+    Nota = apps.get_model('gestion_estudiantes', 'Nota')
+    # La restricción anterior era sobre los campos redundantes, que pueden haber quedado
+    # desactualizados; se conserva la nota más reciente de cada estudiante y curso
+    duplicadas = (
+        Nota.objects.order_by()
+        .values('estudiante_id', 'curso_id')
+        .annotate(cantidad=Count('id'), ultima=Max('id'))
+        .filter(cantidad__gt=1)
+    )
+    afectados = set()
+    for grupo in duplicadas:
+        Nota.objects.filter(
+            estudiante_id=grupo['estudiante_id'], curso_id=grupo['curso_id'], id__lt=grupo['ultima']
+        ).delete()
+        afectados.add(grupo['estudiante_id'])
+
+    # Recalcular los valores almacenados de los estudiantes que perdieron notas
+    for estudiante_id in afectados:
+        resumen = Nota.objects.filter(estudiante_id=estudiante_id).aggregate(total=Sum('nota'), cantidad=Count('id'))
+        Estudiante.objects.filter(pk=estudiante_id).update(
+            promedio=round(float(resumen['total']) / resumen['cantidad'], 2),
+            total_notas=resumen['cantidad'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_estudiantes', '0013_estudiante_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(eliminar_notas_duplicadas, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='nota',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='nota',
+            constraint=models.UniqueConstraint(fields=('estudiante', 'curso'), name='unique_nota_estudiante_curso'),
+        ),
+    ]
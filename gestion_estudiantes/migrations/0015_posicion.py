@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_estudiantes', '0014_nota_unica_estudiante_curso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Posicion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('puesto', models.PositiveIntegerField()),
+                ('percentil', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('cuartil', models.PositiveSmallIntegerField()),
+                ('total', models.PositiveIntegerField()),
+                ('curso', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='posiciones', to='gestion_estudiantes.curso')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posiciones', to='gestion_estudiantes.estudiante')),
+                ('grado', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='posiciones', to='gestion_estudiantes.grado')),
+            ],
+            options={
+                'verbose_name': 'Posición',
+                'verbose_name_plural': 'Posiciones',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('curso__isnull', False)), fields=('curso', 'estudiante'), name='unique_posicion_curso'), models.UniqueConstraint(condition=models.Q(('grado__isnull', False)), fields=('grado', 'estudiante'), name='unique_posicion_grado'), models.CheckConstraint(condition=models.Q(('curso__isnull', True), ('grado__isnull', True), _connector='XOR'), name='posicion_curso_o_grado')],
+            },
+        ),
+    ]
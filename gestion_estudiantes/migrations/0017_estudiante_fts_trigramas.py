@@ -0,0 +1,97 @@
+from importlib import import_module
+
+from django.db import migrations
+
+TABLA = 'gestion_estudiantes_estudiante'
+TABLA_FTS = 'gestion_estudiantes_estudiante_fts'
+TABLA_TRIGRAMAS = 'gestion_estudiantes_estudiante_trigramas'
+
+# Debe coincidir con busqueda.ACENTOS y busqueda.SIN_ACENTOS. El tokenizador trigram de
+# SQLite no quita acentos hasta la versión 3.45, así que se indexa el texto ya sin ellos;
+# el tokenizador sí ignora mayúsculas y minúsculas.
+ACENTOS = 'áéíóúüñÁÉÍÓÚÜÑ'
+SIN_ACENTOS = 'aeiouunAEIOUUN'
+
+anterior = import_module('gestion_estudiantes.migrations.0013_estudiante_fts')
+
+
+def sin_acentos(expresion):
+    for acento, letra in zip(ACENTOS, SIN_ACENTOS):
+        expresion = f"replace({expresion}, '{acento}', '{letra}')"
+    return expresion
+
+
+def sentencias_indice(tabla, tokenizador, normalizar=lambda expresion: expresion):
+    """
+    Tabla FTS5 sin contenido propio (content='') sobre nombre, id_estudiante y grado, con
+    los triggers que la sincronizan. El grado se indexa como el token "g<id>g" para que
+    el filtro por grado forme parte de la consulta de texto completo.
+    """
+    def valores(fila):
+        return (
+            f"{fila}.id, {normalizar(f'{fila}.nombre')}, {normalizar(f'{fila}.id_estudiante')}, "
+            f"'g' || {fila}.grado_id || 'g'"
+        )
+
+    return [
+        f"""CREATE VIRTUAL TABLE {tabla} USING fts5(
+            nombre, id_estudiante, grado, content='', {tokenizador}
+        )""",
+        f"""CREATE TRIGGER {tabla}_ai AFTER INSERT ON {TABLA} BEGIN
+            INSERT INTO {tabla}(rowid, nombre, id_estudiante, grado) VALUES ({valores('new')});
+        END""",
+        f"""CREATE TRIGGER {tabla}_ad AFTER DELETE ON {TABLA} BEGIN
+            INSERT INTO {tabla}({tabla}, rowid, nombre, id_estudiante, grado) VALUES ('delete', {valores('old')});
+        END""",
+        f"""CREATE TRIGGER {tabla}_au AFTER UPDATE OF nombre, id_estudiante, grado_id ON {TABLA} BEGIN
+            INSERT INTO {tabla}({tabla}, rowid, nombre, id_estudiante, grado) VALUES ('delete', {valores('old')});
+            INSERT INTO {tabla}(rowid, nombre, id_estudiante, grado) VALUES ({valores('new')});
+        END""",
+        # Indexar los estudiantes existentes
+        f"INSERT INTO {tabla}(rowid, nombre, id_estudiante, grado) SELECT {valores(TABLA)} FROM {TABLA}",
+    ]
+
+
+def eliminar_indice(tabla):
+    return [
+        f'DROP TRIGGER IF EXISTS {tabla}_ai',
+        f'DROP TRIGGER IF EXISTS {tabla}_ad',
+        f'DROP TRIGGER IF EXISTS {tabla}_au',
+        f'DROP TABLE IF EXISTS {tabla}',
+    ]
+
+
+CREAR = [
+    # El índice de prefijos de la migración 0013 se reemplaza por uno que también indexa el grado
+    *anterior.ELIMINAR,
+    *sentencias_indice(TABLA_FTS, "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"),
+    # Índice de trigramas para buscar subcadenas
+    *sentencias_indice(TABLA_TRIGRAMAS, "tokenize='trigram'", sin_acentos),
+]
+
+ELIMINAR = [
+    *eliminar_indice(TABLA_TRIGRAMAS),
+    *eliminar_indice(TABLA_FTS),
+    *anterior.CREAR,
+]
+
+
+def ejecutar(sentencias):
+    def operacion(apps, schema_editor):
+        # FTS5 solo existe en SQLite; en otros motores la búsqueda usa icontains
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in sentencias:
+            schema_editor.execute(sql)
+    return operacion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_estudiantes', '0016_tarea'),
+    ]
+
+    operations = [
+        migrations.RunPython(ejecutar(CREAR), ejecutar(ELIMINAR)),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:46
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_estudiantes', '0017_estudiante_fts_trigramas'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='curso',
+            options={'ordering': ['grado', 'año', 'nombre'], 'verbose_name': 'Curso', 'verbose_name_plural': 'Cursos'},
+        ),
+    ]
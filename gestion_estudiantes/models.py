@@ -1,8 +1,41 @@
-from django.db import models
+import asyncio
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Avg, Count, FloatField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 # Create your models here.
 
+class GradoQuerySet(models.QuerySet):
+    """Consultas reutilizables para los grados."""
+
+    def con_resumen(self):
+        """
+        Anota cada grado con su cantidad de cursos, de estudiantes, de estudiantes
+        activos y el promedio general (redondeado a 2 decimales, 0 si no hay estudiantes).
+        Todo se resuelve en una sola consulta agrupada, sin importar la cantidad de grados.
+        """
+        total_cursos = (
+            Curso.objects.filter(grado=OuterRef('pk'))
+            .order_by()
+            .values('grado')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return self.annotate(
+            total_cursos=Coalesce(Subquery(total_cursos), 0),
+            total_estudiantes=Count('estudiantes'),
+            estudiantes_activos=Count('estudiantes', filter=Q(estudiantes__situacion='Activo')),
+            promedio_general=Coalesce(
+                Round(Avg('estudiantes__promedio', output_field=FloatField()), 2), 0.0
+            ),
+        )
+
+
 # Modelo para representar los grados académicos
 class Grado(models.Model):
     # Campos básicos del grado
@@ -11,16 +44,93 @@ class Grado(models.Model):
     duracion = models.PositiveIntegerField(help_text="Duración en años")
     fecha_creacion = models.DateTimeField(auto_now_add=True)  # Se establece automáticamente al crear
 
+    objects = GradoQuerySet.as_manager()
+
+    # Clave de caché de la lista de grados usada en los filtros (se invalida en signals.py)
+    CLAVE_CACHE_OPCIONES = 'grados:opciones'
+
+    @classmethod
+    def obtener_opciones(cls):
+        """
+        Retorna la lista de grados (id y nombre) para los filtros desplegables.
+        Se guarda en caché hasta que se crea, modifica o elimina un grado.
+        """
+        return cache.get_or_set(
+            cls.CLAVE_CACHE_OPCIONES,
+            lambda: list(cls.objects.order_by('nombre').values('id', 'nombre')),
+            None,
+        )
+
     def calcular_promedio_general(self):
         """
         Calcula el promedio general de todos los estudiantes en este grado.
         Retorna 0 si no hay estudiantes, de lo contrario retorna el promedio redondeado a 2 decimales.
         """
-        estudiantes = self.estudiantes.all()
-        if not estudiantes:
+        resumen = self.estudiantes.aggregate(total=Count('id'), suma_promedios=Sum('promedio'))
+        if not resumen['total']:
             return 0
-        total_promedios = sum(estudiante.calcular_promedio() for estudiante in estudiantes)
-        return round(total_promedios / estudiantes.count(), 2)
+        return round(float(resumen['suma_promedios']) / resumen['total'], 2)
+
+    def obtener_estadisticas(self, nota_aprobatoria=None):
+        """
+        Calcula las estadísticas del grado con dos consultas agregadas, sin importar
+        la cantidad de estudiantes o notas: promedio general, tasa de aprobación,
+        conteos de estudiantes y el promedio de cada curso.
+
+        Los estudiantes sin notas cuentan con promedio 0 en el promedio general,
+        igual que en calcular_promedio_general(). Los valores vacíos se reportan como 0.
+        """
+        agregados, cursos = self._consultas_estadisticas(nota_aprobatoria)
+        return self._armar_estadisticas(self.estudiantes.aggregate(**agregados), list(cursos))
+
+    async def aobtener_estadisticas(self, nota_aprobatoria=None):
+        """Versión asíncrona de obtener_estadisticas(); las dos consultas se lanzan a la vez."""
+        agregados, cursos = self._consultas_estadisticas(nota_aprobatoria)
+
+        async def listar_cursos():
+            return [curso async for curso in cursos]
+
+        resumen, cursos = await asyncio.gather(self.estudiantes.aaggregate(**agregados), listar_cursos())
+        return self._armar_estadisticas(resumen, cursos)
+
+    def _consultas_estadisticas(self, nota_aprobatoria):
+        """Agregados sobre los estudiantes del grado y queryset de sus cursos con los de sus notas."""
+        if nota_aprobatoria is None:
+            nota_aprobatoria = settings.NOTA_APROBATORIA
+        agregados = {
+            'total': Count('id'),
+            'activos': Count('id', filter=Q(situacion='Activo')),
+            'con_notas': Count('id', filter=Q(total_notas__gt=0)),
+            'aprobados': Count('id', filter=Q(total_notas__gt=0, promedio__gte=nota_aprobatoria)),
+            'suma_promedios': Sum('promedio'),
+        }
+        cursos = self.cursos.order_by('año', 'nombre').annotate(
+            promedio_notas=Avg('notas__nota'),
+            cantidad_notas=Count('notas'),
+            notas_aprobadas=Count('notas', filter=Q(notas__nota__gte=nota_aprobatoria)),
+        )
+        return agregados, cursos
+
+    @staticmethod
+    def _armar_estadisticas(resumen, cursos):
+        total = resumen['total']
+        con_notas = resumen['con_notas']
+        for curso in cursos:
+            curso.promedio = round(float(curso.promedio_notas), 2) if curso.cantidad_notas else 0
+            curso.tasa_aprobacion = (
+                round(curso.notas_aprobadas * 100 / curso.cantidad_notas, 2) if curso.cantidad_notas else 0
+            )
+
+        return {
+            'total_estudiantes': total,
+            'estudiantes_activos': resumen['activos'],
+            'estudiantes_con_notas': con_notas,
+            'estudiantes_aprobados': resumen['aprobados'],
+            'promedio_general': round(float(resumen['suma_promedios']) / total, 2) if total else 0,
+            'tasa_aprobacion': round(resumen['aprobados'] * 100 / con_notas, 2) if con_notas else 0,
+            'total_cursos': len(cursos),
+            'cursos': cursos,
+        }
 
     def __str__(self):
         return self.nombre
@@ -39,6 +149,15 @@ class Curso(models.Model):
     grado = models.ForeignKey(Grado, on_delete=models.CASCADE, related_name='cursos', null=True, blank=True)
     año = models.PositiveIntegerField(help_text="Año en el que se dicta el curso")
 
+    def clave_orden(self):
+        """
+        Clave equivalente a Meta.ordering, para ordenar cursos en memoria. Usa el nombre
+        del grado, así que los cursos deben leerse con select_related('grado').
+        """
+        grado = self.grado
+        # SQLite ordena primero los cursos sin grado; el id desempata grados con el mismo nombre
+        return (grado is not None, grado.nombre if grado else '', self.grado_id or 0, self.año, self.nombre)
+
     def get_nota_estudiante(self, estudiante):
         """
         Obtiene la nota de un estudiante específico en este curso.
@@ -52,7 +171,11 @@ class Curso(models.Model):
     class Meta:
         verbose_name = "Curso"
         verbose_name_plural = "Cursos"
-        ordering = ['grado', 'año', 'nombre']  # Ordena por grado, año y nombre
+        ordering = ['grado', 'año', 'nombre']  # Ordena por grado (su nombre), año y nombre
+        indexes = [
+            # Cursos de un grado en su orden natural
+            models.Index(fields=['grado', 'año', 'nombre'], name='curso_grado_anio_nombre_idx'),
+        ]
 
 # Modelo para representar a los estudiantes
 class Estudiante(models.Model):
@@ -80,6 +203,21 @@ class Estudiante(models.Model):
     fecha_registro = models.DateTimeField(auto_now_add=True)
     cursos = models.ManyToManyField(Curso, related_name='estudiantes', blank=True)
 
+    # Valores precalculados a partir de las notas (se actualizan al guardar o eliminar una nota)
+    promedio = models.DecimalField(max_digits=5, decimal_places=2, default=0, editable=False)
+    total_notas = models.PositiveIntegerField(default=0, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Recuerda el grado leído de la base, para saber al guardar si el estudiante
+        cambió de grado sin volver a consultarlo.
+        """
+        instancia = super().from_db(db, field_names, values)
+        if 'grado_id' in instancia.__dict__:  # No si el campo se difirió
+            instancia._grado_guardado = instancia.grado_id
+        return instancia
+
     def get_sexo_display(self):
         """
         Retorna la versión legible del sexo del estudiante.
@@ -88,14 +226,70 @@ class Estudiante(models.Model):
 
     def calcular_promedio(self):
         """
-        Calcula el promedio de todas las notas del estudiante.
+        Retorna el promedio almacenado de las notas del estudiante.
         Retorna 0 si no tiene notas, de lo contrario retorna el promedio redondeado a 2 decimales.
         """
-        notas = self.notas.all()
-        if not notas:
+        if not self.total_notas:
             return 0
-        total = sum(float(nota.nota) for nota in notas)
-        return round(total / len(notas), 2)
+        return float(self.promedio)
+
+    @staticmethod
+    def actualizar_promedio(estudiante_id):
+        """
+        Recalcula y guarda el promedio y la cantidad de notas de un estudiante
+        con una sola consulta de agregación.
+        """
+        resumen = Nota.objects.filter(estudiante_id=estudiante_id).aggregate(
+            total=Sum('nota'), cantidad=Count('id')
+        )
+        cantidad = resumen['cantidad']
+        promedio = round(float(resumen['total']) / cantidad, 2) if cantidad else 0
+        Estudiante.objects.filter(pk=estudiante_id).update(promedio=promedio, total_notas=cantidad)
+
+    @staticmethod
+    def recalcular_promedios(estudiante_ids=None, tamaño_lote=1000):
+        """
+        Reconstruye el promedio y la cantidad de notas de varios estudiantes
+        (o de todos si no se indican) por lotes: una consulta agrupada y un
+        bulk_update por lote. Retorna la cantidad de estudiantes procesados.
+        """
+        queryset = Estudiante.objects.order_by('pk')
+        if estudiante_ids is not None:
+            queryset = queryset.filter(pk__in=list(estudiante_ids))
+        ids = queryset.values_list('pk', flat=True)
+
+        procesados = 0
+        lote = []
+        for estudiante_id in ids.iterator(chunk_size=tamaño_lote):
+            lote.append(estudiante_id)
+            if len(lote) >= tamaño_lote:
+                procesados += Estudiante._recalcular_lote(lote)
+                lote = []
+        if lote:
+            procesados += Estudiante._recalcular_lote(lote)
+        return procesados
+
+    @staticmethod
+    def _recalcular_lote(ids):
+        """Recalcula los promedios de un lote de estudiantes dentro de una transacción."""
+        resumenes = {
+            fila['estudiante_id']: fila
+            for fila in Nota.objects.filter(estudiante_id__in=ids)
+            .order_by()
+            .values('estudiante_id')
+            .annotate(total=Sum('nota'), cantidad=Count('id'))
+        }
+        estudiantes = []
+        for estudiante_id in ids:
+            resumen = resumenes.get(estudiante_id)
+            estudiante = Estudiante(pk=estudiante_id, promedio=0, total_notas=0)
+            if resumen:
+                estudiante.total_notas = resumen['cantidad']
+                estudiante.promedio = round(float(resumen['total']) / resumen['cantidad'], 2)
+            estudiantes.append(estudiante)
+        with transaction.atomic():
+            Estudiante.objects.bulk_update(estudiantes, ['promedio', 'total_notas'])
+        return len(estudiantes)
 
     def __str__(self):
         return self.nombre
@@ -104,6 +298,13 @@ class Estudiante(models.Model):
         verbose_name = "Estudiante"
         verbose_name_plural = "Estudiantes"
         ordering = ['nombre']
+        indexes = [
+            # Paginación por cursor del listado de estudiantes
+            models.Index(fields=['nombre', 'id'], name='estudiante_nombre_id_idx'),
+            # Estudiantes de un grado (o con cierta situación) en orden alfabético
+            models.Index(fields=['grado', 'nombre', 'id'], name='estudiante_grado_nombre_idx'),
+            models.Index(fields=['situacion', 'nombre', 'id'], name='estudiante_situacion_idx'),
+        ]
 
 # Modelo para representar las notas de los estudiantes en los cursos
 class Nota(models.Model):
@@ -132,7 +333,8 @@ class Nota(models.Model):
     def save(self, *args, **kwargs):
         """
         Sobrescribe el método save para actualizar los campos redundantes
-        antes de guardar una nueva nota.
+        antes de guardar una nueva nota. El promedio del estudiante se
+        actualiza en la misma transacción (ver signals.py).
         """
         if not self.pk:  # Solo si es una nueva nota
             # Guardar información del estudiante y curso
@@ -140,7 +342,8 @@ class Nota(models.Model):
             self.estudiante_id_form = self.estudiante.id_estudiante
             self.curso_nombre = self.curso.nombre
             self.curso_codigo = self.curso.codigo
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.estudiante_nombre} ({self.estudiante_id_form}) - {self.curso_nombre} ({self.curso_codigo}): {self.nota}"
@@ -148,5 +351,92 @@ class Nota(models.Model):
     class Meta:
         verbose_name = 'Nota'
         verbose_name_plural = 'Notas'
-        unique_together = ['estudiante_id_form', 'curso_codigo']  # Evita notas duplicadas
         ordering = ['-fecha_registro']  # Ordena por fecha de registro, más recientes primero
+        constraints = [
+            # Una sola nota por estudiante y curso; es la clave del upsert de notas.py
+            models.UniqueConstraint(fields=['estudiante', 'curso'], name='unique_nota_estudiante_curso'),
+        ]
+        indexes = [
+            # Notas de un estudiante o de un curso en el orden por defecto
+            models.Index(fields=['estudiante', 'fecha_registro'], name='nota_estudiante_fecha_idx'),
+            models.Index(fields=['curso', 'fecha_registro'], name='nota_curso_fecha_idx'),
+        ]
+
+# Modelo con las posiciones precalculadas de cada estudiante (ver rankings.py)
+class Posicion(models.Model):
+    """
+    Puesto, percentil y cuartil de un estudiante dentro de un curso (según su nota)
+    o de su grado (según su promedio). Cada fila tiene curso o grado, nunca ambos.
+    """
+    estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE, related_name='posiciones')
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, null=True, blank=True, related_name='posiciones')
+    grado = models.ForeignKey(Grado, on_delete=models.CASCADE, null=True, blank=True, related_name='posiciones')
+    valor = models.DecimalField(max_digits=5, decimal_places=2)  # Nota o promedio usado para ordenar
+    puesto = models.PositiveIntegerField()  # 1 es el mejor; los empates comparten puesto
+    percentil = models.DecimalField(max_digits=5, decimal_places=2)  # % de la clase con un valor menor o igual
+    cuartil = models.PositiveSmallIntegerField()  # 1 es el cuarto superior
+    total = models.PositiveIntegerField()  # Estudiantes en la clasificación
+
+    def __str__(self):
+        return f"{self.estudiante_id} - {self.curso_id or self.grado_id}: {self.puesto}/{self.total}"
+
+    class Meta:
+        verbose_name = 'Posición'
+        verbose_name_plural = 'Posiciones'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['curso', 'estudiante'], condition=Q(curso__isnull=False), name='unique_posicion_curso'
+            ),
+            models.UniqueConstraint(
+                fields=['grado', 'estudiante'], condition=Q(grado__isnull=False), name='unique_posicion_grado'
+            ),
+            models.CheckConstraint(
+                condition=Q(curso__isnull=True) ^ Q(grado__isnull=True), name='posicion_curso_o_grado'
+            ),
+        ]
+
+# Modelo para las tareas en segundo plano (ver tareas.py)
+class Tarea(models.Model):
+    """Trabajo pesado encolado desde la web y ejecutado por el comando procesar_tareas."""
+    PENDIENTE = 'pendiente'
+    EN_CURSO = 'en_curso'
+    COMPLETADA = 'completada'
+    FALLIDA = 'fallida'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En curso'),
+        (COMPLETADA, 'Completada'),
+        (FALLIDA, 'Fallida'),
+    ]
+
+    tipo = models.CharField(max_length=50)  # Nombre registrado con @tarea en tareas.py
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=PENDIENTE)
+    progreso = models.PositiveSmallIntegerField(default=0)  # Porcentaje de 0 a 100
+    mensaje = models.CharField(max_length=200, blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=3)
+    disponible_desde = models.DateTimeField(default=timezone.now)  # Se pospone al reintentar
+    trabajador = models.CharField(max_length=100, blank=True)  # Proceso que la ejecuta
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)  # También sirve de latido del trabajador
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def terminada(self):
+        return self.estado in (self.COMPLETADA, self.FALLIDA)
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_estado_display()})"
+
+    class Meta:
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            # Búsqueda de la próxima tarea disponible por el trabajador
+            models.Index(fields=['estado', 'disponible_desde'], name='tarea_estado_disponible_idx'),
+        ]
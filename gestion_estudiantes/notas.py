@@ -0,0 +1,76 @@
+"""
+Registro de notas con INSERT ... ON CONFLICT DO UPDATE.
+
+Nota tiene una restricción única sobre (estudiante, curso), así que registrar una
+nota es un solo upsert: crea la fila si no existe y la reemplaza si ya existe,
+sin leerla antes para decidir entre INSERT y UPDATE. Dos profesores que guardan
+la misma nota al mismo tiempo no provocan un IntegrityError; gana el último.
+
+Lo usan el formulario de notas, la planilla de un curso y la importación de CSV.
+Como bulk_create no envía post_save, al terminar se envía notas_actualizadas,
+que recalcula los promedios e invalida las cachés de los estudiantes afectados.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Nota
+from .signals import notas_actualizadas
+
+# Campos que se reemplazan cuando la nota ya existe. Los campos redundantes se
+# incluyen para que reflejen los datos actuales del estudiante y del curso.
+CAMPOS_ACTUALIZABLES = [
+    'nota', 'observaciones', 'fecha_registro',
+    'estudiante_nombre', 'estudiante_id_form', 'curso_nombre', 'curso_codigo',
+]
+
+
+def nueva_nota(estudiante, curso, nota, observaciones=None):
+    """Construye una Nota sin guardar con los campos redundantes completos."""
+    return Nota(
+        estudiante=estudiante,
+        curso=curso,
+        nota=nota,
+        observaciones=observaciones or None,
+        estudiante_nombre=estudiante.nombre,
+        estudiante_id_form=estudiante.id_estudiante,
+        curso_nombre=curso.nombre,
+        curso_codigo=curso.codigo,
+    )
+
+
+def registrar_notas(notas):
+    """
+    Crea o actualiza varias notas con un upsert por lote. Si hay varias notas para
+    el mismo estudiante y curso, gana la última. Retorna (creadas, actualizadas).
+
+    La cantidad de notas que ya existían se obtiene con una consulta previa en la
+    misma transacción; solo sirve para el informe, el upsert no depende de ella.
+    """
+    notas = list({(nota.estudiante_id, nota.curso_id): nota for nota in notas}.values())
+    if not notas:
+        return 0, 0
+    estudiante_ids = {nota.estudiante_id for nota in notas}
+    curso_ids = {nota.curso_id for nota in notas}
+    ahora = timezone.now()
+    for nota in notas:
+        nota.fecha_registro = ahora
+
+    with transaction.atomic():
+        existentes = set(
+            Nota.objects.filter(estudiante_id__in=estudiante_ids, curso_id__in=curso_ids)
+            .values_list('estudiante_id', 'curso_id')
+        )
+        Nota.objects.bulk_create(
+            notas, update_conflicts=True, unique_fields=['estudiante', 'curso'],
+            update_fields=CAMPOS_ACTUALIZABLES,
+        )
+        notas_actualizadas.send(sender=Nota, estudiante_ids=estudiante_ids, curso_ids=curso_ids)
+    actualizadas = sum(1 for nota in notas if (nota.estudiante_id, nota.curso_id) in existentes)
+    return len(notas) - actualizadas, actualizadas
+
+
+def registrar_nota(estudiante, curso, nota, observaciones=None):
+    """Crea o reemplaza la nota del estudiante en el curso. Retorna True si la nota es nueva."""
+    creadas, _ = registrar_notas([nueva_nota(estudiante, curso, nota, observaciones)])
+    return creadas == 1
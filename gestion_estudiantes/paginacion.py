@@ -0,0 +1,120 @@
+"""
+Paginación por cursor (keyset) para listados grandes.
+En lugar de OFFSET, cada página continúa desde los valores de orden del último
+registro de la anterior, por lo que la página 500 cuesta lo mismo que la primera.
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+def codificar_cursor(valores):
+    """Codifica los valores de orden de un registro en un cursor opaco para la URL."""
+    datos = json.dumps(list(valores), cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, campos, modelo):
+    """
+    Decodifica un cursor y convierte cada valor al tipo del campo de `modelo` con el
+    mismo nombre. Retorna None si el cursor es inválido, por ejemplo si fue editado a mano
+    y contiene nulos, listas u objetos, o valores que no corresponden al tipo del campo.
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        return None
+    convertidos = []
+    for campo, valor in zip(campos, valores):
+        if valor is None or isinstance(valor, (list, dict)):
+            return None
+        try:
+            convertidos.append(modelo._meta.get_field(campo).to_python(valor))
+        except ValidationError:
+            return None
+    return convertidos
+
+
+def _valores_de(objeto, campos):
+    """Obtiene los valores de orden de una instancia o de un diccionario de values()."""
+    if isinstance(objeto, dict):
+        return [objeto[campo] for campo in campos]
+    return [getattr(objeto, campo) for campo in campos]
+
+
+def _filtro_keyset(campos, valores, operador):
+    """
+    Construye la condición (c1, c2, ...) > (v1, v2, ...) como una disyunción
+    de prefijos iguales. La cota adicional c1 >= v1 permite que el motor busque
+    directamente en el índice sobre los mismos campos en lugar de recorrerlo desde el inicio.
+    """
+    condicion = Q()
+    for i, campo in enumerate(campos):
+        prefijo = {campos[j]: valores[j] for j in range(i)}
+        prefijo[f'{campo}__{operador}'] = valores[i]
+        condicion |= Q(**prefijo)
+    return Q(**{f'{campos[0]}__{operador}e': valores[0]}) & condicion
+
+
+@dataclass
+class PaginaCursor:
+    """Resultado de una página: objetos y cursores para navegar."""
+    objetos: list = field(default_factory=list)
+    cursor_siguiente: str = None
+    cursor_anterior: str = None
+
+    @property
+    def hay_siguiente(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def hay_anterior(self):
+        return self.cursor_anterior is not None
+
+
+def paginar_por_cursor(queryset, campos, despues=None, antes=None, tamaño=50):
+    """
+    Retorna una PaginaCursor del queryset ordenado ascendentemente por `campos`
+    (el último debe ser único, por ejemplo 'id'). `despues` y `antes` son cursores
+    obtenidos de páginas previas; un cursor inválido se trata como la primera página.
+    Ejecuta una sola consulta por página.
+    """
+    campos = tuple(campos)
+    valores_despues = decodificar_cursor(despues, campos, queryset.model) if despues else None
+    valores_antes = decodificar_cursor(antes, campos, queryset.model) if antes else None
+
+    if valores_antes is not None:
+        # Página anterior: se recorre en orden inverso y luego se invierte el resultado
+        orden = [f'-{campo}' for campo in campos]
+        filas = list(
+            queryset.filter(_filtro_keyset(campos, valores_antes, 'lt')).order_by(*orden)[:tamaño + 1]
+        )
+        hay_mas = len(filas) > tamaño
+        objetos = list(reversed(filas[:tamaño]))
+        return PaginaCursor(
+            objetos=objetos,
+            cursor_siguiente=codificar_cursor(_valores_de(objetos[-1], campos)) if objetos else None,
+            cursor_anterior=codificar_cursor(_valores_de(objetos[0], campos)) if hay_mas else None,
+        )
+
+    if valores_despues is not None:
+        queryset = queryset.filter(_filtro_keyset(campos, valores_despues, 'gt'))
+    filas = list(queryset.order_by(*campos)[:tamaño + 1])
+    hay_mas = len(filas) > tamaño
+    objetos = filas[:tamaño]
+    return PaginaCursor(
+        objetos=objetos,
+        cursor_siguiente=codificar_cursor(_valores_de(objetos[-1], campos)) if hay_mas else None,
+        cursor_anterior=(
+            codificar_cursor(_valores_de(objetos[0], campos))
+            if valores_despues is not None and objetos else None
+        ),
+    )
@@ -0,0 +1,148 @@
+"""
+Posiciones de los estudiantes por curso y por grado, calculadas con funciones de ventana.
+
+Cada clasificación (las notas de un curso o los promedios de los estudiantes de un
+grado) se calcula con una sola consulta que usa DENSE_RANK y COUNT sobre una ventana
+particionada, y se guarda en la tabla Posicion con un INSERT ... SELECT. Las páginas
+leen esa tabla en lugar de ordenar a los estudiantes en cada petición.
+
+La actualización es incremental por partición: cuando cambia una nota solo se
+recalculan su curso y el grado del estudiante. Dentro de posiciones_diferidas()
+las particiones afectadas se acumulan y se recalculan una sola vez al salir, lo
+que usan las cargas en bloque (por ejemplo, la importación de CSV).
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import DenseRank
+
+from .models import Curso, Estudiante, Grado, Nota, Posicion
+
+_estado = threading.local()
+
+
+def _clasificar(queryset, estudiante, particion, valor):
+    """
+    Consulta con una fila por estudiante de cada partición: su puesto (DENSE_RANK de
+    mayor a menor), cuántos tienen un valor menor o igual, cuántos un valor mayor o
+    igual y el tamaño de la partición. Los conteos con ORDER BY usan el marco por
+    defecto (RANGE), que incluye a los empatados.
+    """
+    def ventana(expresion, **opciones):
+        return Window(expresion, partition_by=[F(particion)], **opciones)
+
+    return queryset.order_by().values(
+        clasificacion_estudiante=F(estudiante),
+        clasificacion_particion=F(particion),
+        clasificacion_valor=F(valor),
+        puesto=ventana(DenseRank(), order_by=F(valor).desc()),
+        menores_o_iguales=ventana(Count('pk'), order_by=F(valor).asc()),
+        mayores_o_iguales=ventana(Count('pk'), order_by=F(valor).desc()),
+        total=ventana(Count('pk')),
+    )
+
+
+def _guardar(clasificacion, campo):
+    """
+    Inserta las posiciones de `clasificacion` con un único INSERT ... SELECT, sin pasar
+    las filas por Python. El percentil es el porcentaje de la partición con un valor
+    menor o igual y el cuartil sale del porcentaje con un valor mayor o igual
+    (techo de 4 * mayores / total con aritmética entera), así que los empatados
+    comparten percentil y cuartil.
+    """
+    sql, parametros = clasificacion.query.sql_with_params()
+    columnas = ', '.join(
+        connection.ops.quote_name(Posicion._meta.get_field(nombre).column)
+        for nombre in ('estudiante', campo, 'valor', 'puesto', 'percentil', 'cuartil', 'total')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {connection.ops.quote_name(Posicion._meta.db_table)} ({columnas}) '
+            'SELECT clasificacion_estudiante, clasificacion_particion, clasificacion_valor, puesto, '
+            'ROUND(100.0 * menores_o_iguales / total, 2), (4 * mayores_o_iguales + total - 1) / total, total '
+            f'FROM ({sql}) clasificacion',
+            parametros,
+        )
+
+
+def actualizar_cursos(curso_ids):
+    """Recalcula las posiciones de los estudiantes en los cursos indicados según su nota."""
+    curso_ids = list(curso_ids)
+    if not curso_ids:
+        return
+    with transaction.atomic():
+        Posicion.objects.filter(curso_id__in=curso_ids).delete()
+        _guardar(_clasificar(Nota.objects.filter(curso_id__in=curso_ids), 'estudiante_id', 'curso_id', 'nota'), 'curso')
+
+
+def actualizar_grados(grado_ids):
+    """Recalcula las posiciones de los estudiantes con notas en los grados indicados según su promedio."""
+    grado_ids = [pk for pk in grado_ids if pk is not None]
+    if not grado_ids:
+        return
+    estudiantes = Estudiante.objects.filter(grado_id__in=grado_ids, total_notas__gt=0)
+    with transaction.atomic():
+        Posicion.objects.filter(grado_id__in=grado_ids).delete()
+        _guardar(_clasificar(estudiantes, 'pk', 'grado_id', 'promedio'), 'grado')
+
+
+def actualizar_todo():
+    """Reconstruye todas las posiciones."""
+    with transaction.atomic():
+        Posicion.objects.all().delete()
+        actualizar_cursos(Curso.objects.values_list('pk', flat=True))
+        actualizar_grados(Grado.objects.values_list('pk', flat=True))
+
+
+def grados_de_estudiantes(estudiante_ids):
+    """Grados actuales de los estudiantes y grados en que figuran clasificados."""
+    estudiante_ids = list(estudiante_ids)
+    grados = set(Estudiante.objects.filter(pk__in=estudiante_ids).values_list('grado_id', flat=True))
+    grados.update(
+        Posicion.objects.filter(estudiante_id__in=estudiante_ids, grado__isnull=False)
+        .values_list('grado_id', flat=True)
+    )
+    grados.discard(None)
+    return grados
+
+
+def programar_actualizacion(curso_ids=(), grado_ids=()):
+    """
+    Recalcula las particiones indicadas, o las acumula si hay un bloque
+    posiciones_diferidas() activo en este hilo.
+    """
+    pendientes = getattr(_estado, 'pendientes', None)
+    if pendientes is not None:
+        pendientes[0].update(curso_ids)
+        pendientes[1].update(grado_ids)
+        return
+    actualizar_cursos(curso_ids)
+    actualizar_grados(grado_ids)
+
+
+@contextmanager
+def posiciones_diferidas():
+    """
+    Acumula las actualizaciones programadas dentro del bloque y las ejecuta una vez al
+    salir, salvo que la transacción que lo contiene se vaya a revertir.
+    """
+    if getattr(_estado, 'pendientes', None) is not None:
+        yield  # Bloque anidado: el exterior se encarga
+        return
+    _estado.pendientes = pendientes = (set(), set())
+    completado = False
+    try:
+        yield
+        completado = True
+    finally:
+        _estado.pendientes = None
+        # Dentro de una transacción que falló o se marcó para revertirse (por ejemplo, en un
+        # modo de prueba) no se recalcula nada: las posiciones se descartarían con ella y
+        # no admite más consultas. Sin transacción exterior, lo guardado antes de un error
+        # ya está confirmado y sus posiciones sí se recalculan.
+        if not connection.in_atomic_block or (completado and not transaction.get_rollback()):
+            actualizar_cursos(pendientes[0])
+            actualizar_grados(pendientes[1])
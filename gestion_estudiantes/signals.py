@@ -0,0 +1,196 @@
+"""
+Señales del sistema de gestión escolar.
+Mantienen actualizados los valores precalculados cuando cambian los datos.
+
+Las invalidaciones de la caché se ejecutan al confirmarse la transacción en curso
+(de inmediato si no hay una). Si se hicieran antes, una petición concurrente podría
+volver a guardar en la caché los datos anteriores, que aún son los visibles, y
+mantenerlos hasta el siguiente cambio. Los identificadores se obtienen en el
+momento de la señal, porque después los registros pueden ya no existir.
+"""
+
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from .condicional import registrar_cambio
+from .dashboard import invalidar_instantanea
+from .estadisticas import grados_de_cursos, invalidar as invalidar_estadisticas
+from .fragmentos import invalidar_estudiantes
+from .models import Curso, Estudiante, Grado, Nota
+from .rankings import grados_de_estudiantes, programar_actualizacion
+
+# Se envía después de guardar notas en bloque (bulk_create/bulk_update no envían
+# post_save). Argumentos: estudiante_ids y curso_ids afectados.
+notas_actualizadas = Signal()
+
+
+def al_confirmar(funcion, *args):
+    """Ejecuta funcion(*args) al confirmarse la transacción en curso."""
+    transaction.on_commit(partial(funcion, *args))
+
+
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def actualizar_promedio_estudiante(sender, instance, **kwargs):
+    """Recalcula el promedio del estudiante cuando se crea, edita o elimina una nota."""
+    Estudiante.actualizar_promedio(instance.estudiante_id)
+
+
+@receiver(notas_actualizadas)
+def actualizar_promedios_en_bloque(sender, estudiante_ids, **kwargs):
+    """Recalcula los promedios de los estudiantes afectados por un guardado en bloque."""
+    Estudiante.recalcular_promedios(estudiante_ids)
+
+
+@receiver(post_save, sender=Grado)
+@receiver(post_delete, sender=Grado)
+def invalidar_opciones_grado(sender, **kwargs):
+    """Invalida la lista de grados en caché usada por los filtros."""
+    al_confirmar(cache.delete, Grado.CLAVE_CACHE_OPCIONES)
+
+
+@receiver(post_save, sender=Estudiante)
+@receiver(post_delete, sender=Estudiante)
+@receiver(post_save, sender=Grado)
+@receiver(post_delete, sender=Grado)
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+def invalidar_dashboard(sender, **kwargs):
+    """Invalida la instantánea de estadísticas del dashboard."""
+    al_confirmar(invalidar_instantanea)
+
+
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+@receiver(post_save, sender=Estudiante)
+@receiver(post_delete, sender=Estudiante)
+def invalidar_fragmento_estudiante(sender, instance, **kwargs):
+    """Invalida el fragmento del estudiante en la página de su grado."""
+    al_confirmar(invalidar_estudiantes, [instance.estudiante_id if sender is Nota else instance.pk])
+
+
+@receiver(notas_actualizadas)
+def invalidar_fragmentos_en_bloque(sender, estudiante_ids, **kwargs):
+    """Invalida los fragmentos de los estudiantes afectados por un guardado en bloque."""
+    al_confirmar(invalidar_estudiantes, list(estudiante_ids))
+
+
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def invalidar_estadisticas_nota(sender, instance, **kwargs):
+    """Invalida las estadísticas del curso de la nota y de su grado."""
+    if Nota.curso.is_cached(instance):
+        grado_ids = [instance.curso.grado_id]
+    else:
+        grado_ids = grados_de_cursos([instance.curso_id])
+    al_confirmar(invalidar_estadisticas, [instance.curso_id], grado_ids)
+
+
+@receiver(notas_actualizadas)
+def invalidar_estadisticas_en_bloque(sender, curso_ids, **kwargs):
+    """Invalida las estadísticas de los cursos afectados por un guardado en bloque y de sus grados."""
+    curso_ids = list(curso_ids)
+    al_confirmar(invalidar_estadisticas, curso_ids, grados_de_cursos(curso_ids))
+
+
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+def invalidar_estadisticas_curso(sender, instance, **kwargs):
+    """Invalida las estadísticas de un curso que cambió o se eliminó y las de su grado."""
+    # Si el curso cambió de grado, el grado anterior se actualiza al vencer su caché
+    al_confirmar(invalidar_estadisticas, [instance.pk], [instance.grado_id])
+
+
+@receiver(m2m_changed, sender=Estudiante.cursos.through)
+def invalidar_fragmentos_inscripciones(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalida los fragmentos de los estudiantes cuyas inscripciones cambiaron."""
+    if action == 'pre_clear' and reverse:
+        # Se vacían los estudiantes de un curso: hay que obtenerlos antes de que se borren
+        al_confirmar(invalidar_estudiantes, list(instance.estudiantes.values_list('pk', flat=True)))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        al_confirmar(invalidar_estudiantes, list(pk_set) if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Curso)
+@receiver(pre_delete, sender=Curso)
+def invalidar_fragmentos_curso(sender, instance, created=False, **kwargs):
+    """Invalida los fragmentos de los estudiantes inscritos en un curso que cambió o se eliminará."""
+    if not created:
+        al_confirmar(invalidar_estudiantes, list(instance.estudiantes.values_list('pk', flat=True)))
+
+
+@receiver(post_save, sender=Grado)
+@receiver(post_delete, sender=Grado)
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+@receiver(post_save, sender=Estudiante)
+@receiver(post_delete, sender=Estudiante)
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def registrar_cambio_modelo(sender, **kwargs):
+    """Actualiza la marca de cambio del modelo usada por las peticiones GET condicionales."""
+    al_confirmar(registrar_cambio, sender)
+
+
+@receiver(m2m_changed, sender=Estudiante.cursos.through)
+def registrar_cambio_inscripciones(sender, action, **kwargs):
+    """Las inscripciones cuentan como un cambio de Estudiante para las peticiones condicionales."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        al_confirmar(registrar_cambio, Estudiante)
+
+
+@receiver(notas_actualizadas)
+def registrar_cambio_notas_en_bloque(sender, **kwargs):
+    """Las notas guardadas en bloque también cambian los promedios de los estudiantes."""
+    al_confirmar(registrar_cambio, Nota, Estudiante)
+
+
+# Las posiciones se actualizan al final, después de recalcular los promedios
+
+
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def actualizar_posiciones_nota(sender, instance, origin=None, **kwargs):
+    """Recalcula las posiciones del curso de la nota y del grado del estudiante."""
+    if isinstance(origin, (Curso, Grado)):
+        return  # Sus posiciones se eliminan en cascada; el grado se recalcula al final
+    if isinstance(origin, Estudiante):
+        # El grado se recalcula cuando se termine de eliminar el estudiante
+        programar_actualizacion(curso_ids=[instance.curso_id])
+        return
+    programar_actualizacion([instance.curso_id], grados_de_estudiantes([instance.estudiante_id]))
+
+
+@receiver(notas_actualizadas)
+def actualizar_posiciones_en_bloque(sender, estudiante_ids, curso_ids, **kwargs):
+    """Recalcula las posiciones de los cursos y grados afectados por un guardado en bloque."""
+    programar_actualizacion(curso_ids, grados_de_estudiantes(estudiante_ids))
+
+
+@receiver(post_save, sender=Estudiante)
+def actualizar_posiciones_estudiante(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Un estudiante que cambia de grado sale de la clasificación anterior y entra en la nueva.
+    El grado anterior es el que recuerda Estudiante.from_db; los demás guardados no recalculan nada.
+    """
+    if update_fields is not None and not {'grado', 'grado_id'} & set(update_fields):
+        return
+    if created:
+        pass  # Sin notas todavía, no figura en ninguna clasificación
+    elif not hasattr(instance, '_grado_guardado'):
+        # Instancia que no se leyó de la base o sin el grado: se consultan sus grados
+        programar_actualizacion(grado_ids=grados_de_estudiantes([instance.pk]))
+    elif instance._grado_guardado != instance.grado_id:
+        programar_actualizacion(grado_ids=[instance._grado_guardado, instance.grado_id])
+    instance._grado_guardado = instance.grado_id
+
+
+@receiver(post_delete, sender=Estudiante)
+@receiver(post_delete, sender=Curso)
+def actualizar_posiciones_grado(sender, instance, **kwargs):
+    """Recalcula el grado de un estudiante o curso eliminado."""
+    programar_actualizacion(grado_ids=[instance.grado_id])
@@ -0,0 +1,240 @@
+"""
+Tareas en segundo plano sin un broker externo.
+
+Las vistas encolan trabajos pesados (recálculos de todo el colegio, exportaciones
+grandes, matrículas en bloque) como filas de Tarea y responden de inmediato; el
+comando procesar_tareas los ejecuta en un pool de procesos y la página de la tarea
+consulta su estado hasta que termina.
+
+Cada tipo de tarea es una función registrada con @tarea('nombre') que recibe un
+objeto Progreso y los parámetros guardados, y retorna un resultado serializable
+en JSON. Si la función lanza una excepción la tarea se reintenta, con una espera
+que se duplica en cada intento, hasta agotar max_intentos.
+
+Un trabajador reclama una tarea con un UPDATE condicionado a que siga pendiente,
+así que varios trabajadores pueden compartir la misma base de datos. Mientras la
+ejecuta actualiza fecha_actualizacion; las tareas en curso sin actualizar por más
+de TAREAS_TIEMPO_ABANDONO segundos (un trabajador que murió) se reintentan.
+
+Las cachés que invalidan las señales se actualizan en el proceso del trabajador;
+para que la web vea esos cambios la caché debe ser compartida (por ejemplo Redis o
+Memcached), no LocMemCache.
+"""
+
+import csv
+import datetime
+import time
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .boletines import Rendimiento, zip_boletines
+from .exportar import filas_notas
+from .matriculas import matricular_grado
+from .models import Estudiante, Grado, Nota, Posicion, Tarea
+from .rankings import actualizar_todo
+
+TAREAS = {}
+
+
+def tarea(nombre):
+    """Registra una función como tipo de tarea."""
+    def registrar(funcion):
+        TAREAS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def directorio_archivos():
+    """Directorio donde las tareas guardan los archivos que generan."""
+    directorio = Path(settings.TAREAS_DIRECTORIO)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def _intento_en_curso(tarea):
+    """
+    La tarea mientras siga en curso en el mismo intento y a cargo del mismo trabajador. Si
+    se dio por abandonada y se volvió a encolar o a reclamar, el intento anterior ya no
+    debe escribir en ella.
+    """
+    return Tarea.objects.filter(
+        pk=tarea.pk, estado=Tarea.EN_CURSO, trabajador=tarea.trabajador, intentos=tarea.intentos
+    )
+
+
+class Progreso:
+    """
+    Permite a una tarea informar su avance; escribe en la base como máximo una vez por
+    intervalo. Cada escritura también renueva el latido de la tarea.
+    """
+
+    def __init__(self, tarea, intervalo=1.0):
+        self.tarea_id = tarea.pk
+        self.intervalo = intervalo
+        self._consulta = _intento_en_curso(tarea)
+        self._ultima = 0.0
+
+    def __call__(self, porcentaje, mensaje=''):
+        ahora = time.monotonic()
+        if porcentaje < 100 and ahora - self._ultima < self.intervalo:
+            return
+        self._ultima = ahora
+        self._consulta.update(
+            progreso=max(0, min(100, int(porcentaje))), mensaje=mensaje[:200], fecha_actualizacion=timezone.now()
+        )
+
+
+def encolar(tipo, max_intentos=None, **parametros):
+    """Crea una tarea pendiente del tipo indicado y la retorna."""
+    if tipo not in TAREAS:
+        raise ValueError(f'Tipo de tarea desconocido: {tipo}')
+    return Tarea.objects.create(
+        tipo=tipo, parametros=parametros, max_intentos=max_intentos or settings.TAREAS_MAX_INTENTOS
+    )
+
+
+def tarea_sin_terminar(tipo, **parametros):
+    """La última tarea pendiente o en curso del tipo con esos parámetros, o None si no hay."""
+    return (
+        Tarea.objects.filter(tipo=tipo, parametros=parametros, estado__in=[Tarea.PENDIENTE, Tarea.EN_CURSO])
+        .order_by('-pk')
+        .first()
+    )
+
+
+def reclamar(trabajador):
+    """Marca como en curso la próxima tarea disponible y retorna su id, o None si no hay."""
+    ahora = timezone.now()
+    candidatas = (
+        Tarea.objects.filter(estado=Tarea.PENDIENTE, disponible_desde__lte=ahora)
+        .order_by('disponible_desde', 'pk')
+        .values_list('pk', flat=True)[:10]
+    )
+    for pk in candidatas:
+        # Si otro trabajador la tomó primero, el UPDATE no modifica ninguna fila
+        reclamada = Tarea.objects.filter(pk=pk, estado=Tarea.PENDIENTE).update(
+            estado=Tarea.EN_CURSO, trabajador=trabajador, intentos=F('intentos') + 1,
+            progreso=0, mensaje='', fecha_inicio=ahora, fecha_actualizacion=ahora,
+        )
+        if reclamada:
+            return pk
+    return None
+
+
+def registrar_fallo(tarea, error):
+    """
+    Vuelve a encolar la tarea con una espera creciente o la marca como fallida si agotó sus
+    intentos. No hace nada si el intento ya no está en curso. Retorna True si la actualizó.
+    """
+    ahora = timezone.now()
+    if tarea.intentos < tarea.max_intentos:
+        espera = settings.TAREAS_ESPERA_REINTENTO * 2 ** max(0, tarea.intentos - 1)
+        return bool(_intento_en_curso(tarea).update(
+            estado=Tarea.PENDIENTE, error=error, trabajador='',
+            disponible_desde=ahora + datetime.timedelta(seconds=espera), fecha_actualizacion=ahora,
+        ))
+    return bool(_intento_en_curso(tarea).update(
+        estado=Tarea.FALLIDA, error=error, fecha_fin=ahora, fecha_actualizacion=ahora
+    ))
+
+
+def ejecutar(tarea_id):
+    """
+    Ejecuta una tarea ya reclamada. Retorna True si terminó bien y el resultado se
+    registró; si mientras tanto la tarea se dio por abandonada, el resultado se descarta.
+    """
+    tarea = Tarea.objects.get(pk=tarea_id)
+    try:
+        funcion = TAREAS[tarea.tipo]
+        resultado = funcion(Progreso(tarea), **tarea.parametros)
+    except Exception:
+        registrar_fallo(tarea, traceback.format_exc())
+        return False
+    ahora = timezone.now()
+    return bool(_intento_en_curso(tarea).update(
+        estado=Tarea.COMPLETADA, progreso=100, resultado=resultado, error='',
+        fecha_fin=ahora, fecha_actualizacion=ahora,
+    ))
+
+
+def latido(tarea_ids, trabajador):
+    """Marca como activas las tareas que el trabajador sigue ejecutando."""
+    if tarea_ids:
+        Tarea.objects.filter(pk__in=list(tarea_ids), estado=Tarea.EN_CURSO, trabajador=trabajador).update(
+            fecha_actualizacion=timezone.now()
+        )
+
+
+def recuperar_abandonadas():
+    """Reintenta (o da por fallidas) las tareas en curso cuyo trabajador dejó de dar señales."""
+    limite = timezone.now() - datetime.timedelta(seconds=settings.TAREAS_TIEMPO_ABANDONO)
+    abandonadas = list(Tarea.objects.filter(estado=Tarea.EN_CURSO, fecha_actualizacion__lt=limite))
+    for tarea in abandonadas:
+        registrar_fallo(tarea, f'El trabajador {tarea.trabajador} dejó de responder.')
+    return len(abandonadas)
+
+
+def reintentar(queryset):
+    """Vuelve a encolar las tareas terminadas del queryset con sus intentos en cero."""
+    return queryset.exclude(estado=Tarea.EN_CURSO).update(
+        estado=Tarea.PENDIENTE, intentos=0, progreso=0, mensaje='', error='', resultado=None,
+        disponible_desde=timezone.now(), fecha_inicio=None, fecha_fin=None,
+    )
+
+
+# Tipos de tarea
+
+@tarea('recalcular_colegio')
+def recalcular_colegio(progreso, tamaño_lote=1000):
+    """Reconstruye los promedios almacenados de todos los estudiantes y luego todas las posiciones."""
+    ids = list(Estudiante.objects.order_by('pk').values_list('pk', flat=True))
+    for inicio in range(0, len(ids), tamaño_lote):
+        Estudiante.recalcular_promedios(ids[inicio:inicio + tamaño_lote], tamaño_lote=tamaño_lote)
+        procesados = min(inicio + tamaño_lote, len(ids))
+        progreso(90 * procesados / len(ids), f'Promedios: {procesados} de {len(ids)}')
+    progreso(90, 'Recalculando posiciones')
+    actualizar_todo()
+    return {'estudiantes': len(ids), 'posiciones': Posicion.objects.count()}
+
+
+@tarea('matricular_grado')
+def matricular_grado_tarea(progreso, grado_id, solo_activos=False):
+    """Inscribe a los estudiantes de un grado en todos sus cursos."""
+    grado = Grado.objects.get(pk=grado_id)
+    progreso(0, f'Matriculando {grado.nombre}')
+    return matricular_grado(grado, solo_activos=solo_activos)
+
+
+@tarea('exportar_notas')
+def exportar_notas_tarea(progreso):
+    """Escribe todas las notas del colegio en un CSV dentro de TAREAS_DIRECTORIO."""
+    total = Nota.objects.count()
+    nombre = f'notas-colegio-{progreso.tarea_id}.csv'
+    with open(directorio_archivos() / nombre, 'w', newline='', encoding='utf-8-sig') as archivo:
+        escritor = csv.writer(archivo)
+        for filas, fila in enumerate(filas_notas()):
+            escritor.writerow(fila)
+            if filas % 1000 == 0:
+                progreso(100 * filas / max(total, 1), f'{filas} de {total} notas')
+    return {'archivo': nombre, 'filas': total}
+
+
+@tarea('boletines_grado')
+def boletines_grado_tarea(progreso, grado_id):
+    """Escribe el ZIP con los boletines de un grado dentro de TAREAS_DIRECTORIO."""
+    grado = Grado.objects.get(pk=grado_id)
+    total = grado.estudiantes.count()
+    nombre = f'boletines-grado-{grado_id}-{progreso.tarea_id}.zip'
+    rendimiento = Rendimiento()
+    with open(directorio_archivos() / nombre, 'wb') as archivo:
+        for parte in zip_boletines(grado, rendimiento=rendimiento):
+            archivo.write(parte)
+            progreso(100 * rendimiento.boletines / max(total, 1), f'{rendimiento.boletines} de {total} boletines')
+    return {
+        'archivo': nombre, 'boletines': rendimiento.boletines,
+        'boletines_por_segundo': round(rendimiento.por_segundo, 1),
+    }
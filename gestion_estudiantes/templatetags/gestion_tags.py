@@ -4,7 +4,21 @@ register = template.Library()
 
 @register.filter
 def get_nota_estudiante(notas, estudiante):
+    """
+    Busca la nota de un estudiante recorriendo una lista de notas.
+    Se mantiene por compatibilidad; para tablas de notas usar obtener_nota con un IndiceNotas.
+    """
     for nota in notas:
-        if nota.estudiante == estudiante:
+        if nota.estudiante_id == estudiante.pk:
             return nota
-    return None 
\ No newline at end of file
+    return None
+
+@register.simple_tag
+def obtener_nota(indice, estudiante, curso):
+    """
+    Retorna la nota de un estudiante en un curso desde un IndiceNotas, sin consultas.
+    Uso: {% obtener_nota indice_notas estudiante curso as nota %}
+    """
+    if indice is None:
+        return None
+    return indice.obtener(estudiante, curso)
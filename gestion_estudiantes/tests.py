@@ -1,3 +1,1284 @@
-from django.test import TestCase
+import csv
+import datetime
+import re
+import tempfile
+import time
+import zipfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends import locmem
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .boletines import datos_boletines, renderizar_boletines
+from .busqueda import buscar_estudiantes
+from .condicional import registrar_cambio
+from .dashboard import calcular_contadores, obtener_instantanea, obtener_metricas_cache
+from .estadisticas import calcular_estadisticas, estadisticas_curso, estadisticas_grado, np
+from .fragmentos import obtener_versiones
+from .generador import generar_colegio
+from .historial import historial_estudiante, historiales_grado
+from .indices import IndiceNotas
+from .matriculas import matricular_grado
+from .middleware import InstrumentacionSQLMiddleware, forma_consulta
+from .models import Curso, Estudiante, Grado, Nota, Posicion, Tarea
+from .notas import nueva_nota, registrar_nota, registrar_notas
+from .paginacion import codificar_cursor, paginar_por_cursor
+from .rankings import actualizar_todo
+from .tareas import TAREAS, ejecutar, encolar, reclamar, reintentar
+
+
+def crear_grado_con_estudiantes(cantidad_estudiantes, cantidad_cursos=5, nombre='Primero'):
+    """Crea un grado con cursos, estudiantes inscritos en todos los cursos y sus notas."""
+    grado = Grado.objects.create(nombre=nombre, duracion=1)
+    cursos = Curso.objects.bulk_create([
+        Curso(nombre=f'Curso {i}', codigo=f'{nombre[:3]}{i}', creditos=3, grado=grado, año=1 + i % 2)
+        for i in range(cantidad_cursos)
+    ])
+    estudiantes = Estudiante.objects.bulk_create([
+        Estudiante(
+            id_estudiante=f'{nombre[:3]}-{i:05d}', nombre=f'Estudiante {i:05d}',
+            fecha_nacimiento=datetime.date(2012, 1, 1), sexo='M' if i % 2 else 'F',
+            situacion='Activo', grado=grado,
+        )
+        for i in range(cantidad_estudiantes)
+    ])
+    Inscripcion = Estudiante.cursos.through
+    Inscripcion.objects.bulk_create([
+        Inscripcion(estudiante_id=estudiante.pk, curso_id=curso.pk)
+        for estudiante in estudiantes for curso in cursos
+    ])
+    Nota.objects.bulk_create([
+        Nota(
+            estudiante=estudiante, curso=curso, nota=50 + (i + j) % 50,
+            estudiante_nombre=estudiante.nombre, estudiante_id_form=estudiante.id_estudiante,
+            curso_nombre=curso.nombre, curso_codigo=curso.codigo,
+        )
+        for i, estudiante in enumerate(estudiantes)
+        for j, curso in enumerate(cursos[:-1])  # El último curso queda sin notas
+    ])
+    Estudiante.recalcular_promedios()
+    return grado
+
+
+class GradoDetailViewTests(TestCase):
+    """Pruebas de la vista de detalle de un grado."""
+
+    def setUp(self):
+        cache.clear()
+
+    def contar_consultas(self, grado):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('grado-detail', kwargs={'pk': grado.pk}))
+        self.assertEqual(respuesta.status_code, 200)
+        return len(consultas)
+
+    def test_matriz_de_notas(self):
+        grado = crear_grado_con_estudiantes(3, cantidad_cursos=2)
+        respuesta = self.client.get(reverse('grado-detail', kwargs={'pk': grado.pk}))
+        matriz = respuesta.context['matriz']
+        self.assertEqual(len(matriz), 3)
+        for fila in matriz:
+            self.assertEqual(len(fila['cursos']), 2)
+            self.assertIsNotNone(fila['cursos'][0]['nota'])
+            self.assertIsNone(fila['cursos'][1]['nota'])
+
+    def test_consultas_constantes_segun_cantidad_de_estudiantes(self):
+        pequeño = crear_grado_con_estudiantes(10, nombre='Pequeño')
+        grande = crear_grado_con_estudiantes(1000, nombre='Grande')
+        self.assertEqual(self.contar_consultas(pequeño), self.contar_consultas(grande))
+
+    def test_fragmentos_en_cache_por_estudiante(self):
+        grado = crear_grado_con_estudiantes(3, cantidad_cursos=2)
+        url = reverse('grado-detail', kwargs={'pk': grado.pk})
+        self.client.get(url)
+        respuesta = self.client.get(url)
+        self.assertTrue(all(fila['html'] for fila in respuesta.context['matriz']))
+
+        # Solo se reconstruye la fila del estudiante cuya nota cambió
+        nota = Nota.objects.filter(estudiante__grado=grado).first()
+        nota.nota = 12.5
+        with self.captureOnCommitCallbacks(execute=True):
+            nota.save()
+        respuesta = self.client.get(url)
+        reconstruidas = [fila['estudiante'].pk for fila in respuesta.context['matriz'] if not fila['html']]
+        self.assertEqual(reconstruidas, [nota.estudiante_id])
+        self.assertContains(respuesta, '12,50')  # Formato local (es)
+
+        # Inscribir en un curso también invalida la fila
+        otro = Estudiante.objects.filter(grado=grado).exclude(pk=nota.estudiante_id).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            otro.cursos.remove(otro.cursos.first())
+        respuesta = self.client.get(url)
+        reconstruidas = [fila['estudiante'].pk for fila in respuesta.context['matriz'] if not fila['html']]
+        self.assertEqual(reconstruidas, [otro.pk])
+
+    def test_fragmentos_de_otro_proceso_expiran(self):
+        """Un cambio atendido por otro proceso no invalida la caché local, pero sus fragmentos expiran."""
+        grado = crear_grado_con_estudiantes(2, cantidad_cursos=2)
+        url = reverse('grado-detail', kwargs={'pk': grado.pk})
+        self.client.get(url)
+        Nota.objects.filter(estudiante__grado=grado).update(nota=12.5)  # Sin invalidar esta caché
+
+        self.assertNotContains(self.client.get(url), '12,50')
+        despues = time.time() + 2 * 60  # Con la caché local, la fila vieja no dura más que esto
+        with mock.patch.object(locmem, 'time', SimpleNamespace(time=lambda: despues)):
+            respuesta = self.client.get(url)
+        self.assertTrue(all(not fila['html'] for fila in respuesta.context['matriz']))
+        self.assertContains(respuesta, '12,50')
+
+
+class RegistroNotasTests(TestCase):
+    """Pruebas del upsert de notas y de las vistas que lo usan."""
+
+    def setUp(self):
+        cache.clear()
+        self.grado = crear_grado_con_estudiantes(3, cantidad_cursos=2)
+        self.estudiante = self.grado.estudiantes.order_by('pk').first()
+        self.curso, self.curso_sin_notas = self.grado.cursos.order_by('pk')
+
+    def test_registrar_nota_crea_y_luego_actualiza(self):
+        self.assertTrue(registrar_nota(self.estudiante, self.curso_sin_notas, Decimal('80')))
+        self.assertFalse(registrar_nota(self.estudiante, self.curso_sin_notas, Decimal('90'), 'Recuperación'))
+        nota = Nota.objects.get(estudiante=self.estudiante, curso=self.curso_sin_notas)
+        self.assertEqual((nota.nota, nota.observaciones), (Decimal('90'), 'Recuperación'))
+        self.estudiante.refresh_from_db()
+        self.assertEqual(self.estudiante.total_notas, 2)
+
+    def test_registrar_notas_informa_creadas_y_actualizadas(self):
+        notas = [nueva_nota(estudiante, self.curso_sin_notas, 70) for estudiante in self.grado.estudiantes.all()]
+        notas.append(nueva_nota(self.estudiante, self.curso, 100))
+        self.assertEqual(registrar_notas(notas), (3, 1))
+        self.assertEqual(Nota.objects.filter(estudiante=self.estudiante).count(), 2)
+
+    def test_formulario_reemplaza_la_nota_existente(self):
+        url = reverse('nota-create', kwargs={'estudiante_pk': self.estudiante.pk, 'curso_pk': self.curso.pk})
+        respuesta = self.client.post(url, {'nota': '65.50', 'observaciones': ''}, follow=True)
+        self.assertContains(respuesta, 'Nota actualizada exitosamente.')
+        self.assertEqual(
+            Nota.objects.get(estudiante=self.estudiante, curso=self.curso).nota, Decimal('65.50')
+        )
+
+    def test_planilla_con_errores_empareja_filas_por_estudiante(self):
+        inscritos = list(self.curso.estudiantes.order_by('nombre', 'id'))
+        ajeno = crear_grado_con_estudiantes(1, nombre='Segundo').estudiantes.get()
+        enviados = [*reversed(inscritos[1:]), ajeno]  # En otro orden, sin el primero y con uno no inscrito
+        datos = {'form-TOTAL_FORMS': len(enviados), 'form-INITIAL_FORMS': len(enviados)}
+        for i, estudiante in enumerate(enviados):
+            datos.update({f'form-{i}-estudiante_id': estudiante.pk, f'form-{i}-nota': '150', f'form-{i}-observaciones': ''})
+
+        respuesta = self.client.post(reverse('curso-notas', kwargs={'pk': self.curso.pk}), datos)
+        self.assertEqual(respuesta.status_code, 200)
+        filas = respuesta.context['filas']
+        self.assertEqual([estudiante for estudiante, _ in filas], [*reversed(inscritos[1:]), None])
+        self.assertTrue(all(fila.errors for _, fila in filas))
+
+    def preparar_planilla(self, cantidad, nombre):
+        """URL de la planilla del curso sin notas de un grado nuevo y un envío con una nota por inscrito."""
+        curso = crear_grado_con_estudiantes(cantidad, cantidad_cursos=2, nombre=nombre).cursos.order_by('pk').last()
+        ids = list(curso.estudiantes.values_list('pk', flat=True))
+        datos = {'form-TOTAL_FORMS': len(ids), 'form-INITIAL_FORMS': len(ids)}
+        for i, pk in enumerate(ids):
+            datos.update({f'form-{i}-estudiante_id': pk, f'form-{i}-nota': '70', f'form-{i}-observaciones': ''})
+        return reverse('curso-notas', kwargs={'pk': curso.pk}), datos
+
+    def test_planilla_con_consultas_constantes(self):
+        url, datos = self.preparar_planilla(3, 'Cuarto')
+        with CaptureQueriesContext(connection) as carga:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as guardado, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, datos)
+
+        url, datos = self.preparar_planilla(40, 'Quinto')
+        with self.assertNumQueries(len(carga)):
+            self.assertContains(self.client.get(url), 'form-39-nota')
+        with self.assertNumQueries(len(guardado)), self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(url, datos)
+        self.assertRedirects(respuesta, url)
+        self.assertEqual(Nota.objects.filter(curso__codigo='Qui1', nota=70).count(), 40)
+
+    def test_restriccion_unica_en_la_base(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Nota.objects.create(estudiante=self.estudiante, curso=self.curso, nota=10)
+
+
+class IndiceNotasTests(TestCase):
+    """Pruebas del índice de notas en memoria y de la etiqueta obtener_nota."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = crear_grado_con_estudiantes(2, cantidad_cursos=3)
+        cls.estudiante, cls.otro = cls.grado.estudiantes.order_by('pk')
+        cls.curso, _, cls.curso_sin_notas = cls.grado.cursos.order_by('pk')
+
+    def test_busquedas_sin_consultas(self):
+        with self.assertNumQueries(1):
+            indice = IndiceNotas.para_grado(self.grado)
+        with self.assertNumQueries(0):
+            nota = indice.obtener(self.estudiante, self.curso)
+            self.assertEqual((nota.estudiante_id, nota.curso_id, nota.nota), (self.estudiante.pk, self.curso.pk, 50))
+            self.assertIs(indice.obtener(self.estudiante.pk, self.curso.pk), nota)  # También con ids
+            self.assertIsNone(indice.obtener(self.estudiante, self.curso_sin_notas))
+            self.assertIn((self.otro.pk, self.curso.pk), indice)
+            self.assertNotIn((self.otro.pk, self.curso_sin_notas.pk), indice)
+        self.assertEqual(len(indice), 4)
+        self.assertEqual(len(IndiceNotas.para_estudiante(self.estudiante)), 2)
+        self.assertEqual(len(IndiceNotas.para_curso(self.curso_sin_notas)), 0)
+
+    def test_etiqueta_obtener_nota(self):
+        plantilla = Template(
+            '{% load gestion_tags %}{% obtener_nota indice estudiante curso as nota %}'
+            '{% if nota %}{{ nota.nota }}{% else %}-{% endif %}'
+        )
+        indice = IndiceNotas.para_grado(self.grado)
+        with self.assertNumQueries(0):
+            for estudiante, curso, esperado in (
+                (self.otro, self.curso, '51,00'),
+                (self.otro, self.curso_sin_notas, '-'),
+                (self.otro.pk, self.curso.pk, '51,00'),
+            ):
+                contexto = Context({'indice': indice, 'estudiante': estudiante, 'curso': curso})
+                self.assertEqual(plantilla.render(contexto), esperado)
+            self.assertEqual(plantilla.render(Context({'indice': None, 'estudiante': self.otro, 'curso': self.curso})), '-')
+
+
+class PromediosTests(TestCase):
+    """Pruebas del promedio y la cantidad de notas almacenados en cada estudiante."""
+
+    def setUp(self):
+        self.grado = crear_grado_con_estudiantes(2, cantidad_cursos=3)
+        self.estudiante = self.grado.estudiantes.order_by('pk').first()
+        self.curso_sin_notas = self.grado.cursos.order_by('pk').last()
+
+    def almacenados(self):
+        self.estudiante.refresh_from_db()
+        return self.estudiante.promedio, self.estudiante.total_notas
+
+    def test_crear_editar_y_eliminar_una_nota(self):
+        self.assertEqual(self.almacenados(), (Decimal('50.50'), 2))  # Notas 50 y 51
+        nota = Nota.objects.create(estudiante=self.estudiante, curso=self.curso_sin_notas, nota=80)
+        self.assertEqual(self.almacenados(), (Decimal('60.33'), 3))
+        nota.nota = 20
+        nota.save()
+        self.assertEqual(self.almacenados(), (Decimal('40.33'), 3))
+        Nota.objects.filter(estudiante=self.estudiante).exclude(pk=nota.pk).delete()
+        self.assertEqual(self.almacenados(), (Decimal('20.00'), 1))
+        nota.delete()
+        self.assertEqual(self.almacenados(), (Decimal('0.00'), 0))
+
+    def test_comando_recalcular_promedios(self):
+        Estudiante.objects.update(promedio=0, total_notas=0)
+        salida = StringIO()
+        call_command('recalcular_promedios', lote=1, stdout=salida)
+        self.assertIn('Promedios recalculados para 2 estudiantes', salida.getvalue())
+        self.assertEqual(
+            list(Estudiante.objects.order_by('pk').values_list('promedio', 'total_notas')),
+            [(Decimal('50.50'), 2), (Decimal('51.50'), 2)],
+        )
+
+
+class PosicionesTests(TestCase):
+    """Pruebas de las posiciones por curso y por grado."""
+
+    def setUp(self):
+        cache.clear()
+        self.grado = crear_grado_con_estudiantes(4, cantidad_cursos=2)
+        self.curso = self.grado.cursos.order_by('pk').first()
+        self.estudiantes = list(self.grado.estudiantes.order_by('pk'))
+        for estudiante, valor in zip(self.estudiantes, (90, 80, 80, 60)):
+            registrar_nota(estudiante, self.curso, valor)
+
+    def posiciones(self, **filtros):
+        return list(
+            Posicion.objects.filter(**filtros).order_by('estudiante_id')
+            .values_list('puesto', 'percentil', 'cuartil', 'total')
+        )
+
+    def test_puesto_percentil_y_cuartil_con_empates(self):
+        self.assertEqual(self.posiciones(curso=self.curso), [
+            (1, Decimal('100.00'), 1, 4),
+            (2, Decimal('75.00'), 3, 4),
+            (2, Decimal('75.00'), 3, 4),
+            (3, Decimal('25.00'), 4, 4),
+        ])
+        self.assertEqual(len(self.posiciones(grado=self.grado)), 4)
+
+    def test_se_actualizan_al_cambiar_una_nota(self):
+        registrar_nota(self.estudiantes[3], self.curso, 95)
+        self.assertEqual(self.posiciones(curso=self.curso, estudiante=self.estudiantes[3]), [
+            (1, Decimal('100.00'), 1, 4)
+        ])
+        Nota.objects.get(estudiante=self.estudiantes[0], curso=self.curso).delete()
+        self.assertEqual(self.posiciones(curso=self.curso)[0][3], 3)
+        mejor_del_grado = max(self.estudiantes, key=lambda e: Estudiante.objects.get(pk=e.pk).promedio)
+        self.assertEqual(self.posiciones(grado=self.grado, estudiante=mejor_del_grado)[0][0], 1)
+
+    def test_solo_se_recalcula_el_grado_si_cambia(self):
+        estudiante = Estudiante.objects.get(pk=self.estudiantes[0].pk)
+        estudiante.nombre = 'Ana'
+        with self.assertNumQueries(1):  # Solo el UPDATE
+            estudiante.save()
+
+        otro = Grado.objects.create(nombre='Segundo', duracion=1)
+        estudiante.grado = otro
+        estudiante.save()
+        self.assertEqual([total for *_, total in self.posiciones(grado=self.grado)], [3, 3, 3])
+        self.assertEqual([(puesto, total) for puesto, _, _, total in self.posiciones(grado=otro)], [(1, 1)])
+
+        # Con el grado diferido no se conoce el anterior: se consultan sus clasificaciones
+        diferido = Estudiante.objects.defer('grado').get(pk=estudiante.pk)
+        diferido.grado = self.grado
+        diferido.save()
+        self.assertEqual(len(self.posiciones(grado=self.grado)), 4)
+        self.assertEqual(self.posiciones(grado=otro), [])
+
+    def test_detalle_del_estudiante(self):
+        url = reverse('estudiante-detail', kwargs={'pk': self.estudiantes[1].pk})
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertContains(respuesta, '2 de 4')
+        self.assertContains(respuesta, 'Puesto en el Grado')
+        self.assertEqual(sum('gestion_estudiantes_posicion' in q['sql'] for q in consultas), 1)
+
+
+class ImportarCSVTests(TestCase):
+    """Pruebas del comando importar_csv."""
+
+    def setUp(self):
+        self.grado = crear_grado_con_estudiantes(2, cantidad_cursos=2)
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+
+    def archivo(self, nombre, contenido):
+        ruta = f'{self.directorio.name}/{nombre}'
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        return ruta
+
+    def importar(self, **archivos):
+        salida, errores = StringIO(), StringIO()
+        call_command('importar_csv', stdout=salida, stderr=errores, **archivos)
+        return salida.getvalue(), errores.getvalue()
+
+    def test_modo_de_prueba_no_guarda_nada(self):
+        notas = self.archivo('notas.csv', 'id_estudiante,curso_codigo,nota,observaciones\nPri-00000,Pri1,75,\n')
+        posiciones = Posicion.objects.count()
+        salida, _ = self.importar(notas=notas, dry_run=True)
+        self.assertIn('Modo de prueba', salida)
+        self.assertFalse(Nota.objects.filter(curso__codigo='Pri1').exists())
+        self.assertEqual(Posicion.objects.count(), posiciones)
+
+    def test_upsert_por_lotes(self):
+        # El último curso (Pri1) no tiene notas; Pri-00000 ya tiene nota en Pri0
+        notas = self.archivo('notas.csv', (
+            'id_estudiante,curso_codigo,nota,observaciones\n'
+            'Pri-00000,Pri0,88,Corregida\nPri-00000,Pri1,70,\nPri-00001,Pri1,65.5,\n'
+        ))
+        salida, _ = self.importar(notas=notas, lote=2)
+        self.assertIn('3 filas', salida)
+        self.assertIn('2 creados, 1 actualizados, 0 con errores', salida)
+        nota = Nota.objects.get(estudiante__id_estudiante='Pri-00000', curso__codigo='Pri0')
+        self.assertEqual((nota.nota, nota.observaciones), (Decimal('88.00'), 'Corregida'))
+        self.assertEqual(Posicion.objects.filter(curso__codigo='Pri1').count(), 2)
+
+        salida, _ = self.importar(notas=notas)
+        self.assertIn('0 creados, 3 actualizados', salida)
+
+    def test_cursos_actualizados_invalidan_filas_y_estadisticas(self):
+        curso = self.grado.cursos.get(codigo='Pri0')
+        estadisticas_curso(curso)
+        estadisticas_grado(self.grado)
+        versiones = obtener_versiones(list(self.grado.estudiantes.values_list('pk', flat=True)))
+        cursos = self.archivo('cursos.csv', 'codigo,nombre,creditos,año,grado\nPri0,Álgebra,4,1,\n')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.importar(cursos=cursos)
+        nuevas = obtener_versiones(list(versiones))
+        self.assertTrue(all(nuevas[pk] != version for pk, version in versiones.items()))
+        self.assertEqual(estadisticas_grado(self.grado).cantidad, 0)  # El curso ya no es del grado
+        self.assertEqual(estadisticas_curso(curso).cantidad, 2)
+
+    def test_estudiante_cambia_de_grado(self):
+        segundo = crear_grado_con_estudiantes(1, cantidad_cursos=2, nombre='Segundo')
+        estudiantes = self.archivo('estudiantes.csv', (
+            'id_estudiante,nombre,fecha_nacimiento,sexo,situacion,grado\n'
+            'Pri-00000,Estudiante 00000,2012-01-01,F,Activo,Segundo\n'
+        ))
+        salida, _ = self.importar(estudiantes=estudiantes)
+        self.assertIn('0 creados, 1 actualizados', salida)
+        # Se clasifican de nuevo el grado que deja y el grado al que entra
+        clasificados = Posicion.objects.filter(grado__isnull=False).values_list('grado__nombre', 'estudiante__id_estudiante', 'total')
+        self.assertEqual(sorted(clasificados), [
+            ('Primero', 'Pri-00001', 1), ('Segundo', 'Pri-00000', 2), ('Segundo', 'Seg-00000', 2),
+        ])
+        self.assertEqual(segundo.estudiantes.count(), 2)
+
+    def test_errores_de_fila(self):
+        notas = self.archivo('notas.csv', (
+            'id_estudiante,curso_codigo,nota,observaciones\n'
+            'Pri-00000,Pri1,NaN,\nPri-00001,Pri1,Infinity,\nPri-00001,Pri1,101,\n'
+            'X-1,Pri1,50,\nPri-00001,XX,50,\nPri-00001,Pri1,diez,\nPri-00001,Pri1,80,\n'
+        ))
+        salida, errores = self.importar(notas=notas)
+        self.assertIn('1 creados, 0 actualizados, 6 con errores', salida)
+        self.assertIn('notas.csv:2: la nota debe estar entre 0 y 100', errores)
+        self.assertIn('notas.csv:5: estudiante desconocido "X-1"', errores)
+        self.assertEqual(list(Nota.objects.filter(curso__codigo='Pri1').values_list('nota', flat=True)), [Decimal('80.00')])
+
+
+class MatriculasTests(TestCase):
+    """Pruebas de la matrícula en bloque y del comando matricular."""
+
+    def setUp(self):
+        self.grado = crear_grado_con_estudiantes(3, cantidad_cursos=2)
+        self.Inscripcion = Estudiante.cursos.through
+        self.Inscripcion.objects.all().delete()
+        self.grado.estudiantes.filter(id_estudiante='Pri-00002').update(situacion='Inactivo')
+
+    def matricular(self, *args, **opciones):
+        salida = StringIO()
+        call_command('matricular', *args, stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_matricular_grado(self):
+        self.assertEqual(
+            matricular_grado(self.grado, solo_activos=True, tamaño_lote=3), {'insertadas': 4, 'existentes': 0}
+        )
+        self.assertEqual(matricular_grado(self.grado, tamaño_lote=3), {'insertadas': 2, 'existentes': 4})
+        self.assertEqual(matricular_grado(self.grado), {'insertadas': 0, 'existentes': 6})  # Repetirla no inserta nada
+        self.assertEqual(self.Inscripcion.objects.count(), 6)
+
+    def test_comando_matricular(self):
+        salida = self.matricular(grado='Primero', cursos=['Pri0'], solo_activos=True)
+        self.assertIn('Inscripciones insertadas: 2. Ya existentes: 0.', salida)
+        salida = self.matricular(grado=str(self.grado.pk))
+        self.assertIn('Inscripciones insertadas: 4. Ya existentes: 2.', salida)
+        salida = self.matricular(estudiantes=['Pri-00000'], cursos=['Pri0', 'Pri1'])
+        self.assertIn('Inscripciones insertadas: 0. Ya existentes: 2.', salida)
+
+        for opciones, mensaje in (
+            ({}, 'Indique --grado o --estudiantes'),
+            ({'grado': 'Primero', 'estudiantes': ['Pri-00000']}, 'Indique --grado o --estudiantes'),
+            ({'grado': 'Quinto'}, 'Grado desconocido: Quinto'),
+            ({'grado': 'Primero', 'cursos': ['Pri0', 'XX']}, 'Cursos desconocidos: XX'),
+            ({'estudiantes': ['Pri-00000']}, 'Indique los cursos con --cursos'),
+            ({'estudiantes': ['Pri-00000', 'X-1'], 'cursos': ['Pri0']}, 'Estudiantes desconocidos: X-1'),
+        ):
+            with self.subTest(opciones=opciones), self.assertRaisesMessage(CommandError, mensaje):
+                self.matricular(**opciones)
+        self.assertEqual(self.Inscripcion.objects.count(), 6)
+
+
+class ExportarTests(TestCase):
+    """Pruebas de los reportes de notas."""
+
+    def setUp(self):
+        self.grado = crear_grado_con_estudiantes(3, cantidad_cursos=2)
+
+    def filas(self, url):
+        respuesta = self.client.get(url)
+        return list(csv.reader(b''.join(respuesta.streaming_content).decode('utf-8-sig').splitlines()))
+
+    def test_matriz_con_nombres_actuales_y_estudiantes_sin_notas(self):
+        estudiante = self.grado.estudiantes.get(id_estudiante='Pri-00001')
+        curso = self.grado.cursos.get(codigo='Pri1')
+        registrar_nota(estudiante, curso, 90)
+        estudiante.nombre = 'Zoe'
+        estudiante.save()  # Las notas anteriores conservan el nombre viejo
+        Nota.objects.filter(estudiante__id_estudiante='Pri-00002').update(nota=0)
+        Estudiante.objects.create(
+            id_estudiante='Pri-00009', nombre='Ana', fecha_nacimiento=datetime.date(2012, 1, 1),
+            sexo='F', grado=self.grado,
+        )
+
+        filas = self.filas(reverse('grado-exportar', kwargs={'pk': self.grado.pk}))
+        self.assertEqual(filas[0], ['ID Estudiante', 'Estudiante', 'Pri0', 'Pri1', 'Promedio ponderado'])
+        self.assertEqual([fila[:2] for fila in filas[1:]], [
+            ['Pri-00009', 'Ana'], ['Pri-00000', 'Estudiante 00000'],
+            ['Pri-00002', 'Estudiante 00002'], ['Pri-00001', 'Zoe'],
+        ])
+        self.assertEqual(filas[1][2:4], ['', ''])
+        self.assertEqual(filas[4][2:4], ['51.00', '90.00'])
+        self.assertEqual([fila[-1] for fila in filas[1:4]], ['', '50.00', '0.00'])  # Sin notas, 50 y 0
+
+        filas = self.filas(reverse('curso-exportar', kwargs={'pk': curso.pk}))
+        self.assertEqual([fila[:3] for fila in filas[1:]], [['Pri-00001', 'Zoe', '90.00']])
+
+
+class HistorialTests(TestCase):
+    """Pruebas de los promedios ponderados por créditos."""
+
+    def setUp(self):
+        self.grado = Grado.objects.create(nombre='Primero', duracion=2)
+        self.estudiante = Estudiante.objects.create(
+            id_estudiante='H-1', nombre='Ana', fecha_nacimiento=datetime.date(2012, 1, 1),
+            sexo='F', situacion='Activo', grado=self.grado,
+        )
+        for codigo, creditos, año, valor in (('A', 4, 1, 90), ('B', 1, 1, 40), ('C', 2, 2, 75)):
+            curso = Curso.objects.create(nombre=codigo, codigo=codigo, creditos=creditos, año=año, grado=self.grado)
+            registrar_nota(self.estudiante, curso, valor)
+
+    def test_promedios_por_año_y_general(self):
+        historial = historial_estudiante(self.estudiante)
+        self.assertEqual(historial.por_año[1].promedio, Decimal('80.00'))  # (90*4 + 40*1) / 5
+        self.assertEqual(historial.por_año[2].promedio, Decimal('75.00'))
+        self.assertEqual(historial.promedio, Decimal('78.57'))  # 550 / 7
+        self.assertEqual((historial.general.creditos, historial.general.cursos), (7, 3))
+        self.assertContains(
+            self.client.get(reverse('estudiante-detail', kwargs={'pk': self.estudiante.pk})), '78,57'
+        )
+
+    def test_cursos_sin_creditos_y_promedio_cero(self):
+        for codigo, valor in (('D', 60), ('E', 71)):
+            curso = Curso.objects.create(nombre=codigo, codigo=codigo, creditos=0, año=3, grado=self.grado)
+            registrar_nota(self.estudiante, curso, valor)
+        historial = historial_estudiante(self.estudiante)
+        self.assertEqual(historial.por_año[3].promedio, Decimal('65.50'))  # Promedio simple
+        self.assertEqual(historial.promedio, Decimal('78.57'))  # Los cursos sin créditos no pesan
+
+        otro = Estudiante.objects.create(
+            id_estudiante='H-2', nombre='Luis', fecha_nacimiento=datetime.date(2012, 1, 1),
+            sexo='M', situacion='Activo', grado=self.grado,
+        )
+        registrar_nota(otro, Curso.objects.get(codigo='A'), 0)
+        respuesta = self.client.get(reverse('estudiante-detail', kwargs={'pk': otro.pk}))
+        self.assertEqual(historial_estudiante(otro).promedio, Decimal('0.00'))
+        self.assertContains(respuesta, 'Promedio Ponderado por Créditos:</strong> 0,00')
+        self.assertNotContains(respuesta, 'Sin notas')
+
+    def test_grado_en_una_consulta(self):
+        crear_grado_con_estudiantes(5, cantidad_cursos=3, nombre='Segundo')
+        otro = Grado.objects.get(nombre='Segundo')
+        with self.assertNumQueries(1):
+            resultado = historiales_grado(otro)
+        self.assertEqual(len(resultado), 5)
+        self.assertNotIn(self.estudiante.pk, resultado)
+
+
+@override_settings(TAREAS_ESPERA_REINTENTO=0)
+class TareasTests(TestCase):
+    """Pruebas de las tareas en segundo plano, ejecutadas con el trabajador en el mismo proceso."""
+
+    def setUp(self):
+        self.grado = crear_grado_con_estudiantes(3, cantidad_cursos=2)
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+
+    def procesar(self):
+        call_command('procesar_tareas', procesos=0, una_vez=True, stdout=StringIO(), stderr=StringIO())
+
+    def test_encolar_desde_la_web_y_consultar_el_estado(self):
+        with override_settings(TAREAS_DIRECTORIO=self.directorio.name):
+            respuesta = self.client.post(reverse('notas-exportar-tarea'))
+            tarea = Tarea.objects.get()
+            self.assertRedirects(respuesta, reverse('tarea-detail', kwargs={'pk': tarea.pk}))
+            self.assertEqual(self.client.get(reverse('tarea-estado', kwargs={'pk': tarea.pk})).json()['estado'], 'pendiente')
+
+            self.procesar()
+            estado = self.client.get(reverse('tarea-estado', kwargs={'pk': tarea.pk})).json()
+            self.assertEqual((estado['estado'], estado['progreso']), ('completada', 100))
+            self.assertEqual(estado['resultado']['filas'], Nota.objects.count())
+            descarga = self.client.get(reverse('tarea-descargar', kwargs={'pk': tarea.pk}))
+            self.assertEqual(len(b''.join(descarga.streaming_content).splitlines()), Nota.objects.count() + 1)
+
+    def test_reintentos_hasta_fallar(self):
+        tarea = encolar('matricular_grado', grado_id=0, max_intentos=2)
+        self.procesar()
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.FALLIDA, 2))
+        self.assertIn('DoesNotExist', tarea.error)
+
+        reintentar(Tarea.objects.filter(pk=tarea.pk))
+        Tarea.objects.filter(pk=tarea.pk).update(parametros={'grado_id': self.grado.pk})
+        self.procesar()
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.COMPLETADA)
+        self.assertEqual(tarea.resultado['existentes'], 6)
+
+    @override_settings(TAREAS_TIEMPO_ABANDONO=60)
+    def test_recupera_tareas_abandonadas(self):
+        tarea = encolar('recalcular_colegio')
+        reclamar('trabajador-caido')
+        Tarea.objects.filter(pk=tarea.pk).update(
+            fecha_actualizacion=timezone.now() - datetime.timedelta(minutes=5)
+        )
+        self.procesar()
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.COMPLETADA, 2))
+
+    def test_intento_reemplazado_no_registra_su_resultado(self):
+        def tomada_por_otro(progreso):
+            # Mientras se ejecuta, otro trabajador la da por abandonada y la vuelve a reclamar
+            Tarea.objects.filter(pk=progreso.tarea_id).update(estado=Tarea.PENDIENTE, trabajador='')
+            reclamar('otro-trabajador')
+            progreso(50, 'Sin efecto')
+            return {'de': 'intento anterior'}
+
+        with mock.patch.dict(TAREAS, tomada_por_otro=tomada_por_otro):
+            tarea = encolar('tomada_por_otro')
+            reclamar('trabajador-lento')
+            self.assertFalse(ejecutar(tarea.pk))
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.trabajador, tarea.intentos), (Tarea.EN_CURSO, 'otro-trabajador', 2))
+        self.assertEqual((tarea.progreso, tarea.resultado), (0, None))
+
+
+class BoletinesTests(TestCase):
+    """Pruebas de los boletines por grado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = crear_grado_con_estudiantes(4, cantidad_cursos=3)
+        actualizar_todo()
+
+    def test_datos_con_consultas_fijas(self):
+        with self.assertNumQueries(5):
+            contextos = datos_boletines(self.grado)
+        crear_grado_con_estudiantes(2, cantidad_cursos=2, nombre='Segundo')
+        Nota.objects.filter(estudiante__grado=self.grado).first().delete()
+        with self.assertNumQueries(5):
+            contextos = datos_boletines(self.grado)
+
+        self.assertEqual([c['estudiante']['nombre'] for c in contextos], [f'Estudiante {i:05d}' for i in range(4)])
+        self.assertEqual(len(contextos[1]['cursos']), 3)
+        self.assertEqual(contextos[1]['posicion_grado']['total'], 4)
+        self.assertEqual([c['nota'] is None for c in contextos[1]['cursos']], [False, True, False])  # Curso 2 sin notas
+        self.assertEqual(contextos[1]['cursos'][0]['posicion']['total'], 4)
+        self.assertEqual(contextos[1]['historial'].general.cursos, 2)
+
+    def test_descarga_zip(self):
+        respuesta = self.client.get(reverse('grado-boletines', kwargs={'pk': self.grado.pk}))
+        self.assertEqual(respuesta['Content-Type'], 'application/zip')
+        with self.assertLogs('gestion_estudiantes.boletines') as registro:
+            contenido = b''.join(respuesta.streaming_content)
+        self.assertIn('Boletines de Primero: 4 en', registro.output[0])
+        with zipfile.ZipFile(BytesIO(contenido)) as archivo_zip:
+            nombres = archivo_zip.namelist()
+            self.assertEqual(len(nombres), 5)
+            self.assertEqual(nombres[-1], 'informe.txt')
+            self.assertIn('Boletines: 4', archivo_zip.read('informe.txt').decode())
+            boletin = archivo_zip.read('boletin-pri-00000-estudiante-00000.html').decode()
+        self.assertIn('Estudiante 00000', boletin)
+        self.assertIn('Puesto en el grado', boletin)
+
+    @override_settings(BOLETINES_MAXIMO_EN_LINEA=3)
+    def test_grado_grande_se_genera_en_segundo_plano(self):
+        url = reverse('grado-boletines', kwargs={'pk': self.grado.pk})
+        respuesta = self.client.get(url)  # Un GET solo pide confirmación
+        self.assertContains(respuesta, reverse('grado-boletines-tarea', kwargs={'pk': self.grado.pk}))
+        self.assertFalse(Tarea.objects.exists())
+
+        respuesta = self.client.post(reverse('grado-boletines-tarea', kwargs={'pk': self.grado.pk}))
+        tarea = Tarea.objects.get()
+        self.assertRedirects(respuesta, reverse('tarea-detail', kwargs={'pk': tarea.pk}))
+        self.assertEqual((tarea.tipo, tarea.parametros), ('boletines_grado', {'grado_id': self.grado.pk}))
+
+        # Mientras la tarea no termine, los GET y POST siguientes la reutilizan
+        self.assertRedirects(self.client.get(url), reverse('tarea-detail', kwargs={'pk': tarea.pk}))
+        self.client.post(reverse('grado-boletines-tarea', kwargs={'pk': self.grado.pk}))
+        self.assertEqual(Tarea.objects.count(), 1)
+        Tarea.objects.update(estado=Tarea.COMPLETADA)
+        self.client.post(reverse('grado-boletines-tarea', kwargs={'pk': self.grado.pk}))
+        self.assertEqual(Tarea.objects.count(), 2)
+
+    @override_settings(BOLETINES_MINIMO_PARALELO=1)
+    def test_pool_de_procesos_conserva_el_orden(self):
+        contextos = datos_boletines(self.grado)
+        self.assertEqual(list(renderizar_boletines(contextos, procesos=2)), list(renderizar_boletines(contextos, procesos=1)))
+
+
+class GradoResumenTests(TestCase):
+    """Pruebas de las estadísticas y el resumen de cada grado calculados en la base."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = Grado.objects.create(nombre='Tercero', duracion=1)
+        cursos = {
+            codigo: Curso.objects.create(nombre=codigo, codigo=codigo, creditos=3, año=año, grado=cls.grado)
+            for codigo, año in (('C', 2), ('B', 2), ('A', 1))
+        }
+        notas = {'T-1': {'A': 90, 'B': 71}, 'T-2': {'A': '50.5', 'B': 55}, 'T-3': {'A': 60}, 'T-4': {}}
+        for id_estudiante, notas_estudiante in notas.items():
+            estudiante = Estudiante.objects.create(
+                id_estudiante=id_estudiante, nombre=id_estudiante, fecha_nacimiento=datetime.date(2012, 1, 1),
+                sexo='F', situacion='Inactivo' if id_estudiante == 'T-4' else 'Activo', grado=cls.grado,
+            )
+            for codigo, valor in notas_estudiante.items():
+                registrar_nota(estudiante, cursos[codigo], Decimal(valor))
+
+    def test_obtener_estadisticas(self):
+        with self.assertNumQueries(2):
+            estadisticas = self.grado.obtener_estadisticas()
+        cursos = estadisticas.pop('cursos')
+        self.assertEqual(estadisticas, {
+            'total_estudiantes': 4, 'estudiantes_activos': 3, 'estudiantes_con_notas': 3,
+            'estudiantes_aprobados': 2,  # T-3 aprueba con la nota justa
+            'promedio_general': 48.31,  # (80.5 + 52.75 + 60 + 0) / 4: el estudiante sin notas cuenta con 0
+            'tasa_aprobacion': 66.67,  # Sobre los estudiantes con notas
+            'total_cursos': 3,
+        })
+        self.assertEqual(
+            [(curso.codigo, curso.promedio, curso.tasa_aprobacion, curso.cantidad_notas) for curso in cursos],
+            [('A', 66.83, 66.67, 3), ('B', 63.0, 50.0, 2), ('C', 0, 0, 0)],
+        )
+
+        estadisticas = self.grado.obtener_estadisticas(nota_aprobatoria=50)
+        self.assertEqual((estadisticas['estudiantes_aprobados'], estadisticas['tasa_aprobacion']), (3, 100.0))
+        self.assertEqual(estadisticas['cursos'][0].tasa_aprobacion, 100.0)
+
+    def test_grado_sin_estudiantes(self):
+        estadisticas = Grado.objects.create(nombre='Vacío', duracion=1).obtener_estadisticas()
+        self.assertEqual(
+            (estadisticas['total_estudiantes'], estadisticas['promedio_general'], estadisticas['tasa_aprobacion']),
+            (0, 0, 0),
+        )
+
+    def test_con_resumen(self):
+        Grado.objects.create(nombre='Vacío', duracion=1)
+        with self.assertNumQueries(1):
+            grados = list(Grado.objects.con_resumen().order_by('nombre').values_list(
+                'nombre', 'total_cursos', 'total_estudiantes', 'estudiantes_activos', 'promedio_general'
+            ))
+        # Los cursos se cuentan en una subconsulta: no multiplican a los estudiantes
+        self.assertEqual(grados, [('Tercero', 3, 4, 3, 48.31), ('Vacío', 0, 0, 0, 0.0)])
+
+    def test_lista_de_grados_en_una_consulta(self):
+        cache.clear()
+        url = reverse('grado-list')
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertContains(self.client.get(url), '48,31')
+        for nombre in ('Cuarto', 'Quinto', 'Sexto'):
+            crear_grado_con_estudiantes(2, cantidad_cursos=2, nombre=nombre)
+        cache.clear()
+        with self.assertNumQueries(len(consultas)):
+            self.client.get(url)
+        self.assertEqual(sum('gestion_estudiantes_grado' in c['sql'] and 'GROUP BY' in c['sql'] for c in consultas), 1)
+
+
+class EstadisticasTests(TestCase):
+    """Pruebas de las estadísticas de notas por curso y grado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = crear_grado_con_estudiantes(3, cantidad_cursos=2)
+        cls.curso = cls.grado.cursos.order_by('pk').first()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_calculo_en_python(self):
+        resumen = calcular_estadisticas([40.0, 60.0, 70.0, 100.0], usar_numpy=False)
+        self.assertEqual(
+            (resumen.promedio, resumen.mediana, resumen.desviacion, resumen.minimo, resumen.maximo),
+            (67.5, 65.0, 21.65, 40.0, 100.0),
+        )
+        self.assertEqual((resumen.aprobados, resumen.reprobados, resumen.tasa_aprobacion), (3, 1, 75.0))
+        self.assertEqual([rango['cantidad'] for rango in resumen.histograma], [0, 0, 0, 0, 1, 0, 1, 1, 0, 1])
+        self.assertEqual(resumen.histograma[-1]['hasta'], 100)
+        self.assertEqual(calcular_estadisticas([40.0, 60.0, 70.0, 100.0], nota_aprobatoria=70).aprobados, 2)
+
+        vacio = calcular_estadisticas([])
+        self.assertEqual((vacio.cantidad, vacio.promedio, vacio.tasa_aprobacion), (0, None, 0))
+        self.assertEqual(len(vacio.histograma), 10)
+
+    @skipUnless(np is not None, 'NumPy no está instalado')
+    def test_numpy_igual_que_python(self):
+        valores = [float(valor) for valor in range(0, 101, 3)] + [59.99, 60.0]
+        for ancho in (7, 10, 25):
+            self.assertEqual(
+                calcular_estadisticas(valores, ancho_histograma=ancho),
+                calcular_estadisticas(valores, ancho_histograma=ancho, usar_numpy=False),
+            )
+
+    def test_una_consulta_por_ambito_y_cache(self):
+        with self.assertNumQueries(2):
+            curso = estadisticas_curso(self.curso)
+            grado = estadisticas_grado(self.grado)
+        self.assertEqual((curso.cantidad, grado.cantidad), (3, 3))  # El segundo curso no tiene notas
+        self.assertEqual((curso.promedio, curso.minimo, curso.maximo), (51.0, 50.0, 52.0))
+        with self.assertNumQueries(0):
+            estadisticas_curso(self.curso)
+            estadisticas_grado(self.grado)
+        with self.assertNumQueries(1):
+            self.assertEqual(estadisticas_grado(self.grado, nota_aprobatoria=51).aprobados, 2)
+
+    def test_invalidacion_al_cambiar_notas(self):
+        estadisticas_curso(self.curso)
+        estadisticas_grado(self.grado)
+        otro_curso = self.grado.cursos.order_by('pk').last()
+        estadisticas_curso(otro_curso)
+        with self.captureOnCommitCallbacks() as al_confirmar:
+            registrar_nota(self.grado.estudiantes.first(), otro_curso, 90)
+        # Hasta que se confirma la transacción la caché conserva los datos aún visibles
+        self.assertEqual(estadisticas_curso(otro_curso).cantidad, 0)
+        for funcion in al_confirmar:
+            funcion()
+        self.assertEqual(estadisticas_curso(self.curso).cantidad, 3)
+        self.assertEqual((estadisticas_curso(otro_curso).cantidad, estadisticas_grado(self.grado).maximo), (1, 90.0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Nota.objects.get(curso=otro_curso).delete()
+        self.assertEqual((estadisticas_curso(otro_curso).cantidad, estadisticas_grado(self.grado).maximo), (0, 52.0))
+
+    def test_paginas_de_grado_y_curso(self):
+        respuesta = self.client.get(reverse('grado-detail', kwargs={'pk': self.grado.pk}))
+        self.assertContains(respuesta, 'Distribución de notas')
+        self.assertContains(respuesta, '<strong>Mediana:</strong> 51,0')
+        respuesta = self.client.get(reverse('curso-notas', kwargs={'pk': self.curso.pk}))
+        self.assertContains(respuesta, 'Desviación estándar')
+
+
+class ApiTests(TestCase):
+    """Pruebas de la API JSON de solo lectura."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = crear_grado_con_estudiantes(5, cantidad_cursos=2)
+        crear_grado_con_estudiantes(2, cantidad_cursos=1, nombre='Segundo')
+
+    def test_campos_filtros_y_paginacion(self):
+        url = reverse('api-estudiantes')
+        datos = self.client.get(url, {'fields': 'nombre', 'grado': self.grado.pk, 'limite': 3}).json()
+        self.assertEqual([set(fila) for fila in datos['resultados']], [{'id', 'nombre'}] * 3)
+        self.assertIsNone(datos['anterior'])
+        siguiente = self.client.get(datos['siguiente']).json()
+        self.assertEqual(len(siguiente['resultados']), 2)
+        self.assertIsNone(siguiente['siguiente'])
+        ids = [fila['id'] for fila in datos['resultados'] + siguiente['resultados']]
+        self.assertEqual(ids, list(self.grado.estudiantes.order_by('pk').values_list('pk', flat=True)))
+
+    def test_consulta_por_ids(self):
+        nota = Nota.objects.first()
+        datos = self.client.get(reverse('api-notas'), {'ids': f'{nota.pk},999999', 'fields': 'nota'}).json()
+        self.assertEqual(datos['resultados'], [{'id': nota.pk, 'nota': str(nota.nota)}])
+        self.assertEqual(datos['no_encontrados'], [999999])
+
+    def test_parametros_invalidos(self):
+        enorme = 10 ** 30
+        for recurso, parametros in (
+            ('api-cursos', {'fields': 'clave'}), ('api-cursos', {'limite': 0}), ('api-cursos', {'grado': 'abc'}),
+            ('api-cursos', {'ids': 'x'}), ('api-cursos', {'ids': enorme}), ('api-cursos', {'grado': enorme}),
+            ('api-estudiantes', {'grado': enorme}), ('api-notas', {'curso': enorme}), ('api-notas', {'estudiante': -1}),
+        ):
+            respuesta = self.client.get(reverse(recurso), parametros)
+            self.assertEqual(respuesta.status_code, 400, parametros)
+            self.assertIn('error', respuesta.json())
+        error = self.client.get(reverse('api-cursos'), {'ids': enorme}).json()['error']
+        self.assertEqual(error, f'"ids" debe estar entre 1 y {2 ** 63 - 1}.')
+        self.assertEqual(self.client.get(reverse('api-cursos'), {'ids': 2 ** 63 - 1}).json()['no_encontrados'], [2 ** 63 - 1])
+
+    def test_cursores_alterados_vuelven_a_la_primera_pagina(self):
+        primeros = self.client.get(reverse('api-estudiantes'), {'limite': 2}).json()['resultados']
+        for valores in (['a', 'x'], [None, None], ['a', {'x': 1}], [['a'], 1], ['x'], 'abc'):
+            cursor = codificar_cursor(valores)
+            for direccion in ('despues', 'antes'):
+                respuesta = self.client.get(reverse('estudiante-list'), {direccion: cursor})
+                self.assertEqual(respuesta.status_code, 200, valores)
+                self.assertEqual(respuesta.context['estudiantes'][0].nombre, 'Estudiante 00000')
+        for valores in (['x'], [None], [{'x': 1}]):
+            respuesta = self.client.get(reverse('api-estudiantes'), {'limite': 2, 'despues': codificar_cursor(valores)})
+            self.assertEqual(respuesta.json()['resultados'], primeros, valores)
+
+
+class GetCondicionalTests(TestCase):
+    """Pruebas de las respuestas 304 Not Modified con ETag y Last-Modified."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = crear_grado_con_estudiantes(3, cantidad_cursos=2)
+        cls.estudiante = cls.grado.estudiantes.first()
+
+    def urls(self):
+        return [
+            reverse('grado-list'),
+            reverse('grado-detail', kwargs={'pk': self.grado.pk}),
+            reverse('estudiante-list'),
+            reverse('estudiante-detail', kwargs={'pk': self.estudiante.pk}),
+        ]
+
+    def etags(self):
+        for url in self.urls():
+            self.client.get(url)  # Primera visita: puede fijar la cookie CSRF, que forma parte del ETag
+        etags = {}
+        for url in self.urls():
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertIn('no-cache', respuesta['Cache-Control'])
+            self.assertIn('Last-Modified', respuesta)
+            etags[url] = respuesta['ETag']
+        return etags
+
+    def test_responde_304_sin_cambios(self):
+        for url, etag in self.etags().items():
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(respuesta.status_code, 304, url)
+            self.assertEqual(len(consultas), 1, url)
+
+    def test_cambios_sin_fechas_invalidan(self):
+        etags = self.etags()
+        Estudiante.objects.filter(pk=self.estudiante.pk).update(nombre='Otro nombre')  # Sin señales
+        self.estudiante.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.estudiante.save()  # Con señales: actualiza la marca de Estudiante
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200, url)
+
+    def test_nota_nueva_invalida_el_detalle(self):
+        url = reverse('estudiante-detail', kwargs={'pk': self.estudiante.pk})
+        etag = self.etags()[url]
+        self.estudiante.notas.first().delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_otro_proceso_con_cache_local(self):
+        """Un proceso con su propia caché no ve el cambio, pero su marca expira y vuelve a renderizar."""
+        otro_proceso = locmem.LocMemCache('otro-proceso', {})
+        url = reverse('estudiante-detail', kwargs={'pk': self.estudiante.pk})
+        with mock.patch('gestion_estudiantes.condicional.cache', otro_proceso):
+            etag = self.etags()[url]
+        Estudiante.objects.filter(pk=self.estudiante.pk).update(nombre='Otro nombre')
+        with self.captureOnCommitCallbacks(execute=True):
+            registrar_cambio(Estudiante)  # Solo en la caché de este proceso
+
+        with mock.patch('gestion_estudiantes.condicional.cache', otro_proceso):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            despues = time.time() + settings.CONDICIONAL_MARCAS_TIMEOUT + 1
+            with mock.patch.object(locmem, 'time', SimpleNamespace(time=lambda: despues)):
+                respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'Otro nombre')
+
+
+class VistasAsincronasTests(TestCase):
+    """Pruebas de las versiones asíncronas del dashboard y de los detalles."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = crear_grado_con_estudiantes(3, cantidad_cursos=3)
+        cls.estudiante = cls.grado.estudiantes.first()
+        actualizar_todo()
+
+    def setUp(self):
+        cache.clear()
+
+    def pares(self):
+        """(URL síncrona, URL asíncrona) de cada página."""
+        return [
+            (reverse(nombre, kwargs=kwargs), reverse(f'{nombre}-async', kwargs=kwargs))
+            for nombre, kwargs in (
+                ('inicio', {}),
+                ('grado-detail', {'pk': self.grado.pk}),
+                ('estudiante-detail', {'pk': self.estudiante.pk}),
+            )
+        ]
+
+    async def test_mismo_html_que_las_vistas_sincronas(self):
+        sin_csrf = re.compile(r'name="csrfmiddlewaretoken" value="[^"]+"')
+        for url, url_async in self.pares():
+            # La vista síncrona primero: deja en caché los fragmentos que luego lee la asíncrona
+            esperado = await self.async_client.get(url)
+            obtenido = await self.async_client.get(url_async)
+            self.assertEqual(obtenido.status_code, 200, url_async)
+            self.assertEqual(sin_csrf.sub('', obtenido.content.decode()), sin_csrf.sub('', esperado.content.decode()))
+
+    async def test_get_condicional_y_404(self):
+        url = reverse('grado-detail-async', kwargs={'pk': self.grado.pk})
+        await self.async_client.get(url)  # Fija la cookie CSRF, que forma parte del ETag
+        etag = (await self.async_client.get(url))['ETag']
+        self.assertEqual((await self.async_client.get(url, headers={'if-none-match': etag})).status_code, 304)
+        await Estudiante.objects.filter(pk=self.estudiante.pk).aupdate(nombre='Otro nombre')
+        await sync_to_async(registrar_cambio)(Estudiante)
+        self.assertEqual((await self.async_client.get(url, headers={'if-none-match': etag})).status_code, 200)
+
+        faltante = reverse('estudiante-detail-async', kwargs={'pk': 0})
+        self.assertEqual((await self.async_client.get(faltante)).status_code, 404)
+
+
+class DashboardTests(TestCase):
+    """Pruebas de los contadores del dashboard y de su instantánea en caché."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = crear_grado_con_estudiantes(3, cantidad_cursos=3)
+        cls.estudiante = cls.grado.estudiantes.first()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_contadores_con_una_consulta(self):
+        Estudiante.objects.filter(pk=self.estudiante.pk).update(situacion='Inactivo')
+        with self.assertNumQueries(1):
+            contadores = calcular_contadores()
+        self.assertEqual(contadores, {
+            'total_estudiantes': 3, 'estudiantes_activos': 2, 'estudiantes_inactivos': 1,
+            'total_grados': 1, 'total_cursos': 3,
+        })
+        Nota.objects.all().delete()
+        Estudiante.objects.all().delete()
+        contadores = calcular_contadores()  # Sin estudiantes, los conteos de grados y cursos se mantienen
+        self.assertEqual((contadores['total_estudiantes'], contadores['total_cursos']), (0, 3))
+
+    def test_metricas_de_aciertos_y_fallos(self):
+        self.assertEqual(obtener_metricas_cache(), {'aciertos': 0, 'fallos': 0, 'proporcion_aciertos': 0})
+        obtener_instantanea()
+        with self.assertNumQueries(0):
+            for _ in range(2):
+                obtener_instantanea()
+        self.assertEqual(obtener_metricas_cache(), {'aciertos': 2, 'fallos': 1, 'proporcion_aciertos': 66.67})
+
+    def test_escrituras_invalidan_la_instantanea(self):
+        self.assertEqual(obtener_instantanea()['total_estudiantes'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Estudiante.objects.create(
+                id_estudiante='D-1', nombre='Ana', fecha_nacimiento=datetime.date(2012, 1, 1),
+                sexo='F', situacion='Activo', grado=self.grado,
+            )
+        self.assertEqual(obtener_instantanea()['total_estudiantes'], 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            Curso.objects.create(nombre='Arte', codigo='ART', creditos=1, año=1, grado=self.grado)
+        instantanea = obtener_instantanea()
+        self.assertEqual((instantanea['total_cursos'], instantanea['cursos'][0]['codigo']), (4, 'ART'))
+        self.assertEqual(obtener_metricas_cache()['fallos'], 3)
+
+
+@override_settings(INSTRUMENTACION_SQL=True, INSTRUMENTACION_SQL_UMBRAL_N1=3)
+class InstrumentacionSQLTests(TestCase):
+    """Pruebas del middleware que mide las consultas de cada petición."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = crear_grado_con_estudiantes(5, cantidad_cursos=1)
+
+    def procesar(self, vista):
+        middleware = InstrumentacionSQLMiddleware(vista)
+        with self.assertLogs('gestion_estudiantes.sql', level='INFO') as registros:
+            response = middleware(RequestFactory().get('/prueba/'))
+        return response, registros.output
+
+    def test_cabecera_server_timing(self):
+        def vista(request):
+            list(Grado.objects.all())
+            return HttpResponse()
+
+        response, registros = self.procesar(vista)
+        self.assertRegex(response['Server-Timing'], r'^db;desc="1 consultas";dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertIn('"consultas": 1', registros[0])
+
+    def test_detecta_n_mas_1(self):
+        def vista(request):
+            for estudiante in Estudiante.objects.all():
+                estudiante.grado.nombre  # Una consulta por estudiante
+            return HttpResponse()
+
+        response, registros = self.procesar(vista)
+        self.assertIn('db;desc="6 consultas"', response['Server-Timing'])
+        self.assertIn('"duplicadas": 4', registros[0])
+        self.assertIn('"n_mas_1": 1', registros[0])
+        self.assertIn('se ejecutó 5 veces', registros[1])
+
+    def test_duplicadas_sin_executemany(self):
+        def vista(request):
+            sql = 'UPDATE gestion_estudiantes_grado SET duracion = %s WHERE id = %s'
+            with connection.cursor() as cursor:
+                for _ in range(2):
+                    cursor.executemany(sql, ((2, pk) for pk in [self.grado.pk]))
+                    cursor.execute(sql, [1, self.grado.pk])
+            return HttpResponse()
+
+        response, registros = self.procesar(vista)
+        self.assertIn('db;desc="4 consultas"', response['Server-Timing'])
+        self.assertIn('"duplicadas": 1', registros[0])
+
+    def test_forma_consulta(self):
+        self.assertEqual(
+            forma_consulta("SELECT * FROM t WHERE id IN (%s, %s, %s) AND a = 'x' LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND a = ? LIMIT ?',
+        )
+
+
+class GenerarColegioTests(TestCase):
+    """Pruebas del generador de datos sintéticos."""
+
+    def test_cantidades_y_campos_derivados(self):
+        creados = generar_colegio(grados=2, cursos_por_grado=3, estudiantes=10, proporcion_notas=1)
+        self.assertEqual(creados['inscripciones'], 30)
+        self.assertEqual(creados['notas'], 30)
+        self.assertEqual(Estudiante.cursos.through.objects.count(), 30)
+        estudiante = Estudiante.objects.filter(grado__isnull=False).first()
+        self.assertEqual(estudiante.cursos.count(), 3)
+        self.assertEqual(estudiante.total_notas, 3)
+        nota = estudiante.notas.select_related('curso').first()
+        self.assertEqual(nota.curso_codigo, nota.curso.codigo)
+
+    def test_misma_semilla_mismos_datos(self):
+        generar_colegio(grados=1, cursos_por_grado=2, estudiantes=5, semilla=7)
+        primeros = list(Estudiante.objects.order_by('pk').values_list('nombre', flat=True))
+        generar_colegio(grados=1, cursos_por_grado=2, estudiantes=5, semilla=7)
+        segundos = list(Estudiante.objects.order_by('pk').values_list('nombre', flat=True)[5:])
+        self.assertEqual(primeros, segundos)
+
+
+class BusquedaEstudiantesTests(TestCase):
+    """Pruebas de la búsqueda de estudiantes por nombre o ID."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = Grado.objects.create(nombre='Primero', duracion=1)
+        datos = [('EST-001', 'José Fernández Núñez'), ('EST-002', 'María García'), ('OTR-003', 'Josefina Pérez')]
+        for id_estudiante, nombre in datos:
+            Estudiante.objects.create(
+                id_estudiante=id_estudiante, nombre=nombre, fecha_nacimiento=datetime.date(2012, 1, 1),
+                sexo='M', situacion='Activo', grado=cls.grado,
+            )
+
+    def nombres(self, texto, **kwargs):
+        return sorted(e.nombre for e in buscar_estudiantes(texto, **kwargs).estudiantes)
+
+    def test_prefijos_sin_acentos(self):
+        self.assertEqual(self.nombres('jose'), ['Josefina Pérez', 'José Fernández Núñez'])
+        self.assertEqual(self.nombres('fern nuñ'), ['José Fernández Núñez'])
+        self.assertEqual(self.nombres('GARCÍA'), ['María García'])
+        self.assertEqual(self.nombres('jo ma'), [])
+        self.assertEqual(self.nombres('ma ga'), ['María García'])
+
+    def test_subcadenas_sin_acentos(self):
+        self.assertEqual(self.nombres('arcia'), ['María García'])
+        self.assertEqual(self.nombres('ÑEZ'), ['José Fernández Núñez'])
+        self.assertEqual(self.nombres('efin erez'), ['Josefina Pérez'])
+        self.assertEqual(self.nombres('-003'), ['Josefina Pérez'])
+
+    def test_prefijos_antes_que_subcadenas(self):
+        Estudiante.objects.create(
+            id_estudiante='EST-004', nombre='Ariadna Soto', fecha_nacimiento=datetime.date(2012, 1, 1),
+            sexo='F', situacion='Activo', grado=self.grado,
+        )
+        resultado = buscar_estudiantes('ari')
+        self.assertEqual([e.nombre for e in resultado.estudiantes], ['Ariadna Soto', 'María García'])
+
+    def test_por_id_estudiante(self):
+        self.assertEqual(self.nombres('EST'), ['José Fernández Núñez', 'María García'])
+        self.assertEqual(self.nombres('OTR-003'), ['Josefina Pérez'])
+
+    def test_indice_sincronizado(self):
+        estudiante = Estudiante.objects.get(id_estudiante='EST-002')
+        estudiante.nombre = 'María Quispe'
+        estudiante.save()
+        self.assertEqual(self.nombres('garcia'), [])
+        self.assertEqual(self.nombres('quispe'), ['María Quispe'])
+        otro_grado = Grado.objects.create(nombre='Segundo', duracion=1)
+        Estudiante.objects.filter(pk=estudiante.pk).update(grado=otro_grado)
+        self.assertEqual(self.nombres('quispe', grado_id=self.grado.pk), [])
+        self.assertEqual(self.nombres('qu', grado_id=otro_grado.pk), ['María Quispe'])
+        estudiante.delete()
+        self.assertEqual(self.nombres('quispe'), [])
+
+    def test_paginacion_y_vista(self):
+        resultado = buscar_estudiantes('jos', tamaño=1)
+        self.assertEqual(len(resultado.estudiantes), 1)
+        self.assertTrue(resultado.hay_siguiente)
+        self.assertFalse(buscar_estudiantes('jos', pagina=2, tamaño=1).hay_siguiente)
+        respuesta = self.client.get(reverse('estudiante-list'), {'q': 'perez', 'grado': self.grado.pk})
+        self.assertEqual([e.nombre for e in respuesta.context['estudiantes']], ['Josefina Pérez'])
+        self.assertEqual(self.nombres('perez', grado_id='x'), [])
+
+    def test_relevancia_entre_las_coincidencias(self):
+        Estudiante.objects.bulk_create([
+            Estudiante(
+                id_estudiante=f'MAR-{i:03d}', nombre=nombre, fecha_nacimiento=datetime.date(2012, 1, 1),
+                sexo='M', situacion='Activo', grado=self.grado,
+            )
+            for i, nombre in enumerate([f'Marco Antonio Estudiante {i}' for i in range(20)] + ['Marco Marco'])
+        ])
+        self.assertEqual(buscar_estudiantes('marco', tamaño=5).estudiantes[0].nombre, 'Marco Marco')
+        encontrados = []
+        for pagina in range(1, 6):
+            encontrados += buscar_estudiantes('marco', pagina=pagina, tamaño=5).estudiantes
+        self.assertEqual(len({e.pk for e in encontrados}), 21)
+
+        # Con más coincidencias que candidatos, solo se clasifican y paginan los candidatos
+        with mock.patch('gestion_estudiantes.busqueda.MAXIMO_CANDIDATOS', 12):
+            paginas = [buscar_estudiantes('marco', pagina=pagina, tamaño=5) for pagina in range(1, 5)]
+        self.assertEqual([len(p.estudiantes) for p in paginas], [5, 5, 2, 0])
+        self.assertEqual([p.hay_siguiente for p in paginas], [True, True, False, False])
+
+    def test_paginas_fuera_de_rango(self):
+        url = reverse('estudiante-list')
+        for pagina in ('10' * 30, '-5', '0', 'x'):
+            respuesta = self.client.get(url, {'q': 'jos', 'pagina': pagina})
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertEqual(respuesta.context['pagina'].pagina, 1)
+        self.assertEqual(buscar_estudiantes('jos', pagina=10 ** 30).estudiantes, [])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN es específico de SQLite')
+class PlanesDeConsultaTests(TestCase):
+    """
+    Verifica que las consultas frecuentes usen índices: ninguna debe recorrer
+    una tabla completa (SCAN) ni ordenar con un B-tree temporal.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grado = crear_grado_con_estudiantes(20, cantidad_cursos=3)
+        cls.estudiante = cls.grado.estudiantes.first()
+        cls.curso = cls.grado.cursos.first()
+
+    def assertUsaIndices(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            pasos = [fila[-1] for fila in cursor.fetchall()]
+        for paso in pasos:
+            self.assertFalse(paso.startswith('SCAN'), f'Recorrido completo: {paso}\n{sql}')
+            self.assertNotIn('TEMP B-TREE', paso, f'Ordenamiento temporal: {paso}\n{sql}')
+
+    def assertQuerysetUsaIndices(self, queryset):
+        self.assertUsaIndices(*queryset.query.sql_with_params())
+
+    def test_notas_por_estudiante_y_curso(self):
+        self.assertQuerysetUsaIndices(Nota.objects.filter(estudiante=self.estudiante, curso=self.curso))
+        self.assertQuerysetUsaIndices(self.estudiante.notas.all())
+        self.assertQuerysetUsaIndices(self.curso.notas.all())
+
+    def test_estudiantes_por_grado_y_situacion(self):
+        self.assertQuerysetUsaIndices(self.grado.estudiantes.all())
+        self.assertQuerysetUsaIndices(Estudiante.objects.filter(situacion='Activo'))
+        self.assertQuerysetUsaIndices(Estudiante.objects.filter(grado=self.grado, situacion='Activo'))
+
+    def test_cursos_de_un_grado(self):
+        # Curso.Meta.ordering ordena por el nombre del grado; las consultas de un grado ordenan sin él
+        self.assertQuerysetUsaIndices(self.grado.cursos.order_by('año', 'nombre'))
+
+    def test_orden_de_los_cursos(self):
+        anterior = Grado.objects.create(nombre='Antes', duracion=1)  # Id mayor, nombre menor
+        Curso.objects.create(nombre='Z', codigo='ANT1', creditos=1, año=1, grado=anterior)
+        Curso.objects.create(nombre='Suelto', codigo='SUE1', creditos=1, año=3)
+        cursos = list(Curso.objects.select_related('grado'))
+        self.assertEqual([curso.codigo for curso in cursos], ['SUE1', 'ANT1', 'Pri0', 'Pri2', 'Pri1'])
+        # La clave para ordenar en memoria coincide con Meta.ordering
+        self.assertEqual(sorted(reversed(cursos), key=Curso.clave_orden), cursos)
+
+    def test_paginas_del_listado_de_estudiantes(self):
+        cursor = codificar_cursor(['Estudiante 00005', self.estudiante.pk])
+        for queryset in (Estudiante.objects.all(), Estudiante.objects.filter(grado=self.grado)):
+            for direccion in ('despues', 'antes'):
+                with CaptureQueriesContext(connection) as consultas:
+                    paginar_por_cursor(queryset, ('nombre', 'id'), **{direccion: cursor}, tamaño=5)
+                self.assertUsaIndices(consultas[0]['sql'])
+
+    def test_consultas_de_la_matriz_de_notas(self):
+        self.assertQuerysetUsaIndices(
+            Estudiante.cursos.through.objects.filter(estudiante__grado=self.grado).select_related('curso__grado')
+        )
+        self.assertQuerysetUsaIndices(Nota.objects.filter(estudiante__grado=self.grado).order_by())
+        self.assertQuerysetUsaIndices(self.estudiante.cursos.select_related('grado').order_by())
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, boletines, exportar, views, vistas_asincronas
 
 urlpatterns = [
     path('', views.inicio, name='inicio'),
@@ -17,7 +17,27 @@ urlpatterns = [
     path('grados/<int:pk>/editar/', views.GradoUpdateView.as_view(), name='grado-update'),
     path('grados/<int:pk>/eliminar/', views.GradoDeleteView.as_view(), name='grado-delete'),
     path('grados/<int:pk>/', views.GradoDetailView.as_view(), name='grado-detail'),
+    path('grados/<int:pk>/matricular/', views.MatricularGradoView.as_view(), name='grado-matricular'),
+    path('grados/<int:pk>/matricular/segundo-plano/', views.MatricularGradoTareaView.as_view(), name='grado-matricular-tarea'),
     path('grados/<int:grado_pk>/cursos/nuevo/', views.CursoCreateView.as_view(), name='curso-create'),
     path('cursos/<int:pk>/editar/', views.CursoUpdateView.as_view(), name='curso-update'),
     path('cursos/<int:pk>/eliminar/', views.CursoDeleteView.as_view(), name='curso-delete'),
+    path('cursos/<int:pk>/notas/', views.NotasCursoView.as_view(), name='curso-notas'),
+    path('grados/<int:pk>/exportar/', exportar.exportar_grado, name='grado-exportar'),
+    path('grados/<int:pk>/boletines/', boletines.boletines_grado, name='grado-boletines'),
+    path('grados/<int:pk>/boletines/segundo-plano/', views.BoletinesGradoTareaView.as_view(), name='grado-boletines-tarea'),
+    path('cursos/<int:pk>/exportar/', exportar.exportar_curso, name='curso-exportar'),
+    path('notas/exportar/', exportar.exportar_notas, name='notas-exportar'),
+    path('notas/exportar/segundo-plano/', views.ExportarNotasTareaView.as_view(), name='notas-exportar-tarea'),
+    path('recalcular/', views.RecalcularColegioView.as_view(), name='recalcular-colegio'),
+    path('tareas/<int:pk>/', views.TareaDetailView.as_view(), name='tarea-detail'),
+    path('tareas/<int:pk>/estado/', views.tarea_estado, name='tarea-estado'),
+    path('tareas/<int:pk>/descargar/', views.tarea_descargar, name='tarea-descargar'),
+    path('async/', vistas_asincronas.inicio, name='inicio-async'),
+    path('async/grados/<int:pk>/', vistas_asincronas.GradoDetailAsyncView.as_view(), name='grado-detail-async'),
+    path('async/estudiantes/<int:pk>/', vistas_asincronas.EstudianteDetailAsyncView.as_view(), name='estudiante-detail-async'),
+    path('api/estudiantes/', api.estudiantes, name='api-estudiantes'),
+    path('api/grados/', api.grados, name='api-grados'),
+    path('api/cursos/', api.cursos, name='api-cursos'),
+    path('api/notas/', api.notas, name='api-notas'),
 ] 
\ No newline at end of file
@@ -3,59 +3,74 @@ Views para el sistema de gestión escolar del Colegio El Patito.
 Este módulo contiene todas las vistas necesarias para gestionar estudiantes, grados, cursos y notas.
 """
 
+import math
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView, FormView
+from django.db.models import Count, Max
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView, FormView, View
 from django.urls import reverse_lazy
 from django.contrib import messages
-from .models import Estudiante, Curso, Grado, Nota
+from .models import Estudiante, Curso, Grado, Nota, Tarea
+from .condicional import GetCondicionalMixin, subconsulta_agregada
+from .dashboard import obtener_instantanea, obtener_metricas_cache
+from .estadisticas import estadisticas_curso, estadisticas_grado
+from .historial import historial_estudiante
+from .fragmentos import obtener_fragmentos, obtener_versiones, tiempo_expiracion
+from .indices import IndiceNotas
+from .matriculas import matricular_grado
+from .notas import nueva_nota, registrar_nota, registrar_notas
+from .busqueda import MAXIMO_CANDIDATOS, buscar_estudiantes
+from .paginacion import paginar_por_cursor
+from .tareas import encolar, tarea_sin_terminar
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django import forms
 
 # Create your views here.
 
+# Estadísticas del dashboard cuando no se pueden consultar
+ESTADISTICAS_VACIAS = {
+    'total_estudiantes': 0,
+    'estudiantes_activos': 0,
+    'estudiantes_inactivos': 0,
+    'total_grados': 0,
+    'total_cursos': 0,
+    'grados': [],
+    'cursos': [],
+}
+
 def inicio(request):
     """
     Vista principal del dashboard que muestra estadísticas generales del sistema.
     Incluye conteos de estudiantes, grados y cursos, así como listas resumidas.
+    Los datos provienen de una instantánea en caché (ver dashboard.py).
     """
     try:
         # Obtener estadísticas generales
-        total_estudiantes = Estudiante.objects.count()
-        estudiantes_activos = Estudiante.objects.filter(situacion='Activo').count()
-        estudiantes_inactivos = Estudiante.objects.filter(situacion='Inactivo').count()
-        total_grados = Grado.objects.count()
-        total_cursos = Curso.objects.count()
-        grados = Grado.objects.all().order_by('nombre')[:5]  # Últimos 5 grados
-        cursos = Curso.objects.all().order_by('-id')[:5]  # Últimos 5 cursos
+        context = dict(obtener_instantanea())
     except Exception as e:
         # Manejo de errores en caso de problemas con la base de datos
-        total_estudiantes = 0
-        estudiantes_activos = 0
-        estudiantes_inactivos = 0
-        total_grados = 0
-        total_cursos = 0
-        grados = []
-        cursos = []
+        context = dict(ESTADISTICAS_VACIAS)
         messages.error(request, f'Error al cargar las estadísticas: {str(e)}')
 
-    context = {
-        'total_estudiantes': total_estudiantes,
-        'estudiantes_activos': estudiantes_activos,
-        'estudiantes_inactivos': estudiantes_inactivos,
-        'total_grados': total_grados,
-        'total_cursos': total_cursos,
-        'grados': grados,
-        'cursos': cursos,
-    }
+    context['metricas_cache'] = obtener_metricas_cache()
     return render(request, 'gestion_estudiantes/inicio.html', context)
 
 # Vistas relacionadas con Grados
-class GradoListView(ListView):
-    """Vista para listar todos los grados académicos."""
+class GradoListView(GetCondicionalMixin, ListView):
+    """Vista para listar todos los grados académicos con sus conteos y promedio."""
     model = Grado
+    queryset = Grado.objects.con_resumen()
     template_name = 'gestion_estudiantes/grado_list.html'
     context_object_name = 'grados'
     ordering = ['nombre']
+    modelos_validacion = (Grado, Curso, Estudiante, Nota)
+
+    def datos_validacion(self):
+        """Cantidad de grados y fecha del más reciente; los conteos y promedios dependen de las marcas."""
+        return tuple(Grado.objects.aggregate(Count('pk'), Max('fecha_creacion')).values())
 
 class GradoCreateView(CreateView):
     """Vista para crear un nuevo grado académico."""
@@ -92,30 +107,117 @@ class GradoDeleteView(DeleteView):
         messages.success(request, 'Grado eliminado exitosamente.')
         return super().delete(request, *args, **kwargs)
 
-class GradoDetailView(DetailView):
+class GradoDetailView(GetCondicionalMixin, DetailView):
     """Vista para ver los detalles de un grado específico."""
     model = Grado
     template_name = 'gestion_estudiantes/grado_detail.html'
     context_object_name = 'grado'
+    modelos_validacion = (Grado, Curso, Estudiante, Nota)
+    # Hasta esta cantidad de filas sin caché se consultan por id; con más, por grado
+    max_pendientes_por_id = 500
+
+    @staticmethod
+    def consulta_validacion(pk):
+        """Fechas máximas y cantidades de los estudiantes, notas y cursos del grado, en una consulta."""
+        return Grado.objects.filter(pk=pk).annotate(
+            cantidad_estudiantes=subconsulta_agregada(Estudiante.objects, 'grado', Count('pk')),
+            ultimo_estudiante=subconsulta_agregada(Estudiante.objects, 'grado', Max('pk')),
+            cantidad_notas=subconsulta_agregada(Nota.objects, 'estudiante__grado', Count('pk')),
+            ultima_nota=subconsulta_agregada(Nota.objects, 'estudiante__grado', Max('fecha_registro')),
+            cantidad_cursos=subconsulta_agregada(Curso.objects, 'grado', Count('pk')),
+        ).values_list(
+            'fecha_creacion', 'cantidad_estudiantes', 'ultimo_estudiante',
+            'cantidad_notas', 'ultima_nota', 'cantidad_cursos',
+        )
+
+    def datos_validacion(self):
+        return self.consulta_validacion(self.kwargs['pk']).first() or ()
 
     def get_context_data(self, **kwargs):
-        """Agrega estudiantes y cursos relacionados al contexto."""
+        """Agrega estudiantes, cursos, estadísticas, distribución de notas y la matriz de notas del grado al contexto."""
         context = super().get_context_data(**kwargs)
-        context['estudiantes'] = self.object.estudiantes.all()
-        context['cursos'] = self.object.cursos.all()
-        context['cursos_por_año'] = self.object.cursos.all().order_by('año')
+        estadisticas = self.object.obtener_estadisticas()
+        estudiantes = list(self.object.estudiantes.all())
+        context['estadisticas'] = estadisticas
+        context['distribucion'] = estadisticas_grado(self.object)
+        context['estudiantes'] = estudiantes
+        context['cursos'] = estadisticas['cursos']
+        context['cursos_por_año'] = estadisticas['cursos']  # Ya ordenados por año
+        context['matriz'] = self.construir_matriz(estudiantes)
+        context['fragmentos_timeout'] = tiempo_expiracion()
         return context
 
+    def construir_matriz(self, estudiantes):
+        """
+        Construye la matriz estudiante × curso del grado. Las filas cuyo fragmento de
+        plantilla sigue vigente en la caché (ver fragmentos.py) se entregan como HTML; solo
+        para las demás se consultan inscripciones y notas, con dos consultas sin importar
+        la cantidad de estudiantes. Retorna una fila por estudiante con la versión de su
+        fragmento y su HTML en caché, o sus cursos inscritos y la nota de cada uno.
+        """
+        versiones = obtener_versiones([estudiante.pk for estudiante in estudiantes])
+        en_cache = obtener_fragmentos(versiones)
+        pendientes = [estudiante.pk for estudiante in estudiantes if estudiante.pk not in en_cache]
+
+        cursos_por_estudiante = {}
+        notas = IndiceNotas([])
+        if pendientes:
+            inscripciones, notas_pendientes = self.consultas_matriz(self.object, pendientes)
+            cursos_por_estudiante = self.agrupar_cursos(inscripciones)
+            notas = IndiceNotas.desde_queryset(notas_pendientes)
+        return self.armar_matriz(estudiantes, versiones, en_cache, cursos_por_estudiante, notas)
+
+    @classmethod
+    def consultas_matriz(cls, grado, pendientes):
+        """Querysets de las inscripciones (con su curso) y de las notas de los estudiantes sin fragmento."""
+        inscripciones = Estudiante.cursos.through.objects.select_related('curso__grado')
+        notas = Nota.objects.all()
+        if len(pendientes) <= cls.max_pendientes_por_id:
+            return (
+                inscripciones.filter(estudiante_id__in=pendientes),
+                notas.filter(estudiante_id__in=pendientes),
+            )
+        return inscripciones.filter(estudiante__grado=grado), notas.filter(estudiante__grado=grado)
+
+    @staticmethod
+    def agrupar_cursos(inscripciones):
+        """Retorna {estudiante_id: [cursos]} a partir de las inscripciones."""
+        cursos_por_estudiante = {}
+        for inscripcion in inscripciones:
+            cursos_por_estudiante.setdefault(inscripcion.estudiante_id, []).append(inscripcion.curso)
+        # Se ordena en memoria (como Curso.Meta.ordering) para evitar un ordenamiento temporal en la consulta
+        for cursos in cursos_por_estudiante.values():
+            cursos.sort(key=Curso.clave_orden)
+        return cursos_por_estudiante
+
+    @staticmethod
+    def armar_matriz(estudiantes, versiones, en_cache, cursos_por_estudiante, notas):
+        return [
+            {
+                'estudiante': estudiante,
+                'version': versiones[estudiante.pk],
+                'html': en_cache.get(estudiante.pk),
+                'cursos': None if estudiante.pk in en_cache else [
+                    {'curso': curso, 'nota': notas.obtener(estudiante, curso)}
+                    for curso in cursos_por_estudiante.get(estudiante.pk, [])
+                ],
+            }
+            for estudiante in estudiantes
+        ]
+
 # Vistas relacionadas con Estudiantes
-class EstudianteListView(ListView):
+class EstudianteListView(GetCondicionalMixin, ListView):
     """Vista para listar todos los estudiantes con opciones de filtrado."""
     model = Estudiante
     template_name = 'gestion_estudiantes/estudiante_list.html'
     context_object_name = 'estudiantes'
+    tamaño_pagina = 50
+    orden_paginacion = ('nombre', 'id')
+    modelos_validacion = (Estudiante, Grado)
 
     def get_queryset(self):
         """Filtra estudiantes por grado e ID si se especifican en la URL."""
-        queryset = Estudiante.objects.all()
+        queryset = Estudiante.objects.select_related('grado')
         grado_id = self.request.GET.get('grado')
         estudiante_id = self.request.GET.get('id')
         
@@ -126,13 +228,76 @@ class EstudianteListView(ListView):
         
         return queryset
 
+    def datos_validacion(self):
+        """
+        Cantidad de estudiantes filtrados y el mayor id. fecha_registro solo cambia al crear
+        un estudiante, igual que el mayor id, que SQLite obtiene sin recorrer la tabla.
+        """
+        return tuple(self.get_queryset().aggregate(Count('pk'), Max('pk')).values())
+
     def get_context_data(self, **kwargs):
-        """Agrega lista de grados y el ID de estudiante buscado al contexto."""
-        context = super().get_context_data(**kwargs)
-        context['grados'] = Grado.objects.all()
-        context['estudiante_id'] = self.request.GET.get('id', '')
+        """Pagina por cursor y agrega la lista de grados y los filtros actuales al contexto."""
+        busqueda = self.request.GET.get('q', '').strip()
+        if busqueda:
+            return self.get_context_data_busqueda(busqueda, **kwargs)
+
+        pagina = paginar_por_cursor(
+            self.object_list,
+            self.orden_paginacion,
+            despues=self.request.GET.get('despues'),
+            antes=self.request.GET.get('antes'),
+            tamaño=self.tamaño_pagina,
+        )
+        context = super().get_context_data(object_list=pagina.objetos, **kwargs)
+        self.agregar_filtros(context)
+        context['pagina'] = pagina
+
+        # Parámetros de filtro que se conservan al cambiar de página
+        filtros = self.request.GET.copy()
+        for parametro in ('despues', 'antes'):
+            filtros.pop(parametro, None)
+        if pagina.hay_siguiente:
+            filtros['despues'] = pagina.cursor_siguiente
+            context['url_siguiente'] = '?' + filtros.urlencode()
+            filtros.pop('despues')
+        if pagina.hay_anterior:
+            filtros['antes'] = pagina.cursor_anterior
+            context['url_anterior'] = '?' + filtros.urlencode()
+        return context
+
+    def get_context_data_busqueda(self, busqueda, **kwargs):
+        """Resultados de la búsqueda por nombre o ID, ordenados por relevancia y paginados por número."""
+        try:
+            numero = int(self.request.GET.get('pagina', 1))
+        except ValueError:
+            numero = 1
+        if not 1 <= numero <= math.ceil(MAXIMO_CANDIDATOS / self.tamaño_pagina):
+            numero = 1  # Fuera de las páginas que puede tener una búsqueda
+        resultado = buscar_estudiantes(
+            busqueda,
+            grado_id=self.request.GET.get('grado') or None,
+            pagina=numero,
+            tamaño=self.tamaño_pagina,
+        )
+        context = super().get_context_data(object_list=resultado.estudiantes, **kwargs)
+        self.agregar_filtros(context)
+        context['pagina'] = resultado
+
+        filtros = self.request.GET.copy()
+        if resultado.hay_siguiente:
+            filtros['pagina'] = resultado.pagina + 1
+            context['url_siguiente'] = '?' + filtros.urlencode()
+        if resultado.hay_anterior:
+            filtros['pagina'] = resultado.pagina - 1
+            context['url_anterior'] = '?' + filtros.urlencode()
         return context
 
+    def agregar_filtros(self, context):
+        context['grados'] = Grado.obtener_opciones()
+        context['grado_id'] = self.request.GET.get('grado', '')
+        context['estudiante_id'] = self.request.GET.get('id', '')
+        context['busqueda'] = self.request.GET.get('q', '')
+
 class EstudianteCreateView(CreateView):
     """Vista para crear un nuevo estudiante."""
     model = Estudiante
@@ -227,18 +392,48 @@ class CursoDeleteView(DeleteView):
         messages.success(request, 'Curso eliminado exitosamente.')
         return super().delete(request, *args, **kwargs)
 
-class EstudianteDetailView(DetailView):
+class EstudianteDetailView(GetCondicionalMixin, DetailView):
     """Vista para ver los detalles de un estudiante específico."""
     model = Estudiante
     template_name = 'gestion_estudiantes/estudiante_detail.html'
     context_object_name = 'estudiante'
+    queryset = Estudiante.objects.select_related('grado')
+    modelos_validacion = (Estudiante, Grado, Curso, Nota)
+
+    @staticmethod
+    def consulta_validacion(pk):
+        """Fecha de registro del estudiante y fecha máxima y cantidad de sus notas, en una consulta."""
+        return Estudiante.objects.filter(pk=pk).annotate(
+            cantidad_notas=subconsulta_agregada(Nota.objects, 'estudiante', Count('pk')),
+            ultima_nota=subconsulta_agregada(Nota.objects, 'estudiante', Max('fecha_registro')),
+        ).values_list('fecha_registro', 'cantidad_notas', 'ultima_nota')
+
+    def datos_validacion(self):
+        return self.consulta_validacion(self.kwargs['pk']).first() or ()
 
     def get_context_data(self, **kwargs):
-        """Agrega las notas del estudiante al contexto."""
+        """Agrega los cursos del estudiante con su posición, un índice de sus notas y su posición en el grado."""
         context = super().get_context_data(**kwargs)
-        context['notas'] = self.object.notas.all()
+        # Posiciones precalculadas (ver rankings.py) del estudiante en sus cursos y en su grado
+        posiciones = list(self.object.posiciones.order_by())
+        # Se ordena en memoria para evitar un ordenamiento temporal sobre el join
+        context['cursos'] = sorted(self.object.cursos.select_related('grado').order_by(), key=Curso.clave_orden)
+        context['posicion_grado'] = self.asignar_posiciones(self.object, context['cursos'], posiciones)
+        context['indice_notas'] = IndiceNotas.para_estudiante(self.object)
+        context['historial'] = historial_estudiante(self.object)
         return context
 
+    @staticmethod
+    def asignar_posiciones(estudiante, cursos, posiciones):
+        """Asigna a cada curso la posición del estudiante en él y retorna su posición en el grado."""
+        posiciones_cursos = {posicion.curso_id: posicion for posicion in posiciones if posicion.curso_id}
+        for curso in cursos:
+            curso.posicion = posiciones_cursos.get(curso.pk)
+        return next(
+            (posicion for posicion in posiciones if posicion.grado_id and posicion.grado_id == estudiante.grado_id),
+            None,
+        )
+
 # Formularios y vistas para asignación de cursos
 class AsignarCursoForm(forms.Form):
     """Formulario para asignar un curso a un estudiante."""
@@ -257,24 +452,26 @@ class AsignarCursoView(FormView):
     template_name = 'gestion_estudiantes/asignar_curso.html'
     form_class = AsignarCursoForm
 
+    def dispatch(self, request, *args, **kwargs):
+        self.estudiante = get_object_or_404(Estudiante, pk=kwargs['estudiante_pk'])
+        return super().dispatch(request, *args, **kwargs)
+
     def get_form_kwargs(self):
         """Pasa el grado del estudiante al formulario."""
         kwargs = super().get_form_kwargs()
-        estudiante = get_object_or_404(Estudiante, pk=self.kwargs['estudiante_pk'])
-        kwargs['grado'] = estudiante.grado
+        kwargs['grado'] = self.estudiante.grado_id
         return kwargs
 
     def get_context_data(self, **kwargs):
         """Agrega el estudiante al contexto."""
         context = super().get_context_data(**kwargs)
-        context['estudiante'] = get_object_or_404(Estudiante, pk=self.kwargs['estudiante_pk'])
+        context['estudiante'] = self.estudiante
         return context
 
     def form_valid(self, form):
         """Asigna el curso seleccionado al estudiante."""
-        estudiante = get_object_or_404(Estudiante, pk=self.kwargs['estudiante_pk'])
         curso = form.cleaned_data['curso']
-        estudiante.cursos.add(curso)
+        self.estudiante.cursos.add(curso)
         messages.success(self.request, f'Curso {curso.nombre} asignado exitosamente.')
         return super().form_valid(form)
 
@@ -282,6 +479,19 @@ class AsignarCursoView(FormView):
         """Redirecciona a los detalles del estudiante después de asignar el curso."""
         return reverse_lazy('estudiante-detail', kwargs={'pk': self.kwargs['estudiante_pk']})
 
+class MatricularGradoView(View):
+    """Matricula a todos los estudiantes de un grado en todos sus cursos en una sola operación."""
+
+    def post(self, request, pk):
+        grado = get_object_or_404(Grado, pk=pk)
+        resultado = matricular_grado(grado)
+        messages.success(
+            request,
+            f'Matrícula completada: {resultado["insertadas"]} inscripciones nuevas, '
+            f'{resultado["existentes"]} ya existentes.'
+        )
+        return redirect('grado-detail', pk=grado.pk)
+
 # Formularios y vistas para gestión de notas
 class NotaForm(forms.ModelForm):
     """Formulario para crear y editar notas."""
@@ -324,36 +534,23 @@ class NotaCreateView(CreateView):
         context = super().get_context_data(**kwargs)
         context['estudiante'] = self.estudiante
         context['curso'] = self.curso
-        # Verificar si ya existe una nota para este estudiante y curso
-        nota_existente = Nota.objects.filter(
-            estudiante_id_form=self.estudiante.id_estudiante,
-            curso_codigo=self.curso.codigo
-        ).first()
+        # Si ya existe una nota para este estudiante y curso, al guardar se reemplaza
+        nota_existente = Nota.objects.filter(estudiante=self.estudiante, curso=self.curso).first()
         if nota_existente:
             context['nota_existente'] = nota_existente
-            messages.warning(self.request, f'Ya existe una nota de {nota_existente.nota} para este estudiante en este curso.')
+            messages.warning(
+                self.request,
+                f'Ya existe una nota de {nota_existente.nota} para este estudiante en este curso; '
+                'al guardar se reemplazará.'
+            )
         return context
 
     def form_valid(self, form):
-        # Verificar si ya existe una nota para este estudiante y curso
-        nota_existente = Nota.objects.filter(
-            estudiante_id_form=self.estudiante.id_estudiante,
-            curso_codigo=self.curso.codigo
-        ).first()
-        
-        if nota_existente:
-            messages.error(self.request, 'Ya existe una nota para este estudiante en este curso.')
-            return self.form_invalid(form)
-            
-        form.instance.estudiante = self.estudiante
-        form.instance.curso = self.curso
-        form.instance.estudiante_nombre = self.estudiante.nombre
-        form.instance.estudiante_id_form = self.estudiante.id_estudiante
-        form.instance.curso_nombre = self.curso.nombre
-        form.instance.curso_codigo = self.curso.codigo
-        
-        messages.success(self.request, 'Nota registrada exitosamente.')
-        return super().form_valid(form)
+        creada = registrar_nota(
+            self.estudiante, self.curso, form.cleaned_data['nota'], form.cleaned_data['observaciones']
+        )
+        messages.success(self.request, 'Nota registrada exitosamente.' if creada else 'Nota actualizada exitosamente.')
+        return redirect(self.get_success_url())
 
     def get_success_url(self):
         return reverse_lazy('estudiante-detail', kwargs={'pk': self.estudiante.pk})
@@ -369,6 +566,13 @@ class NotaUpdateView(UpdateView):
         context['curso'] = self.object.curso
         return context
 
+    def form_valid(self, form):
+        registrar_nota(
+            self.object.estudiante, self.object.curso, form.cleaned_data['nota'], form.cleaned_data['observaciones']
+        )
+        messages.success(self.request, 'Nota actualizada exitosamente.')
+        return redirect(self.get_success_url())
+
     def get_success_url(self):
         return reverse_lazy('estudiante-detail', kwargs={'pk': self.object.estudiante.pk})
 
@@ -378,3 +582,169 @@ class NotaDeleteView(DeleteView):
 
     def get_success_url(self):
         return reverse_lazy('estudiante-detail', kwargs={'pk': self.object.estudiante.pk})
+
+# Formularios y vistas para el registro de notas de un curso completo
+class NotaFilaForm(forms.Form):
+    """Fila de la planilla de notas: la nota de un estudiante en el curso."""
+    estudiante_id = forms.IntegerField(widget=forms.HiddenInput)
+    nota = forms.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0,
+        max_value=100,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.01', 'min': '0', 'max': '100'})
+    )
+    observaciones = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control form-control-sm', 'placeholder': 'Opcional'})
+    )
+
+NotaFilaFormSet = forms.formset_factory(NotaFilaForm, extra=0)
+
+class NotasCursoView(FormView):
+    """
+    Planilla para registrar las notas de todos los estudiantes de un curso en una sola petición.
+    Carga los estudiantes inscritos y sus notas con dos consultas y guarda todo en una
+    transacción con un upsert (ver notas.py), sin importar la cantidad de estudiantes.
+    """
+    template_name = 'gestion_estudiantes/notas_curso.html'
+    form_class = NotaFilaFormSet
+
+    def dispatch(self, request, *args, **kwargs):
+        self.curso = get_object_or_404(Curso.objects.select_related('grado'), pk=kwargs['pk'])
+        self.estudiantes = list(self.curso.estudiantes.order_by('nombre', 'id'))
+        self.notas = {nota.estudiante_id: nota for nota in Nota.objects.filter(curso=self.curso)}
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_initial(self):
+        """Una fila por estudiante inscrito con su nota actual, si tiene."""
+        initial = []
+        for estudiante in self.estudiantes:
+            nota = self.notas.get(estudiante.pk)
+            initial.append({
+                'estudiante_id': estudiante.pk,
+                'nota': nota.nota if nota else None,
+                'observaciones': nota.observaciones if nota else '',
+            })
+        return initial
+
+    def get_context_data(self, **kwargs):
+        """
+        Agrega el curso, la distribución de sus notas y las filas (estudiante, formulario) al
+        contexto. Cada formulario se empareja por su estudiante_id, no por su posición: al
+        volver a mostrar un envío con errores, las filas pueden no coincidir con los inscritos
+        actuales. Si el estudiante no está inscrito, la fila se muestra con estudiante None.
+        """
+        context = super().get_context_data(**kwargs)
+        context['curso'] = self.curso
+        context['distribucion'] = estadisticas_curso(self.curso)
+        estudiantes = {str(estudiante.pk): estudiante for estudiante in self.estudiantes}
+        context['filas'] = [
+            (estudiantes.get(str(fila['estudiante_id'].value())), fila) for fila in context['form'].forms
+        ]
+        return context
+
+    def form_valid(self, form):
+        """Crea o actualiza en bloque las notas modificadas."""
+        estudiantes = {estudiante.pk: estudiante for estudiante in self.estudiantes}
+        notas = []
+
+        for fila in form.forms:
+            estudiante = estudiantes.get(fila.cleaned_data.get('estudiante_id'))
+            if estudiante is None:
+                fila.add_error(None, 'El estudiante no está inscrito en este curso.')
+                continue
+            valor = fila.cleaned_data.get('nota')
+            observaciones = fila.cleaned_data.get('observaciones') or None
+            nota = self.notas.get(estudiante.pk)
+            if valor is None:
+                continue  # Fila vacía: no se registra nota
+            if nota is None or nota.nota != valor or (nota.observaciones or None) != observaciones:
+                notas.append(nueva_nota(estudiante, self.curso, valor, observaciones))
+
+        if any(fila.errors for fila in form.forms):
+            return self.form_invalid(form)
+
+        creadas, actualizadas = registrar_notas(notas)
+        messages.success(
+            self.request,
+            f'Notas guardadas: {creadas} registradas y {actualizadas} actualizadas.'
+        )
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse_lazy('curso-notas', kwargs={'pk': self.curso.pk})
+
+# Vistas de tareas en segundo plano
+class EncolarTareaView(View):
+    """
+    Encola una tarea en segundo plano y redirige a la página que muestra su avance. Con
+    reutilizar, si ya hay una tarea sin terminar con los mismos parámetros redirige a esa.
+    """
+    tipo = None
+    descripcion = ''
+    reutilizar = False
+
+    def parametros(self):
+        """Parámetros de la tarea; las subclases los toman de la URL o del formulario."""
+        return {}
+
+    def post(self, request, *args, **kwargs):
+        parametros = self.parametros()
+        tarea = tarea_sin_terminar(self.tipo, **parametros) if self.reutilizar else None
+        if tarea is None:
+            tarea = encolar(self.tipo, **parametros)
+        messages.info(request, f'{self.descripcion} se ejecutará en segundo plano.')
+        return redirect('tarea-detail', pk=tarea.pk)
+
+class RecalcularColegioView(EncolarTareaView):
+    tipo = 'recalcular_colegio'
+    descripcion = 'El recálculo de promedios y posiciones'
+
+class ExportarNotasTareaView(EncolarTareaView):
+    tipo = 'exportar_notas'
+    descripcion = 'La exportación de todas las notas'
+
+class MatricularGradoTareaView(EncolarTareaView):
+    tipo = 'matricular_grado'
+    descripcion = 'La matrícula del grado'
+
+    def parametros(self):
+        return {'grado_id': get_object_or_404(Grado, pk=self.kwargs['pk']).pk}
+
+class BoletinesGradoTareaView(MatricularGradoTareaView):
+    tipo = 'boletines_grado'
+    descripcion = 'La generación de los boletines del grado'
+    reutilizar = True
+
+class TareaDetailView(DetailView):
+    """Estado de una tarea; la página consulta tarea-estado hasta que termina."""
+    model = Tarea
+    template_name = 'gestion_estudiantes/tarea_detail.html'
+    context_object_name = 'tarea'
+
+def tarea_estado(request, pk):
+    """Estado de una tarea en JSON, para consultarlo periódicamente."""
+    tarea = get_object_or_404(Tarea, pk=pk)
+    datos = {
+        'id': tarea.pk,
+        'tipo': tarea.tipo,
+        'estado': tarea.estado,
+        'terminada': tarea.terminada,
+        'progreso': tarea.progreso,
+        'mensaje': tarea.mensaje,
+        'intentos': tarea.intentos,
+        'resultado': tarea.resultado,
+        'error': tarea.error.strip().splitlines()[-1] if tarea.error else '',
+    }
+    return JsonResponse(datos, json_dumps_params={'ensure_ascii': False})
+
+def tarea_descargar(request, pk):
+    """Descarga el archivo generado por una tarea completada."""
+    tarea = get_object_or_404(Tarea, pk=pk, estado=Tarea.COMPLETADA)
+    nombre = (tarea.resultado or {}).get('archivo')
+    ruta = Path(settings.TAREAS_DIRECTORIO) / Path(nombre).name if nombre else None
+    if ruta is None or not ruta.is_file():
+        raise Http404('La tarea no generó un archivo o ya no está disponible.')
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=ruta.name)
@@ -0,0 +1,168 @@
+"""
+Versiones asíncronas del dashboard y de los detalles de grado y estudiante.
+
+Están pensadas para servir el proyecto con ASGI (sistema_estudiantes/asgi.py con
+uvicorn, daphne o gunicorn con workers de uvicorn). Usan el ORM asíncrono de Django
+y lanzan a la vez, con asyncio.gather, las consultas y lecturas de caché que no
+dependen entre sí. Las consultas y el armado de los datos son los de views.py, así
+que muestran lo mismo que las vistas síncronas con las mismas plantillas y también
+responden 304 cuando la página no cambió.
+
+Todo lo que usa la plantilla se carga antes de renderizar, porque dentro del bucle
+de eventos no se puede consultar la base de forma síncrona. Por eso el usuario se
+obtiene con request.auser(), que además carga la sesión que leen los mensajes.
+
+Hasta Django 5.2 el ORM asíncrono ejecuta las consultas de una petición en un hilo
+propio de esa petición (sync_to_async con thread_sensitive), así que gather no las
+ejecuta en paralelo dentro de la base; las de peticiones distintas sí avanzan a la
+vez. El comando benchmark_concurrencia compara la latencia con la versión WSGI.
+"""
+
+import asyncio
+
+from django.contrib import messages
+from django.http import Http404
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.views.generic import View
+
+from .condicional import aobtener_marcas, agregar_validadores, calcular_validadores
+from .dashboard import aobtener_instantanea, aobtener_metricas_cache
+from .estadisticas import aestadisticas_grado
+from .fragmentos import aobtener_fragmentos, aobtener_versiones, tiempo_expiracion
+from .historial import ahistorial_estudiante
+from .indices import IndiceNotas
+from .models import Curso, Estudiante, Grado, Nota, Posicion
+from .views import ESTADISTICAS_VACIAS, EstudianteDetailView, GradoDetailView
+
+
+async def _alista(queryset):
+    return [objeto async for objeto in queryset]
+
+
+async def inicio(request):
+    """Dashboard con la instantánea de estadísticas; versión asíncrona de views.inicio."""
+    request.user = await request.auser()
+    # La instantánea y las métricas se leen a la vez: las métricas pueden no contar esta visita
+    instantanea, metricas = await asyncio.gather(
+        aobtener_instantanea(), aobtener_metricas_cache(), return_exceptions=True
+    )
+    if isinstance(metricas, Exception):
+        raise metricas
+    if isinstance(instantanea, Exception):
+        context = dict(ESTADISTICAS_VACIAS)
+        messages.error(request, f'Error al cargar las estadísticas: {str(instantanea)}')
+    else:
+        context = dict(instantanea)
+    context['metricas_cache'] = metricas
+    return render(request, 'gestion_estudiantes/inicio.html', context)
+
+
+class DetalleAsincronoView(View):
+    """
+    Página de detalle asíncrona con GET condicional, equivalente a GetCondicionalMixin con
+    DetailView. Las subclases indican la vista síncrona cuya consulta de validación y
+    modelos reutilizan, y arman el contexto en obtener_contexto(pk); se llama solo si la
+    página debe renderizarse y retorna None si el objeto no existe.
+    """
+    template_name = None
+    vista_sincrona = None
+
+    async def obtener_contexto(self, pk):
+        raise NotImplementedError('Las subclases deben implementar obtener_contexto().')
+
+    async def get(self, request, pk):
+        request.user = await request.auser()
+        datos, marcas = await asyncio.gather(
+            self.vista_sincrona.consulta_validacion(pk).afirst(),
+            aobtener_marcas(self.vista_sincrona.modelos_validacion),
+        )
+        if datos is None:
+            raise Http404('No existe el registro solicitado.')
+        etag, ultima_modificacion = calcular_validadores(type(self).__name__, request, datos, marcas)
+
+        # Con mensajes pendientes la página debe renderizarse para mostrarlos
+        con_mensajes = bool(len(messages.get_messages(request)))
+        if not con_mensajes:
+            response = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+            if response is not None:
+                return agregar_validadores(response, etag, ultima_modificacion)
+
+        context = await self.obtener_contexto(pk)
+        if context is None:
+            raise Http404('No existe el registro solicitado.')
+        response = render(request, self.template_name, context)
+        if con_mensajes:
+            return response
+        return agregar_validadores(response, etag, ultima_modificacion)
+
+
+class GradoDetailAsyncView(DetalleAsincronoView):
+    """Detalle de un grado; versión asíncrona de views.GradoDetailView."""
+    template_name = 'gestion_estudiantes/grado_detail.html'
+    vista_sincrona = GradoDetailView
+
+    async def obtener_contexto(self, pk):
+        # Las estadísticas solo necesitan la clave primaria, así que no esperan a cargar el grado
+        grado, estadisticas, distribucion, estudiantes = await asyncio.gather(
+            Grado.objects.filter(pk=pk).afirst(),
+            Grado(pk=pk).aobtener_estadisticas(),
+            aestadisticas_grado(pk),
+            _alista(Estudiante.objects.filter(grado_id=pk)),
+        )
+        if grado is None:
+            return None
+        return {
+            'object': grado,
+            'grado': grado,
+            'estadisticas': estadisticas,
+            'distribucion': distribucion,
+            'estudiantes': estudiantes,
+            'cursos': estadisticas['cursos'],
+            'cursos_por_año': estadisticas['cursos'],  # Ya ordenados por año
+            'matriz': await self.construir_matriz(grado, estudiantes),
+            'fragmentos_timeout': tiempo_expiracion(),
+        }
+
+    async def construir_matriz(self, grado, estudiantes):
+        """Igual que GradoDetailView.construir_matriz(); las dos consultas de las filas sin caché van a la vez."""
+        versiones = await aobtener_versiones([estudiante.pk for estudiante in estudiantes])
+        en_cache = await aobtener_fragmentos(versiones)
+        pendientes = [estudiante.pk for estudiante in estudiantes if estudiante.pk not in en_cache]
+
+        cursos_por_estudiante = {}
+        notas = IndiceNotas([])
+        if pendientes:
+            inscripciones, notas_pendientes = GradoDetailView.consultas_matriz(grado, pendientes)
+            inscripciones, notas = await asyncio.gather(
+                _alista(inscripciones), IndiceNotas.adesde_queryset(notas_pendientes)
+            )
+            cursos_por_estudiante = GradoDetailView.agrupar_cursos(inscripciones)
+        return GradoDetailView.armar_matriz(estudiantes, versiones, en_cache, cursos_por_estudiante, notas)
+
+
+class EstudianteDetailAsyncView(DetalleAsincronoView):
+    """Detalle de un estudiante; versión asíncrona de views.EstudianteDetailView."""
+    template_name = 'gestion_estudiantes/estudiante_detail.html'
+    vista_sincrona = EstudianteDetailView
+
+    async def obtener_contexto(self, pk):
+        estudiante, posiciones, cursos, indice_notas, historial = await asyncio.gather(
+            Estudiante.objects.select_related('grado').filter(pk=pk).afirst(),
+            _alista(Posicion.objects.filter(estudiante_id=pk).order_by()),
+            _alista(Curso.objects.filter(estudiantes=pk).select_related('grado').order_by()),
+            IndiceNotas.adesde_queryset(Nota.objects.filter(estudiante_id=pk)),
+            ahistorial_estudiante(pk),
+        )
+        if estudiante is None:
+            return None
+        # Se ordena en memoria para evitar un ordenamiento temporal sobre el join
+        cursos.sort(key=Curso.clave_orden)
+        return {
+            'object': estudiante,
+            'estudiante': estudiante,
+            'cursos': cursos,
+            'posicion_grado': EstudianteDetailView.asignar_posiciones(estudiante, cursos, posiciones),
+            'indice_notas': indice_notas,
+            'historial': historial,
+        }
@@ -33,8 +33,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'gestion_estudiantes.middleware.InstrumentacionSQLMiddleware',
 ]
 
+# Instrumentación de consultas SQL por petición (cabecera Server-Timing, log y detección de N+1).
+# Se controla con INSTRUMENTACION_SQL=0/1; sin definir (None) sigue a DEBUG al cargar el middleware,
+# que los ejecutores de pruebas desactivan
+INSTRUMENTACION_SQL = {'1': True, '0': False}.get(os.environ.get('INSTRUMENTACION_SQL'))
+# Veces que puede repetirse una misma consulta en una petición antes de reportarla como N+1
+INSTRUMENTACION_SQL_UMBRAL_N1 = int(os.environ.get('INSTRUMENTACION_SQL_UMBRAL_N1', 10))
+
 ROOT_URLCONF = 'sistema_estudiantes.urls'
 
 TEMPLATES = [
@@ -63,6 +71,73 @@ DATABASES = {
     }
 }
 
+# Cache
+# Por defecto se usa la caché en memoria local; el backend se puede cambiar con
+# variables de entorno (por ejemplo, django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'colegio-patito'),
+    }
+}
+# La caché en memoria local es propia de cada proceso: lo que invalida un proceso no
+# llega a los demás, así que lo que depende de invalidaciones dura poco con ella
+CACHE_LOCAL = CACHES['default']['BACKEND'].endswith('LocMemCache')
+if CACHE_LOCAL:
+    # Los fragmentos por estudiante del detalle de grado necesitan más que las 300 entradas por defecto
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('DJANGO_CACHE_MAX_ENTRIES', 50000))}
+
+# Segundos que duran las marcas de cambio de los GET condicionales (ver condicional.py);
+# con una caché compartida no expiran, salvo que se indique un valor
+CONDICIONAL_MARCAS_TIMEOUT = (
+    int(os.environ['CONDICIONAL_MARCAS_TIMEOUT']) if 'CONDICIONAL_MARCAS_TIMEOUT' in os.environ
+    else 30 if CACHE_LOCAL else None
+)
+
+# Segundos que dura la instantánea de estadísticas del dashboard (también se invalida con señales)
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 300))
+
+# Segundos que duran los fragmentos por estudiante del detalle de grado (se invalidan por
+# versión, pero con la caché local solo en el proceso que atendió el cambio)
+FRAGMENTOS_CACHE_TIMEOUT = int(os.environ.get('FRAGMENTOS_CACHE_TIMEOUT', 60 if CACHE_LOCAL else 24 * 60 * 60))
+
+# Tareas en segundo plano (ver gestion_estudiantes/tareas.py y el comando procesar_tareas)
+TAREAS_DIRECTORIO = os.environ.get('TAREAS_DIRECTORIO', str(BASE_DIR / 'tareas'))  # Archivos generados
+TAREAS_MAX_INTENTOS = int(os.environ.get('TAREAS_MAX_INTENTOS', 3))
+TAREAS_ESPERA_REINTENTO = int(os.environ.get('TAREAS_ESPERA_REINTENTO', 30))  # Segundos; se duplica por intento
+TAREAS_TIEMPO_ABANDONO = int(os.environ.get('TAREAS_TIEMPO_ABANDONO', 300))  # Segundos sin latido
+
+# Boletines por grado (ver gestion_estudiantes/boletines.py)
+BOLETINES_PROCESOS = int(os.environ.get('BOLETINES_PROCESOS', 0))  # 0 usa un proceso por núcleo
+BOLETINES_MINIMO_PARALELO = int(os.environ.get('BOLETINES_MINIMO_PARALELO', 50))  # Con menos se renderizan en línea
+# Con más estudiantes, la descarga desde la web se genera en segundo plano
+BOLETINES_MAXIMO_EN_LINEA = int(os.environ.get('BOLETINES_MAXIMO_EN_LINEA', 300))
+
+# Estadísticas de notas por curso y grado (ver gestion_estudiantes/estadisticas.py; también se invalidan con señales)
+ESTADISTICAS_CACHE_TIMEOUT = int(os.environ.get('ESTADISTICAS_CACHE_TIMEOUT', 60 * 60))
+ESTADISTICAS_ANCHO_HISTOGRAMA = int(os.environ.get('ESTADISTICAS_ANCHO_HISTOGRAMA', 10))  # Puntos por rango
+
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'gestion_estudiantes.sql': {
+            'handlers': ['console'],
+            'level': os.environ.get('INSTRUMENTACION_SQL_NIVEL_LOG', 'INFO'),
+            'propagate': False,
+        },
+        'gestion_estudiantes.boletines': {
+            'handlers': ['console'],
+            'level': 'INFO',  # Velocidad de cada generación
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -97,4 +172,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
-CRISPY_TEMPLATE_PACK = "bootstrap5" 
\ No newline at end of file
+CRISPY_TEMPLATE_PACK = "bootstrap5" 
+
+# Configuración académica
+# Nota mínima (de 0 a 100) para considerar aprobado un curso o un promedio
+NOTA_APROBATORIA = 60